@@ -0,0 +1,29 @@
+"""Makes `src/` importable and provides the settings WeatherCaster needs to start.
+
+Import this module before anything from `src/`; it never overrides variables
+that are already set in the environment.
+"""
+
+import os
+import statistics
+import sys
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+BENCH_DIR = Path(__file__).resolve().parent
+for path in (SRC_DIR, BENCH_DIR):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+os.environ.setdefault("WEATHER_API_KEY", "benchmark")
+os.environ.setdefault("MODEL_ID", "benchmark-model")
+os.environ.setdefault("MODEL_HOST", "http://127.0.0.1")
+os.environ.setdefault("MODEL_PORT", "11434")
+
+
+def summarize(label: str, samples: list[float], unit: str = "ms", scale: float = 1000.0) -> str:
+    """Formats mean/p50/p95 of a list of durations given in seconds."""
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    return (f"{label:<38} n={len(samples):<5} mean={statistics.fmean(samples) * scale:8.3f}{unit} "
+            f"p50={statistics.median(samples) * scale:8.3f}{unit} p95={p95 * scale:8.3f}{unit}")
@@ -0,0 +1,143 @@
+"""Deterministic OpenWeatherMap-shaped payloads used by the benchmarks.
+
+The shapes follow https://openweathermap.org/current, /api/hourly-forecast and
+/forecast16 so they validate against the models in `model_definition.response_types`.
+"""
+
+import math
+import time
+
+ICONS = ["01d", "02d", "03d", "04d", "09d", "10d", "11d", "13d", "50d",
+         "01n", "02n", "03n", "04n", "09n", "10n", "11n", "13n", "50n"]
+DESCRIPTIONS = ["clear sky", "few clouds", "scattered clouds", "broken clouds", "shower rain",
+                "rain", "thunderstorm", "snow", "mist"]
+
+CITIES = {
+    "berlin": ("Berlin", "DE", 52.5170365, 13.3888599),
+    "london": ("London", "GB", 51.5073219, -0.1276474),
+    "paris": ("Paris", "FR", 48.8588897, 2.3200410),
+    "konya": ("Konya", "TR", 37.8727000, 32.4924000),
+    "phuket": ("Phuket", "TH", 7.8847000, 98.3923000),
+    "rome": ("Rome", "IT", 41.8933203, 12.4829321),
+    "madrid": ("Madrid", "ES", 40.4167047, -3.7035825),
+    "vienna": ("Vienna", "AT", 48.2083537, 16.3725042),
+    "oslo": ("Oslo", "NO", 59.9133301, 10.7389701),
+}
+
+
+def _weather(i: int) -> dict:
+    return {"id": 800 + (i % 5), "main": "Clouds", "description": DESCRIPTIONS[i % len(DESCRIPTIONS)],
+            "icon": ICONS[i % len(ICONS)]}
+
+
+def _city(name: str = "Berlin", country: str = "DE", lat: float = 52.52, lon: float = 13.39) -> dict:
+    return {"id": 2950159, "name": name, "coord": {"lat": lat, "lon": lon}, "country": country,
+            "population": 1000000, "timezone": 7200, "sunrise": 1718593200, "sunset": 1718653200}
+
+
+def geocode_payload(query: str) -> list:
+    key = query.split(",")[0].strip().lower()
+    if key not in CITIES:
+        return []
+    name, country, lat, lon = CITIES[key]
+    return [{"name": name, "lat": lat, "lon": lon, "country": country}]
+
+
+def current_payload(now: int | None = None, name: str = "Berlin") -> dict:
+    now = now or int(time.time())
+    return {
+        "coord": {"lon": 13.39, "lat": 52.52},
+        "weather": [_weather(0)],
+        "base": "stations",
+        "main": {"temp": 21.3, "feels_like": 20.9, "temp_min": 19.8, "temp_max": 23.1,
+                 "pressure": 1014, "humidity": 56, "sea_level": 1014, "grnd_level": 1009},
+        "visibility": 10000,
+        "wind": {"speed": 3.6, "deg": 250, "gust": 6.1},
+        "clouds": {"all": 20},
+        "dt": now,
+        "sys": {"country": "DE", "sunrise": now - 6 * 3600, "sunset": now + 8 * 3600},
+        "timezone": 7200,
+        "id": 2950159,
+        "name": name,
+        "cod": 200,
+    }
+
+
+def hourly_payload(count: int = 96, now: int | None = None) -> dict:
+    start = (now or int(time.time())) // 3600 * 3600 + 3600
+    items = []
+    for i in range(count):
+        dt = start + i * 3600
+        temp = 15.0 + 6.0 * math.sin(i / 24 * 2 * math.pi)
+        items.append({
+            "dt": dt,
+            "main": {"temp": round(temp, 2), "feels_like": round(temp - 0.4, 2), "temp_min": round(temp - 1, 2),
+                     "temp_max": round(temp + 1, 2), "pressure": 1010 + i % 7, "humidity": 50 + i % 30,
+                     "sea_level": 1010 + i % 7, "grnd_level": 1005 + i % 7},
+            "weather": [_weather(i)],
+            "clouds": {"all": (i * 7) % 100},
+            "wind": {"speed": round(2.0 + (i % 9) * 0.4, 2), "deg": (i * 23) % 360, "gust": 5.2},
+            "visibility": 10000,
+            "pop": round((i % 10) / 10, 1),
+            "sys": {"pod": "d" if 6 <= (i % 24) <= 18 else "n"},
+            "dt_txt": time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(dt)),
+        })
+    return {"cod": "200", "message": 0, "cnt": count, "list": items, "city": _city()}
+
+
+def daily_payload(count: int = 16, now: int | None = None) -> dict:
+    start = (now or int(time.time())) // 86400 * 86400 + 11 * 3600
+    items = []
+    for i in range(count):
+        dt = start + i * 86400
+        items.append({
+            "dt": dt,
+            "sunrise": dt - 7 * 3600,
+            "sunset": dt + 9 * 3600,
+            "temp": {"day": 20.0 + i % 4, "min": 12.0 + i % 3, "max": 24.0 + i % 5,
+                     "night": 13.0, "eve": 18.0, "morn": 14.0},
+            "feels_like": {"day": 19.5, "night": 12.4, "eve": 17.6, "morn": 13.2},
+            "pressure": 1012 + i % 5,
+            "humidity": 60 + i % 20,
+            "weather": [_weather(i)],
+            "speed": round(3.0 + (i % 6) * 0.5, 2),
+            "deg": (i * 37) % 360,
+            "gust": 7.5,
+            "clouds": (i * 13) % 100,
+            "pop": round((i % 10) / 10, 1),
+        })
+    return {"city": _city(), "cod": "200", "message": 0.05, "cnt": count, "list": items}
+
+
+def onecall_payload(now: int | None = None, hours: int = 48, days: int = 8) -> dict:
+    """One Call 3.0 response (https://openweathermap.org/api/one-call-3) built from the payloads above."""
+    now = now or int(time.time())
+    current = current_payload(now=now)
+    hourly = hourly_payload(hours, now=now)["list"]
+    daily = daily_payload(days, now=now)["list"]
+    return {
+        "lat": current["coord"]["lat"],
+        "lon": current["coord"]["lon"],
+        "timezone": "Europe/Berlin",
+        "timezone_offset": current["timezone"],
+        "current": {
+            "dt": now, "sunrise": current["sys"]["sunrise"], "sunset": current["sys"]["sunset"],
+            "temp": current["main"]["temp"], "feels_like": current["main"]["feels_like"],
+            "pressure": current["main"]["pressure"], "humidity": current["main"]["humidity"],
+            "clouds": current["clouds"]["all"], "uvi": 3.2, "visibility": current["visibility"],
+            "wind_speed": current["wind"]["speed"], "wind_deg": current["wind"]["deg"], "wind_gust": current["wind"]["gust"],
+            "weather": current["weather"],
+        },
+        "hourly": [{
+            "dt": item["dt"], "temp": item["main"]["temp"], "feels_like": item["main"]["feels_like"],
+            "pressure": item["main"]["pressure"], "humidity": item["main"]["humidity"], "clouds": item["clouds"]["all"],
+            "wind_speed": item["wind"]["speed"], "wind_deg": item["wind"]["deg"], "wind_gust": item["wind"]["gust"],
+            "pop": item["pop"], "weather": item["weather"],
+        } for item in hourly],
+        "daily": [{
+            "dt": item["dt"], "sunrise": item["sunrise"], "sunset": item["sunset"], "temp": item["temp"],
+            "feels_like": item["feels_like"], "pressure": item["pressure"], "humidity": item["humidity"],
+            "wind_speed": item["speed"], "wind_deg": item["deg"], "wind_gust": item["gust"], "clouds": item["clouds"],
+            "pop": item["pop"], "weather": item["weather"],
+        } for item in daily],
+    }
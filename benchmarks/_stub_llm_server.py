@@ -0,0 +1,129 @@
+"""Minimal keep-alive HTTP/1.1 stand-in for an OpenAI-compatible LLM server (e.g. Ollama).
+
+Serves `GET /v1/models` and `POST /v1/chat/completions` (plain and streamed) with a canned
+answer. A completion takes `generation_delay` seconds; beyond `capacity` concurrent
+completions each one slows down proportionally, like a GPU box that is shared by too
+many requests. `stop()` closes the server (connections are refused) and `start()` brings it
+back on the same port; `fail_status` answers every request with that status instead.
+"""
+
+import asyncio
+import json
+import time
+
+
+class StubLLMServer:
+    """Serves canned chat completions and counts the requests it answered."""
+
+    def __init__(self, generation_delay: float = 0.2, capacity: int = 2, answer: str = "Mild with a few clouds.") -> None:
+        self.generation_delay = generation_delay
+        self.capacity = capacity
+        self.answer = answer
+        self.completions = 0
+        self.health_checks = 0
+        self.fail_status = 0
+        self.port = 0
+        self._active = 0
+        self._server: asyncio.Server | None = None
+        self._handlers: set[asyncio.Task] = set()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle_connection, "127.0.0.1", self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        """Closes the listening socket and all open connections, and waits until their handlers have finished."""
+        if self._server is None:
+            return
+        self._server.close()
+        handlers = list(self._handlers)
+        for handler in handlers:
+            handler.cancel()
+        await asyncio.gather(*handlers, return_exceptions=True)
+        await self._server.wait_closed()
+        self._server = None
+
+    async def __aenter__(self) -> "StubLLMServer":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.stop()
+
+    def _completion(self, model: str) -> dict:
+        return {
+            "id": "chatcmpl-stub", "object": "chat.completion", "created": int(time.time()), "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": self.answer}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 100, "completion_tokens": 8, "total_tokens": 108},
+        }
+
+    def _stream_events(self, model: str) -> bytes:
+        chunks = [{"role": "assistant", "content": ""}] + [{"content": word + " "} for word in self.answer.split()]
+        events = []
+        for index, delta in enumerate(chunks):
+            finish_reason = "stop" if index == len(chunks) - 1 else None
+            events.append({"id": "chatcmpl-stub", "object": "chat.completion.chunk", "created": int(time.time()), "model": model,
+                           "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]})
+        body = "".join(f"data: {json.dumps(event)}\n\n" for event in events) + "data: [DONE]\n\n"
+        return body.encode()
+
+    async def _generate(self) -> None:
+        self._active += 1
+        try:
+            await asyncio.sleep(self.generation_delay * max(1.0, self._active / self.capacity))
+        finally:
+            self._active -= 1
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        handler = asyncio.current_task()
+        self._handlers.add(handler)
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, _version = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+
+                content_type = "application/json"
+                if self.fail_status:
+                    status, payload = self.fail_status, json.dumps({"error": {"message": "injected fault"}}).encode()
+                elif method == "GET" and target.startswith("/v1/models"):
+                    self.health_checks += 1
+                    status, payload = 200, json.dumps({"object": "list", "data": [{"id": "stub", "object": "model"}]}).encode()
+                elif method == "POST" and target.startswith("/v1/chat/completions"):
+                    request = json.loads(body or b"{}")
+                    await self._generate()
+                    self.completions += 1
+                    status = 200
+                    if request.get("stream"):
+                        content_type = "text/event-stream"
+                        payload = self._stream_events(request.get("model", "stub"))
+                    else:
+                        payload = json.dumps(self._completion(request.get("model", "stub"))).encode()
+                else:
+                    status, payload = 404, json.dumps({"error": {"message": "not found"}}).encode()
+
+                writer.write(
+                    f"HTTP/1.1 {status} X\r\nContent-Type: {content_type}\r\n"
+                    f"Content-Length: {len(payload)}\r\nConnection: keep-alive\r\n\r\n".encode() + payload
+                )
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except asyncio.CancelledError:
+            # Cancelled by stop(). Python 3.11 logs connection handlers that end cancelled as unhandled errors
+            pass
+        finally:
+            self._handlers.discard(handler)
+            writer.close()
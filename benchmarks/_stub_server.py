@@ -0,0 +1,131 @@
+"""Minimal keep-alive HTTP/1.1 stand-in for the OpenWeatherMap API.
+
+Runs on the benchmark's own event loop so no extra dependencies are needed.
+`handshake_delay` is paid once per accepted TCP connection to emulate the
+TCP+TLS setup cost of talking to api.openweathermap.org over the internet.
+`inject_faults()` makes the server answer with errors to exercise retries and
+the circuit breaker.
+"""
+
+import asyncio
+import json
+import random
+from collections import Counter
+from typing import Callable
+from urllib.parse import parse_qs, urlsplit
+
+import _payloads
+
+Handler = Callable[[dict[str, str]], tuple[int, object]]
+
+
+class StubOWMServer:
+    """Serves canned OWM payloads and counts connections and requests per path."""
+
+    def __init__(self, handshake_delay: float = 0.0, response_delay: float = 0.0) -> None:
+        self.handshake_delay = handshake_delay
+        self.response_delay = response_delay
+        self.connections = 0
+        self.requests: Counter[str] = Counter()
+        self.routes: dict[str, Handler] = {
+            "/geo/1.0/direct": lambda q: (200, _payloads.geocode_payload(q.get("q", ""))),
+            "/data/2.5/weather": lambda q: (200, _payloads.current_payload()),
+            "/data/2.5/forecast/hourly": lambda q: (200, _payloads.hourly_payload()),
+            "/data/2.5/forecast/daily": lambda q: (200, _payloads.daily_payload(int(q.get("cnt", 16)))),
+            "/data/3.0/onecall": lambda q: (200, _payloads.onecall_payload()),
+        }
+        self.faults_served = 0
+        self._fault_status = 0
+        self._fault_rate = 0.0
+        self._fault_count: int | None = None
+        self._retry_after: float | None = None
+        self._server: asyncio.Server | None = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.sockets[0].getsockname()[:2]
+        return f"http://{host}:{port}"
+
+    async def __aenter__(self) -> "StubOWMServer":
+        self._server = await asyncio.start_server(self._handle_connection, "127.0.0.1", 0)
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self._server.close()
+        await self._server.wait_closed()
+
+    def reset_counters(self) -> None:
+        self.connections = 0
+        self.faults_served = 0
+        self.requests.clear()
+
+    def inject_faults(self, status: int = 503, rate: float = 1.0, count: int | None = None, retry_after: float | None = None) -> None:
+        """Answers requests with `status` instead of the payload.
+
+        Args:
+            status (int): Status code of the faulty responses (0 clears the faults).
+            rate (float): Fraction of requests that fail.
+            count (int | None): Number of faulty responses after which the server is healthy again, None for no limit.
+            retry_after (float | None): Value of a Retry-After header sent with the faulty responses (e.g. for 429).
+        """
+        self._fault_status = status
+        self._fault_rate = rate
+        self._fault_count = count
+        self._retry_after = retry_after
+
+    def clear_faults(self) -> None:
+        self.inject_faults(status=0)
+
+    def _next_fault(self) -> int:
+        """Status of the fault to serve for the current request, 0 if it should succeed."""
+        if not self._fault_status or (self._fault_count is not None and self._fault_count <= 0):
+            return 0
+        if random.random() >= self._fault_rate:
+            return 0
+        if self._fault_count is not None:
+            self._fault_count -= 1
+        self.faults_served += 1
+        return self._fault_status
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        if self.handshake_delay:
+            await asyncio.sleep(self.handshake_delay)
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                _method, target, _version = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                if length := int(headers.get("content-length", 0)):
+                    await reader.readexactly(length)
+
+                url = urlsplit(target)
+                query = {k: v[0] for k, v in parse_qs(url.query).items()}
+                self.requests[url.path] += 1
+                handler = self.routes.get(url.path)
+                extra_headers = ""
+                if fault := self._next_fault():
+                    status, payload = fault, {"cod": str(fault), "message": "injected fault"}
+                    if self._retry_after is not None:
+                        extra_headers = f"Retry-After: {self._retry_after:g}\r\n"
+                else:
+                    status, payload = handler(query) if handler else (404, {"cod": "404", "message": "not found"})
+                if self.response_delay:
+                    await asyncio.sleep(self.response_delay)
+                body = json.dumps(payload).encode()
+                writer.write(
+                    f"HTTP/1.1 {status} X\r\nContent-Type: application/json\r\n{extra_headers}"
+                    f"Content-Length: {len(body)}\r\nConnection: keep-alive\r\n\r\n".encode() + body
+                )
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
@@ -0,0 +1,105 @@
+"""Queue wait, latency and shed load of the GUI's agent pool under a burst of users.
+
+Usage:
+    python benchmarks/bench_admission_control.py [--users 60] [--llm-seconds 0.5]
+
+Simulates simultaneous users of the Gradio UI (`GradioWeatherUI._get_weather_response`) with a
+stub LLM whose answers take `--llm-seconds` and which, like a local LLM server, slows down
+when it generates more requests than it has capacity for. Compares an unbounded setup (every
+query goes to the LLM at once) with agent pools of different sizes and a max. queue wait.
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+import _bench_env
+from _bench_env import summarize
+from _stub_server import StubOWMServer
+
+# Requests the stub LLM generates in parallel before each one gets slower
+LLM_CAPACITY = 4
+
+
+def stub_model(llm_seconds: float):
+    from pydantic_ai.messages import ModelResponse, TextPart, ToolCallPart, ToolReturnPart
+    from pydantic_ai.models.function import FunctionModel
+
+    active = 0
+
+    async def respond(messages, info) -> ModelResponse:
+        nonlocal active
+        returns = [part for message in messages for part in getattr(message, "parts", []) if isinstance(part, ToolReturnPart)]
+        active += 1
+        try:
+            # Throughput is shared between all requests beyond the capacity
+            await asyncio.sleep(llm_seconds / 2 * max(1.0, active / LLM_CAPACITY))
+        finally:
+            active -= 1
+        if not returns:
+            return ModelResponse(parts=[ToolCallPart(tool_name="get_weather_forecast", args={"location_name": "Berlin", "forecast_range": "current"})])
+        return ModelResponse(parts=[TextPart(content="Mild with a few clouds.")])
+
+    return FunctionModel(respond)
+
+
+async def run_burst(ui, users: int) -> tuple[list[float], list[float], int]:
+    """Starts `users` queries at once. Returns the latencies of answered and of busy queries, and the busy count."""
+    from gradio_ui import BUSY_MESSAGE
+
+    answered: list[float] = []
+    busy: list[float] = []
+
+    async def one_user() -> None:
+        start = time.perf_counter()
+        response = ""
+        async for response in ui._get_weather_response("How is the weather in Berlin?", session_id=None):
+            pass
+        (busy if response == BUSY_MESSAGE else answered).append(time.perf_counter() - start)
+
+    await asyncio.gather(*(one_user() for _ in range(users)))
+    return answered, busy, len(busy)
+
+
+async def main(users: int, llm_seconds: float) -> None:
+    os.environ["FAST_PATH_ENABLED"] = "false"
+    os.environ["STREAM_RESPONSES"] = "false"
+    os.environ["GEOCODING_CACHE_PATH"] = ""
+
+    async with StubOWMServer() as server:
+        os.environ["OWM_BASE_URL"] = server.base_url
+        from application.agent_pool import AgentPool
+        from gradio_ui import GradioWeatherUI
+        from observability.metrics import STAGE_DURATION, registry
+
+        ui = GradioWeatherUI()
+        setups = [("unbounded", users, 0.0), (f"pool={LLM_CAPACITY}", LLM_CAPACITY, 0.0),
+                  (f"pool={LLM_CAPACITY} wait<=3s", LLM_CAPACITY, 3.0), (f"pool={LLM_CAPACITY * 2} wait<=3s", LLM_CAPACITY * 2, 3.0)]
+        print(f"{users} simultaneous users, stub LLM {llm_seconds:.2f}s per answer, capacity {LLM_CAPACITY}")
+        try:
+            with ui.chatbot.agent.override(model=stub_model(llm_seconds)):
+                for label, capacity, max_queue_wait in setups:
+                    registry.reset()
+                    ui.agent_pool = AgentPool(capacity, max_queue_wait, initial_service_time=llm_seconds)
+                    answered, busy, busy_count = await run_burst(ui, users)
+                    stats = ui.agent_pool.stats
+                    queue_wait = registry.histogram(STAGE_DURATION, stage="queue_wait", outcome="ok")
+                    print(f"\n{label}: answered {len(answered)}, busy {busy_count} (rejected {stats.rejected}, shed {stats.shed}), "
+                          f"max queue depth {stats.max_queue_depth}")
+                    if answered:
+                        print(summarize("  answered latency", answered))
+                    if busy:
+                        print(summarize("  busy latency", busy))
+                    if queue_wait is not None:
+                        print(f"  queue wait p50={queue_wait.quantile(0.5) * 1000:.0f}ms p99={queue_wait.quantile(0.99) * 1000:.0f}ms")
+        finally:
+            await ui.chatbot.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=60)
+    parser.add_argument("--llm-seconds", type=float, default=0.5)
+    args = parser.parse_args()
+    asyncio.run(main(args.users, args.llm_seconds))
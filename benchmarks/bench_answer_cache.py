@@ -0,0 +1,100 @@
+"""LLM calls and latency saved by the answer cache on repeated questions.
+
+Usage:
+    python benchmarks/bench_answer_cache.py [--rounds 5] [--llm-seconds 0.3]
+
+Sends the Gradio `example_questions` several times, as many users would, with a stub
+model (`FunctionModel`) that calls the forecast tool for Berlin and takes `--llm-seconds`
+per request. Compares ANSWER_CACHE_SIZE=0 with the in-memory cache and, after a restart, with
+the cache persisted to SQLite. Finally the stand-in server returns different daily data to a
+new process, so every persisted answer must be invalidated rather than served.
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import _bench_env
+from _bench_env import summarize
+from _stub_server import StubOWMServer
+
+
+def stub_model(llm_seconds: float, counter: list[int]):
+    from pydantic_ai.messages import ModelResponse, TextPart, ToolCallPart, ToolReturnPart
+    from pydantic_ai.models.function import FunctionModel
+
+    async def respond(messages, info) -> ModelResponse:
+        counter[0] += 1
+        returns = [part for message in messages for part in getattr(message, "parts", []) if isinstance(part, ToolReturnPart)]
+        await asyncio.sleep(llm_seconds)
+        if not returns:
+            return ModelResponse(parts=[ToolCallPart(tool_name="get_weather_forecast", args={"location_name": "Berlin", "forecast_range": "daily"})])
+        return ModelResponse(parts=[TextPart(content="Mild with a few clouds.")])
+
+    return FunctionModel(respond)
+
+
+async def run_rounds(rounds: int, llm_seconds: float) -> tuple[list[float], int, dict]:
+    """Asks every example question `rounds` times. Returns the latencies, the LLM calls and the cache stats."""
+    from application.weather_caster import WeatherCaster
+    from configs.weather_questions import example_questions
+
+    llm_calls = [0]
+    latencies: list[float] = []
+    async with WeatherCaster() as caster:
+        with caster.agent.override(model=stub_model(llm_seconds, llm_calls)):
+            for _ in range(rounds):
+                for (question,) in example_questions:
+                    start = time.perf_counter()
+                    async for _response in caster.get_response(question):
+                        pass
+                    latencies.append(time.perf_counter() - start)
+        stats = caster.answer_cache.stats.model_dump() if caster.answer_cache is not None else {}
+    return latencies, llm_calls[0], stats
+
+
+async def main(rounds: int, llm_seconds: float) -> None:
+    from configs.config import get_settings
+
+    os.environ["FAST_PATH_ENABLED"] = "false"
+    os.environ["STREAM_RESPONSES"] = "false"
+    os.environ["GEOCODING_CACHE_PATH"] = ""
+
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = str(Path(directory) / "answers.sqlite3")
+        async with StubOWMServer() as server:
+            os.environ["OWM_BASE_URL"] = server.base_url
+            setups = [("no answer cache", "0", ""), ("in-memory", "1024", ""),
+                      ("SQLite, first process", "1024", db_path), ("SQLite, after restart", "1024", db_path)]
+            for label, size, path in setups:
+                os.environ["ANSWER_CACHE_SIZE"] = size
+                os.environ["ANSWER_CACHE_PATH"] = path
+                get_settings.cache_clear()
+                latencies, llm_calls, stats = await run_rounds(rounds, llm_seconds)
+                hits = stats.get("memory_hits", 0) + stats.get("disk_hits", 0)
+                print(f"{summarize(label, latencies)} llm_calls={llm_calls:<4} hits={hits:<4} invalidated={stats.get('invalidated', 0)}")
+
+            # New forecast data upstream: every persisted answer fails validation
+            from _payloads import daily_payload
+            server.routes["/data/2.5/forecast/daily"] = lambda q: (200, _shift_temperatures(daily_payload(int(q.get("cnt", 16)))))
+            latencies, llm_calls, stats = await run_rounds(1, llm_seconds)
+            print(f"{summarize('SQLite, forecast data changed', latencies)} llm_calls={llm_calls:<4} "
+                  f"hits={stats['memory_hits'] + stats['disk_hits']:<4} invalidated={stats['invalidated']}")
+
+
+def _shift_temperatures(payload: dict) -> dict:
+    for item in payload.get("list", []):
+        for key in item.get("temp", {}):
+            item["temp"][key] += 1.0
+    return payload
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--llm-seconds", type=float, default=0.3)
+    args = parser.parse_args()
+    asyncio.run(main(args.rounds, args.llm_seconds))
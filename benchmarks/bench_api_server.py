@@ -0,0 +1,184 @@
+"""Throughput and tail latency of the headless API server (/forecast and /chat).
+
+Usage:
+    python benchmarks/bench_api_server.py [--requests 400] [--chats 40]
+
+Serves `api_server.app` with uvicorn in-process against the local stand-in OpenWeatherMap
+server. Requires the `api` extra (fastapi, uvicorn).
+
+- /forecast: requests at several concurrency levels over keep-alive connections vs. a new
+  connection per request. The forecast cache is warm after the first request per city, so
+  the numbers show the overhead of the server itself.
+- /chat: streamed chats with a stub model that takes 0.2s per answer (a tool call and the
+  answer, 0.1s each) and only two chat slots per worker, showing queueing, time to first
+  byte and the 503 rejections once a request waits longer than API_CHAT_QUEUE_TIMEOUT.
+  Every answered chat is checked for the stub model's answer; the run aborts otherwise.
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import time
+
+import _bench_env
+from _bench_env import summarize
+from _stub_server import StubOWMServer
+
+CITIES = ["Berlin", "London", "Paris", "Rome", "Konya", "Madrid", "Vienna", "Oslo"]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+ANSWER = "Mild with a few clouds."
+TOOL_ARGS = {"location_name": "Berlin", "forecast_range": "current"}
+
+
+def stub_model():
+    """A model that calls the forecast tool, then answers; 0.1s per turn, plain and streamed."""
+    import json
+    from pydantic_ai.messages import ModelResponse, TextPart, ToolCallPart, ToolReturnPart
+    from pydantic_ai.models.function import DeltaToolCall, FunctionModel
+
+    def has_tool_result(messages) -> bool:
+        return any(isinstance(part, ToolReturnPart) for message in messages for part in getattr(message, "parts", []))
+
+    async def respond(messages, info) -> ModelResponse:
+        await asyncio.sleep(0.1)
+        if not has_tool_result(messages):
+            return ModelResponse(parts=[ToolCallPart(tool_name="get_weather_forecast", args=TOOL_ARGS)])
+        return ModelResponse(parts=[TextPart(content=ANSWER)])
+
+    async def stream(messages, info):
+        await asyncio.sleep(0.1)
+        if not has_tool_result(messages):
+            yield {0: DeltaToolCall(name="get_weather_forecast", json_args=json.dumps(TOOL_ARGS))}
+            return
+        for word in ANSWER.split(" "):
+            yield word + " "
+
+    return FunctionModel(respond, stream_function=stream)
+
+
+async def forecast_load(base_url: str, total: int, concurrency: int, keep_alive: bool) -> tuple[list[float], float]:
+    """Sends `total` /forecast requests with `concurrency` in flight. Returns the latencies and the wall time."""
+    import httpx
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency if keep_alive else 0)
+    latencies: list[float] = []
+    queue: asyncio.Queue[int] = asyncio.Queue()
+    for index in range(total):
+        queue.put_nowait(index)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits) as client:
+        async def worker() -> None:
+            while not queue.empty():
+                index = queue.get_nowait()
+                start = time.perf_counter()
+                response = await client.get("/forecast", params={"location": CITIES[index % len(CITIES)], "range": "current"})
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return latencies, time.perf_counter() - start
+
+
+async def chat_load(base_url: str, chats: int) -> tuple[list[float], list[float], int, int]:
+    """Starts `chats` streamed chats at once.
+
+    Returns:
+        tuple: Time to first byte and total time of the answered chats, the number of 503s and
+               the number of chats whose answer was not the stub model's.
+    """
+    import httpx
+
+    first_bytes: list[float] = []
+    totals: list[float] = []
+    rejected = 0
+    failed = 0
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=30.0) as client:
+        async def one_chat() -> None:
+            nonlocal rejected, failed
+            start = time.perf_counter()
+            async with client.stream("POST", "/chat", json={"query": "Is it going to rain in Berlin?"}) as response:
+                if response.status_code == 503:
+                    rejected += 1
+                    return
+                response.raise_for_status()
+                first_byte = None
+                chunks = []
+                async for chunk in response.aiter_text():
+                    if first_byte is None:
+                        first_byte = time.perf_counter() - start
+                    chunks.append(chunk)
+            if "".join(chunks).strip() != ANSWER:
+                failed += 1
+                return
+            first_bytes.append(first_byte or 0.0)
+            totals.append(time.perf_counter() - start)
+
+        await asyncio.gather(*(one_chat() for _ in range(chats)))
+    return first_bytes, totals, rejected, failed
+
+
+async def main(total: int, chats: int) -> None:
+    os.environ["FAST_PATH_ENABLED"] = "false"
+    os.environ["GEOCODING_CACHE_PATH"] = ""
+    os.environ["API_MAX_CONCURRENT_CHATS"] = "2"
+    os.environ["API_CHAT_QUEUE_TIMEOUT"] = "1.0"
+
+    async with StubOWMServer(response_delay=0.005) as server:
+        os.environ["OWM_BASE_URL"] = server.base_url
+        import uvicorn
+        import api_server
+        from application.weather_caster import WeatherCaster
+        from configs.config import env
+
+        port = free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        # The lifespan is replaced by setting up the worker state here, so the agent model can be
+        # overridden before the server (and with it every request task) starts
+        async with WeatherCaster() as caster:
+            api_server.app.state.caster = caster
+            api_server.app.state.chat_slots = asyncio.Semaphore(env.API_MAX_CONCURRENT_CHATS)
+            config = uvicorn.Config(api_server.app, host="127.0.0.1", port=port, lifespan="off", log_level="warning",
+                                    timeout_keep_alive=env.API_KEEPALIVE_TIMEOUT)
+            uvicorn_server = uvicorn.Server(config)
+            with caster.agent.override(model=stub_model()):
+                serve_task = asyncio.create_task(uvicorn_server.serve())
+                while not uvicorn_server.started:
+                    await asyncio.sleep(0.01)
+                try:
+                    # Warm the geocoding and forecast caches
+                    await forecast_load(base_url, len(CITIES), 1, keep_alive=True)
+                    for concurrency in (1, 16, 64):
+                        for keep_alive in (True, False):
+                            latencies, wall = await forecast_load(base_url, total, concurrency, keep_alive)
+                            label = f"/forecast c={concurrency} {'keep-alive' if keep_alive else 'new conn'}"
+                            print(f"{summarize(label, latencies)} {total / wall:8.0f} req/s")
+
+                    first_bytes, totals, rejected, failed = await chat_load(base_url, chats)
+                    if failed:
+                        raise RuntimeError(f"{failed} of {chats} chats did not return the stub model's answer, the /chat figures would be meaningless")
+                    print(f"\n/chat: {chats} concurrent chats, {env.API_MAX_CONCURRENT_CHATS} slots, {env.API_CHAT_QUEUE_TIMEOUT:.1f}s queue timeout")
+                    if totals:
+                        print(summarize("/chat time to first byte", first_bytes))
+                        print(summarize("/chat total", totals))
+                    print(f"{'/chat rejected with 503':<38} {rejected}")
+                finally:
+                    uvicorn_server.should_exit = True
+                    await serve_task
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--chats", type=int, default=40)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.chats))
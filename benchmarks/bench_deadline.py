@@ -0,0 +1,86 @@
+"""Tail latency and answers with and without a per-query deadline (QUERY_DEADLINE).
+
+Usage:
+    python benchmarks/bench_deadline.py [--deadline 2.0] [--runs 20]
+
+The agent runs with a stub model (pydantic-ai `FunctionModel`) that calls the weather
+tool and then, in a share of the runs, takes far longer than usual to write the answer,
+like a local LLM that gets stuck. Weather data comes from the local stand-in
+OpenWeatherMap server. With a deadline, slow runs are cut off and answered with the
+rendered tool data instead.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import time
+
+import _bench_env
+from _bench_env import summarize
+from _stub_server import StubOWMServer
+
+SLOW_ANSWER_SHARE = 0.25
+SLOW_ANSWER_SECONDS = 8.0
+NORMAL_ANSWER_SECONDS = 0.3
+
+
+def stub_model(rng: random.Random):
+    from pydantic_ai.messages import ModelResponse, TextPart, ToolCallPart, ToolReturnPart
+    from pydantic_ai.models.function import FunctionModel
+
+    async def respond(messages, info) -> ModelResponse:
+        returns = [part for message in messages for part in getattr(message, "parts", []) if isinstance(part, ToolReturnPart)]
+        if not returns:
+            return ModelResponse(parts=[ToolCallPart(tool_name="get_weather_forecast", args={"location_name": "Berlin", "forecast_range": "daily"})])
+        slow = rng.random() < SLOW_ANSWER_SHARE
+        await asyncio.sleep(SLOW_ANSWER_SECONDS if slow else NORMAL_ANSWER_SECONDS)
+        return ModelResponse(parts=[TextPart(content="Mild with a few clouds all week.")])
+
+    return FunctionModel(respond)
+
+
+async def run_queries(caster, deadline: float, runs: int) -> tuple[list[float], dict[str, int]]:
+    from application.weather_caster import DEADLINE_EXCEEDED_MESSAGE, PARTIAL_ANSWER_NOTE
+
+    latencies = []
+    answers = {"complete": 0, "partial": 0, "none": 0}
+    with caster.agent.override(model=stub_model(random.Random(7))):
+        for _ in range(runs):
+            start = time.perf_counter()
+            async for response in caster.get_response("How will the weather be in Berlin this week?", deadline=deadline):
+                if response.startswith(PARTIAL_ANSWER_NOTE):
+                    answers["partial"] += 1
+                elif response == DEADLINE_EXCEEDED_MESSAGE:
+                    answers["none"] += 1
+                else:
+                    answers["complete"] += 1
+            latencies.append(time.perf_counter() - start)
+    return latencies, answers
+
+
+async def main(deadline: float, runs: int) -> None:
+    os.environ["FAST_PATH_ENABLED"] = "false"
+    os.environ["FORECAST_CACHE_TTL_DAILY"] = "0"
+    os.environ["FORECAST_CACHE_MAX_STALE"] = "0"
+    print(f"{runs} agent runs, {SLOW_ANSWER_SHARE:.0%} of the answers take {SLOW_ANSWER_SECONDS:.0f}s instead of {NORMAL_ANSWER_SECONDS}s")
+
+    async with StubOWMServer(response_delay=0.05) as server:
+        os.environ["OWM_BASE_URL"] = server.base_url
+        from application.weather_caster import WeatherCaster
+
+        async with WeatherCaster() as caster:
+            for label, budget in (("no deadline", 0.0), (f"deadline {deadline:.1f}s", deadline)):
+                latencies, answers = await run_queries(caster, budget, runs)
+                print(summarize(label, latencies, unit="s", scale=1.0))
+                print(f"{'':<38} answers: {answers['complete']} complete, {answers['partial']} partial, {answers['none']} without data")
+            stats = caster.deadline_stats
+            print(f"deadline misses: {stats.misses}/{stats.queries} ({stats.miss_rate:.0%}), partial answers: {stats.partial_answers}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--deadline", type=float, default=2.0)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.deadline, args.runs))
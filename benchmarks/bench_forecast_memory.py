@@ -0,0 +1,102 @@
+"""Memory footprint and transform time of cached forecasts: Pydantic payloads vs. snapshots.
+
+Usage:
+    python benchmarks/bench_forecast_memory.py [--entries 500] [--iterations 1000]
+
+The forecast cache used to hold the validated Pydantic payload (`HourlyForecastData`,
+...). It now holds a `ForecastSnapshot`: `__slots__` classes and columnar arrays, converted
+to the Pydantic `WeatherForecast` only when the tool returns. For each representation the
+script keeps `--entries` forecasts alive and reports the retained memory per forecast
+(tracemalloc), plus the time to build the tool result from a cached entry.
+
+What the cache holds in steady state is a snapshot that has already served requests, so
+snapshots are measured both freshly decoded and after `to_weather_forecast()` built a
+24-row and a full tool result from them; the two numbers must match.
+"""
+
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+
+import _bench_env
+import _payloads
+
+
+def retained_per_entry(build, entries: int) -> float:
+    """Bytes retained per object when `entries` objects built by `build()` are kept alive."""
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    kept = [build(i) for i in range(entries)]
+    retained = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    del kept
+    return retained / entries
+
+
+def served(snapshot):
+    """The snapshot after it has answered a 24-row and a full request, as the forecast cache holds it."""
+    snapshot.to_weather_forecast(max_hourly_items=24)
+    snapshot.to_weather_forecast()
+    return snapshot
+
+
+def measure(function, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        function()
+    return (time.perf_counter() - start) / iterations
+
+
+def main(entries: int, iterations: int) -> None:
+    from model_definition.response_types import (
+        DailyForecastData, HourlyForecastData, SlimDailyForecastData, SlimHourlyForecastData,
+        SlimWeatherData, WeatherData, parse_response
+    )
+    from tools.forecast_snapshot import ForecastSnapshot
+
+    now = int(time.time())
+    # Distinct payload bytes per entry, so nothing is shared between cached forecasts
+    payloads = {
+        "current": lambda i: json.dumps(_payloads.current_payload(now=now + i)).encode(),
+        "hourly (96 h)": lambda i: json.dumps(_payloads.hourly_payload(96, now=now + i * 3600)).encode(),
+        "daily (16 d)": lambda i: json.dumps(_payloads.daily_payload(16, now=now + i * 86400)).encode(),
+    }
+    models = {
+        "current": (WeatherData, SlimWeatherData, ForecastSnapshot.from_current),
+        "hourly (96 h)": (HourlyForecastData, SlimHourlyForecastData, ForecastSnapshot.from_hourly),
+        "daily (16 d)": (DailyForecastData, SlimDailyForecastData, ForecastSnapshot.from_daily),
+    }
+
+    print(f"{entries} cached forecasts per representation")
+    print(f"{'forecast':<15} {'cached as':<26} {'per forecast':>13} {'decode':>10} {'to tool result':>15}")
+    for name, payload in payloads.items():
+        model, slim_model, to_snapshot = models[name]
+        contents = [payload(i) for i in range(entries)]
+        content = contents[0]
+        representations = [
+            ("Pydantic payload", lambda data: parse_response(model, data)),
+            ("Pydantic payload, trusted", lambda data: parse_response(slim_model, data)),
+            ("snapshot", lambda data: to_snapshot(parse_response(model, data))),
+            ("snapshot, after serving", lambda data: served(to_snapshot(parse_response(model, data)))),
+        ]
+        for label, decode in representations:
+            per_entry = retained_per_entry(lambda i: decode(contents[i]), entries)
+            decode_time = measure(lambda: decode(content), iterations)
+            cached = decode(content)
+            if isinstance(cached, ForecastSnapshot):
+                to_result = measure(lambda: cached.to_weather_forecast(max_hourly_items=24), iterations)
+            else:
+                # Previous path: payload -> snapshot-equivalent rows -> WeatherForecast on every cache hit
+                to_result = measure(lambda: to_snapshot(cached).to_weather_forecast(max_hourly_items=24), iterations)
+            print(f"{name:<15} {label:<26} {per_entry / 1024:>10.1f}KiB {decode_time * 1e6:>8.1f}us {to_result * 1e6:>13.1f}us")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=500)
+    parser.add_argument("--iterations", type=int, default=1000)
+    args = parser.parse_args()
+    main(args.entries, args.iterations)
@@ -0,0 +1,103 @@
+"""Per-row transform vs. cached columnar forecast series for 96-hour and 16-day payloads.
+
+Usage:
+    python benchmarks/bench_forecast_transform.py [--iterations 2000]
+
+The per-row baseline is the loop `_transform_api_data_to_weather_forecast` used before the
+forecast series were introduced: on every request, one nested model per row,
+`datetime.fromtimestamp` per timestamp and the emoji table rebuilt per call. A series is
+decoded once per fetch and stored in the forecast cache with its snapshot; rows are built
+on every request and not kept. The cases measure a request on a cache hit, for all rows
+and for a short window (next 6 hours / next 3 days), the first request after a fetch,
+which also pays for the decode, and the decode alone.
+"""
+
+import argparse
+import time
+from datetime import datetime, timezone
+
+import _bench_env
+import _payloads
+
+
+def per_row_hourly(data, window=None):
+    from model_definition.final_response import HourlyWeather, WindInfo
+    from tools.weather_tools import get_weather_emoji
+
+    items = data.list
+    if window:
+        items = [item for item in items if window[0] <= item.dt < window[1]]
+    return [HourlyWeather(
+        time=datetime.fromtimestamp(item.dt, tz=timezone.utc), temperature=item.main.temp,
+        condition=item.weather[0].description.capitalize(), emoji=get_weather_emoji(item.weather[0].icon),
+        wind=WindInfo(speed=item.wind.speed, direction=item.wind.deg),
+        humidity=item.main.humidity, pressure=item.main.pressure
+    ) for item in items]
+
+
+def per_row_daily(data, window=None):
+    from model_definition.final_response import DailyWeather, DaylightInfo, WindInfo
+    from tools.weather_tools import get_weather_emoji
+
+    items = data.list
+    if window:
+        items = [item for item in items if window[0] <= item.dt < window[1]]
+    return [DailyWeather(
+        forecast_date=datetime.fromtimestamp(item.dt + data.city.timezone, tz=timezone.utc).date(),
+        max_temperature=item.temp.max, min_temperature=item.temp.min,
+        condition=item.weather[0].description.capitalize(), emoji=get_weather_emoji(item.weather[0].icon),
+        wind=WindInfo(speed=item.speed or 0.0, direction=item.deg or 0), humidity=item.humidity,
+        daylight=DaylightInfo(sunrise=datetime.fromtimestamp(item.sunrise, tz=timezone.utc),
+                              sunset=datetime.fromtimestamp(item.sunset, tz=timezone.utc))
+    ) for item in items]
+
+
+def measure(function, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        function()
+    return (time.perf_counter() - start) / iterations
+
+
+def main(iterations: int) -> None:
+    from model_definition.response_types import DailyForecastData, HourlyForecastData
+    from tools.forecast_series import DailySeries, HourlySeries
+
+    now = int(time.time())
+    hourly = HourlyForecastData(**_payloads.hourly_payload(96, now=now))
+    daily = DailyForecastData(**_payloads.daily_payload(16, now=now))
+    hour_window = (now // 3600 * 3600, now // 3600 * 3600 + 6 * 3600)
+    day_window = (now // 86400 * 86400, now // 86400 * 86400 + 3 * 86400)
+
+    # The series as held by the forecast cache, decoded once per fetch
+    cached_hourly = HourlySeries.from_api(hourly)
+    cached_daily = DailySeries.from_api(daily)
+    assert per_row_hourly(hourly) == cached_hourly.to_models()
+    assert per_row_daily(daily) == cached_daily.to_models()
+
+    cases = [
+        ("hourly, all 96 rows", lambda: per_row_hourly(hourly), lambda: cached_hourly.to_models()),
+        ("hourly, next 6 hours", lambda: per_row_hourly(hourly, hour_window),
+         lambda: cached_hourly.window(*hour_window).to_models()),
+        ("daily, all 16 rows", lambda: per_row_daily(daily), lambda: cached_daily.to_models()),
+        ("daily, next 3 days", lambda: per_row_daily(daily, day_window),
+         lambda: cached_daily.window(*day_window).to_models()),
+        ("hourly, 1st request after fetch", lambda: per_row_hourly(hourly, hour_window),
+         lambda: HourlySeries.from_api(hourly).window(*hour_window).to_models()),
+        ("daily, 1st request after fetch", lambda: per_row_daily(daily, day_window),
+         lambda: DailySeries.from_api(daily).window(*day_window).to_models()),
+        ("hourly, decode only (no rows)", lambda: None, lambda: HourlySeries.from_api(hourly)),
+        ("daily, decode only (no rows)", lambda: None, lambda: DailySeries.from_api(daily)),
+    ]
+    print(f"{'case':<32} {'per-row':>10} {'series':>10} {'speedup':>8}")
+    for label, baseline, columnar in cases:
+        baseline_time = measure(baseline, iterations)
+        columnar_time = measure(columnar, iterations)
+        speedup = f"{baseline_time / columnar_time:7.2f}x" if baseline_time > 1e-7 else "      -"
+        print(f"{label:<32} {baseline_time * 1e6:>8.1f}us {columnar_time * 1e6:>8.1f}us {speedup}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=2000)
+    main(parser.parse_args().iterations)
@@ -0,0 +1,65 @@
+"""Per-request latency of the pooled WeatherAPIClient vs. a new AsyncClient per call.
+
+Usage:
+    python benchmarks/bench_http_pool.py [--iterations 200] [--handshake-ms 30]
+
+The stand-in server charges `--handshake-ms` per new TCP connection to model the
+TCP+TLS setup against api.openweathermap.org; loopback alone hides that cost.
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+import _bench_env
+from _stub_server import StubOWMServer
+
+
+async def _per_call_clients(base_url: str) -> None:
+    """The previous behaviour: one AsyncClient for geocoding and another for the forecast."""
+    import httpx
+    async with httpx.AsyncClient() as client:
+        response = await client.get(f"{base_url}/geo/1.0/direct", params={"q": "Berlin", "limit": 1})
+        location = response.json()[0]
+    async with httpx.AsyncClient() as client:
+        response = await client.get(f"{base_url}/data/2.5/weather", params={"lat": location["lat"], "lon": location["lon"]})
+        response.json()
+
+
+async def main(iterations: int, handshake_ms: float) -> None:
+    async with StubOWMServer(handshake_delay=handshake_ms / 1000) as server:
+        os.environ["OWM_BASE_URL"] = server.base_url
+        from tools.weather_tools import ForecastRange, WeatherAPIClient
+
+        baseline = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            await _per_call_clients(server.base_url)
+            baseline.append(time.perf_counter() - start)
+        baseline_connections = server.connections
+        server.reset_counters()
+
+        client = WeatherAPIClient()
+        await client.start()
+        pooled = []
+        try:
+            for _ in range(iterations):
+                start = time.perf_counter()
+                await client.get_weather_forecast("Berlin", ForecastRange.CURRENT)
+                pooled.append(time.perf_counter() - start)
+        finally:
+            await client.aclose()
+
+        print(_bench_env.summarize("new AsyncClient per call", baseline) + f" connections={baseline_connections}")
+        print(_bench_env.summarize("pooled WeatherAPIClient", pooled) + f" connections={server.connections}")
+        saved = (sum(baseline) - sum(pooled)) / iterations * 1000
+        print(f"latency saved per tool call: {saved:.3f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--handshake-ms", type=float, default=30.0)
+    args = parser.parse_args()
+    asyncio.run(main(args.iterations, args.handshake_ms))
@@ -0,0 +1,68 @@
+"""Accuracy and latency of the fast-path intent router on `fast_path_corpus`.
+
+Usage:
+    python benchmarks/bench_intent_router.py
+
+Routing accuracy is checked against the expected (location, range) of every corpus
+entry; the end-to-end fast-path answer latency is measured against the local stand-in
+OpenWeatherMap server. The script exits non-zero if any corpus entry is routed wrongly.
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+import _bench_env
+from _stub_server import StubOWMServer
+
+
+async def main() -> int:
+    from application.intent_router import IntentRouter
+    from configs.weather_questions import fast_path_corpus
+    from tools.gazetteer import Gazetteer
+
+    gazetteer = Gazetteer()
+    # Built up front like WeatherAPIClient.start() does, so the first routing decision is not timed with it
+    gazetteer.load()
+    router = IntentRouter(gazetteer)
+    failures = 0
+    routing_times = []
+    for query, expected in fast_path_corpus:
+        start = time.perf_counter()
+        routed = router.route(query)
+        routing_times.append(time.perf_counter() - start)
+        actual = (routed.location_name, routed.forecast_range.value) if routed else None
+        if actual != expected:
+            failures += 1
+            print(f"MISMATCH {query!r}: expected {expected}, got {actual}")
+
+    routable = sum(1 for _, expected in fast_path_corpus if expected)
+    print(f"corpus: {len(fast_path_corpus)} queries, {routable} routable, {failures} mismatches")
+    print(_bench_env.summarize("routing decision", routing_times, unit="us", scale=1e6))
+
+    os.environ["GAZETTEER_ENABLED"] = "true"
+    async with StubOWMServer() as server:
+        os.environ["OWM_BASE_URL"] = server.base_url
+        from application.formatting import format_weather_summary
+        from tools.weather_tools import WeatherAPIClient
+
+        client = WeatherAPIClient()
+        answer_times = []
+        try:
+            for query, expected in fast_path_corpus * 10:
+                if not expected:
+                    continue
+                start = time.perf_counter()
+                routed = router.route(query)
+                forecast = await client.get_weather_forecast(routed.location_name, routed.forecast_range)
+                format_weather_summary(forecast, location_name=routed.location_name)
+                answer_times.append(time.perf_counter() - start)
+        finally:
+            await client.aclose()
+        print(_bench_env.summarize("fast-path answer (route+fetch+render)", answer_times))
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
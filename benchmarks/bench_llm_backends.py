@@ -0,0 +1,111 @@
+"""Throughput of agent queries over one vs. several LLM backends, and failover when a backend dies.
+
+Usage:
+    python benchmarks/bench_llm_backends.py [--queries 60] [--concurrency 12]
+
+Runs WeatherCaster with the real OpenAI model client against local stub OpenAI-compatible
+servers (`_stub_llm_server.py`), each of which generates two answers in parallel before it
+slows down. Compares MODEL_BACKENDS with one and with three servers, then stops one server
+in the middle of a run: its requests fail over to the others, it is ejected, and after it
+is started again a health check brings it back. Prints per-backend request counts and
+latencies from the `weathercaster_llm_backend_*` metrics.
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+import _bench_env
+from _bench_env import summarize
+from _stub_llm_server import StubLLMServer
+from _stub_server import StubOWMServer
+
+
+async def run_queries(caster, queries: int, concurrency: int) -> tuple[list[float], int]:
+    """Answers `queries` queries with `concurrency` in flight. Returns the latencies and the number of errors."""
+    from application.weather_caster import ERROR_MESSAGE
+
+    latencies: list[float] = []
+    errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one_query() -> None:
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            async for response in caster.get_response("How is the weather in Berlin?"):
+                if response == ERROR_MESSAGE:
+                    errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(one_query() for _ in range(queries)))
+    return latencies, errors
+
+
+def print_backends(caster) -> None:
+    from observability.metrics import registry
+    from tools.llm_backends import BACKEND_DURATION
+
+    durations = registry.histograms(BACKEND_DURATION)
+    for name, stats in caster.llm_model.backend_pool.get_stats().items():
+        ok = next((histogram for labels, histogram in durations.items() if dict(labels) == {"backend": name, "outcome": "ok"}), None)
+        p50 = f"{ok.quantile(0.5) * 1000:.0f}ms" if ok else "-"
+        print(f"  {name:<18} healthy={stats['healthy']!s:<5} requests={stats['requests']:<4} errors={stats['errors']:<3} "
+              f"ejections={stats['ejections']} p50={p50}")
+
+
+async def main(queries: int, concurrency: int) -> None:
+    os.environ["FAST_PATH_ENABLED"] = "false"
+    os.environ["STREAM_RESPONSES"] = "false"
+    os.environ["GEOCODING_CACHE_PATH"] = ""
+    os.environ["MODEL_BACKEND_HEALTH_CHECK_INTERVAL"] = "0.5"
+    os.environ.pop("OPENAI_API_KEY", None)
+    os.environ.pop("GEMINI_API_KEY", None)
+    # MODEL_BACKENDS replaces MODEL_HOST/MODEL_PORT
+    os.environ.pop("MODEL_HOST", None)
+    os.environ.pop("MODEL_PORT", None)
+
+    async with StubOWMServer() as owm, StubLLMServer() as first, StubLLMServer() as second, StubLLMServer() as third:
+        os.environ["OWM_BASE_URL"] = owm.base_url
+        from application.weather_caster import WeatherCaster
+        from configs.config import get_settings
+        from observability.metrics import registry
+
+        for label, servers in (("1 backend", [first]), ("3 backends", [first, second, third])):
+            os.environ["MODEL_BACKENDS"] = ",".join(server.base_url for server in servers)
+            get_settings.cache_clear()
+            registry.reset()
+            async with WeatherCaster() as caster:
+                start = time.perf_counter()
+                latencies, errors = await run_queries(caster, queries, concurrency)
+                wall = time.perf_counter() - start
+                print(f"{summarize(label, latencies)} {queries / wall:6.1f} q/s errors={errors}")
+                print_backends(caster)
+
+        print("\nfailover: one of 3 backends is stopped during the run and restarted afterwards")
+        registry.reset()
+        async with WeatherCaster() as caster:
+            async def stop_and_restart() -> None:
+                await asyncio.sleep(0.5)
+                await second.stop()
+                await asyncio.sleep(2.0)
+                await second.start()
+
+            outage = asyncio.create_task(stop_and_restart())
+            latencies, errors = await run_queries(caster, queries, concurrency)
+            await outage
+            print(f"{summarize('during outage', latencies)} errors={errors}")
+            print_backends(caster)
+            # Give the health checks time to bring the restarted backend back
+            await asyncio.sleep(1.5)
+            print("after restart:")
+            print_backends(caster)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--queries", type=int, default=60)
+    parser.add_argument("--concurrency", type=int, default=12)
+    args = parser.parse_args()
+    asyncio.run(main(args.queries, args.concurrency))
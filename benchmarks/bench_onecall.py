@@ -0,0 +1,58 @@
+"""Upstream requests per city for multi-range conversations: per-range endpoints vs. One Call.
+
+Usage:
+    python benchmarks/bench_onecall.py
+
+Every city is asked for current weather, then the hourly, daily and tomorrow forecast,
+like a conversation that drills down. Requests are counted by the local stand-in
+OpenWeatherMap server, which also serves the One Call endpoint. The geocoding call is
+reported separately; the bundled gazetteer is disabled so it is made once per city.
+"""
+
+import asyncio
+import os
+import time
+
+import _bench_env
+from _stub_server import StubOWMServer
+
+CITIES = ["Berlin", "London", "Paris", "Konya", "Phuket", "Rome"]
+RANGES = ["current", "hourly", "daily", "tomorrow"]
+
+
+async def run_conversations(backend: str, server: StubOWMServer) -> None:
+    from configs.config import env
+    from tools.weather_tools import WeatherAPIClient
+
+    env.FORECAST_BACKEND = backend
+    env.GEOCODING_CACHE_PATH = ""
+    client = WeatherAPIClient()
+    server.reset_counters()
+    start = time.perf_counter()
+    try:
+        for city in CITIES:
+            for forecast_range in RANGES:
+                forecast = await client.get_weather_forecast(city, forecast_range)
+                assert forecast is not None, f"no {forecast_range} forecast for {city} ({backend})"
+    finally:
+        await client.aclose()
+    elapsed = time.perf_counter() - start
+
+    geocoding = server.requests["/geo/1.0/direct"]
+    forecast_requests = sum(count for path, count in server.requests.items() if path != "/geo/1.0/direct")
+    print(f"{backend:<10} {forecast_requests / len(CITIES):>13.2f} {geocoding / len(CITIES):>13.2f} "
+          f"{elapsed / (len(CITIES) * len(RANGES)) * 1000:>12.2f}ms")
+
+
+async def main() -> None:
+    os.environ["GAZETTEER_ENABLED"] = "false"
+    async with StubOWMServer(response_delay=0.02) as server:
+        os.environ["OWM_BASE_URL"] = server.base_url
+        print(f"{len(CITIES)} cities x {len(RANGES)} ranges, 20 ms upstream latency")
+        print(f"{'backend':<10} {'forecast/city':>13} {'geocode/city':>13} {'per answer':>14}")
+        for backend in ("per_range", "onecall"):
+            await run_conversations(backend, server)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
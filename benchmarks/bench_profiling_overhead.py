@@ -0,0 +1,59 @@
+"""Query latency with the profiler disabled, in slow-threshold mode and profiling every query.
+
+Usage:
+    python benchmarks/bench_profiling_overhead.py [--runs 300]
+
+Queries are answered by the fast path (no LLM) from the local stand-in OpenWeatherMap
+server with the forecast cache enabled, so the measured time is almost pure Python work,
+where the profiler's overhead is largest. Profiles go to a temporary directory.
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+import _bench_env
+from _bench_env import summarize
+from _stub_server import StubOWMServer
+
+QUERIES = ["weather in Berlin tomorrow", "London hourly forecast", "Paris daily forecast", "current weather in Rome"]
+MODES = [
+    ("disabled", 0.0, 0.0),
+    ("slow threshold 10 s", 0.0, 10.0),
+    ("sample rate 1.0", 1.0, 0.0),
+]
+
+
+async def main(runs: int) -> None:
+    os.environ["FAST_PATH_ENABLED"] = "true"
+    os.environ["GAZETTEER_ENABLED"] = "true"
+    async with StubOWMServer() as server:
+        os.environ["OWM_BASE_URL"] = server.base_url
+        from application.weather_caster import WeatherCaster
+        from observability.profiling import QueryProfiler
+
+        with tempfile.TemporaryDirectory() as directory:
+            async with WeatherCaster() as caster:
+                # Warm the caches so every mode measures the same work
+                for query in QUERIES:
+                    async for _response in caster.get_response(query):
+                        pass
+                for label, sample_rate, slow_threshold in MODES:
+                    caster.profiler = QueryProfiler(sample_rate, slow_threshold, directory, max_files=20)
+                    latencies = []
+                    for i in range(runs):
+                        start = time.perf_counter()
+                        async for _response in caster.get_response(QUERIES[i % len(QUERIES)]):
+                            pass
+                        latencies.append(time.perf_counter() - start)
+                    print(summarize(label, latencies) + f"  profiles written={caster.profiler.stats.written}")
+            print(f"profiles kept: {len(os.listdir(directory)) // 2} (max_files=20)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=300)
+    args = parser.parse_args()
+    asyncio.run(main(args.runs))
@@ -0,0 +1,136 @@
+"""Behaviour of the OpenWeatherMap rate limiter, retries and circuit breaker under injected faults.
+
+Usage:
+    python benchmarks/bench_resilience.py
+
+Runs against the local stand-in OpenWeatherMap server with the forecast cache TTLs
+set to 0, so every lookup goes upstream. Scenarios:
+
+- transient 503s on 30% of the requests, with and without retries
+- a burst of 429s carrying a Retry-After header
+- a full outage after the cache was warmed: upstream requests stop once the circuit
+  opens and expired cached forecasts are served instead of no answer
+- a burst of concurrent lookups against the token-bucket rate limit
+"""
+
+import asyncio
+import os
+import time
+
+import _bench_env
+from _stub_server import StubOWMServer
+
+CITIES = ["Berlin", "London", "Paris", "Konya", "Phuket", "Rome"]
+LOOKUPS = 60
+
+
+def make_client(**settings):
+    from configs.config import env
+    from tools.weather_tools import WeatherAPIClient
+
+    env.GEOCODING_CACHE_PATH = ""
+    env.FORECAST_CACHE_TTL_CURRENT = 0.0
+    env.FORECAST_CACHE_MAX_STALE = 0.0
+    env.OWM_RETRY_ATTEMPTS = 3
+    env.OWM_RETRY_BASE_DELAY = 0.01
+    env.OWM_RETRY_MAX_DELAY = 0.2
+    env.OWM_RATE_LIMIT_PER_SECOND = 0.0
+    env.OWM_CIRCUIT_FAILURE_THRESHOLD = 5
+    env.OWM_CIRCUIT_RESET_TIMEOUT = 30.0
+    for name, value in settings.items():
+        setattr(env, name, value)
+    return WeatherAPIClient()
+
+
+def forecast_requests(server: StubOWMServer) -> int:
+    return sum(count for path, count in server.requests.items() if path != "/geo/1.0/direct")
+
+
+async def lookups(client, count: int = LOOKUPS) -> tuple[int, float]:
+    """Sequential current-weather lookups. Returns the number of answers and the elapsed time."""
+    answered = 0
+    start = time.perf_counter()
+    for i in range(count):
+        if await client.get_weather_forecast(CITIES[i % len(CITIES)], "current") is not None:
+            answered += 1
+    return answered, time.perf_counter() - start
+
+
+async def transient_faults(server: StubOWMServer) -> None:
+    print("Transient 503 on 30% of the requests")
+    for attempts in (1, 3):
+        client = make_client(OWM_RETRY_ATTEMPTS=attempts, OWM_CIRCUIT_FAILURE_THRESHOLD=1000)
+        server.reset_counters()
+        server.inject_faults(status=503, rate=0.3)
+        try:
+            answered, elapsed = await lookups(client)
+        finally:
+            server.clear_faults()
+            await client.aclose()
+        stats = client.resilience.stats
+        print(f"  attempts={attempts}: answered {answered}/{LOOKUPS}, upstream requests {forecast_requests(server)}, "
+              f"retries {stats.retries}, {elapsed / LOOKUPS * 1000:.1f}ms per lookup")
+
+
+async def rate_limited(server: StubOWMServer) -> None:
+    print("429 with Retry-After: 0.1 on the next 4 requests")
+    client = make_client()
+    server.reset_counters()
+    server.inject_faults(status=429, count=4, retry_after=0.1)
+    try:
+        answered, elapsed = await lookups(client, count=4)
+    finally:
+        server.clear_faults()
+        await client.aclose()
+    print(f"  answered {answered}/4 in {elapsed * 1000:.0f}ms, faults served {server.faults_served}, "
+          f"retries {client.resilience.stats.retries}")
+
+
+async def outage(server: StubOWMServer) -> None:
+    print("Outage after warming the cache (expired entries, every request fails)")
+    client = make_client()
+    try:
+        await lookups(client, count=len(CITIES))
+        server.reset_counters()
+        server.inject_faults(status=503)
+        answered, elapsed = await lookups(client)
+    finally:
+        server.clear_faults()
+        await client.aclose()
+    stats = client.resilience.stats
+    print(f"  answered {answered}/{LOOKUPS} ({stats.stale_served} stale), upstream requests {forecast_requests(server)}, "
+          f"short-circuited {stats.short_circuited}, circuit opened {stats.circuit_opened}x, "
+          f"{elapsed / LOOKUPS * 1000:.1f}ms per lookup")
+
+
+async def rate_limit_burst(server: StubOWMServer) -> None:
+    from tools.weather_tools import ForecastRange
+
+    rate, burst = 50.0, 10
+    print(f"{LOOKUPS} concurrent lookups, limit {rate:.0f}/s with a burst of {burst}")
+    client = make_client(OWM_RATE_LIMIT_PER_SECOND=rate, OWM_RATE_LIMIT_BURST=burst)
+    server.reset_counters()
+    start = time.perf_counter()
+    try:
+        # Distinct coordinates per lookup so single-flight does not coalesce them
+        await asyncio.gather(*(client._get_forecast_payload(f"point {i}", 40.0 + i / 10, 10.0, ForecastRange.CURRENT) for i in range(LOOKUPS)))
+    finally:
+        await client.aclose()
+    elapsed = time.perf_counter() - start
+    stats = client.resilience.stats
+    print(f"  upstream requests {stats.requests} in {elapsed:.2f}s (limit allows {burst + rate * elapsed:.0f}), "
+          f"{stats.rate_limited_waits} waited {stats.rate_limited_seconds:.2f}s in total")
+
+
+async def main() -> None:
+    os.environ["GAZETTEER_ENABLED"] = "true"
+    async with StubOWMServer(response_delay=0.005) as server:
+        os.environ["OWM_BASE_URL"] = server.base_url
+        await transient_faults(server)
+        await rate_limited(server)
+        await outage(server)
+        await rate_limit_burst(server)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,85 @@
+"""Parse time and allocations of OpenWeatherMap responses: dict-then-validate vs. raw bytes.
+
+Usage:
+    python benchmarks/bench_response_parsing.py [--iterations 500] [--payload-dir recorded/]
+
+Compares, per payload:
+  * `Model(**response.json())`              - the previous path
+  * `parse_response(Model, response.content)` - cached TypeAdapter, validate_json on the bytes
+  * `parse_response(SlimModel, ...)`        - trusted mode, only the fields WeatherCaster uses
+
+`--payload-dir` may contain recorded `current.json`, `hourly.json` (96 items) and `daily.json`
+(16 days); missing files are replaced by the synthetic payloads from `_payloads.py`.
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+from pathlib import Path
+
+import _bench_env
+import _payloads
+
+
+def load_payloads(payload_dir: Path | None) -> dict[str, bytes]:
+    synthetic = {
+        "current": _payloads.current_payload(),
+        "hourly": _payloads.hourly_payload(96),
+        "daily": _payloads.daily_payload(16),
+    }
+    payloads = {}
+    for name, payload in synthetic.items():
+        recorded = payload_dir / f"{name}.json" if payload_dir else None
+        payloads[name] = recorded.read_bytes() if recorded and recorded.exists() else json.dumps(payload).encode()
+    return payloads
+
+
+def measure(parse, content: bytes, iterations: int) -> tuple[float, int, int]:
+    """Returns (seconds per parse, peak bytes allocated during a parse, bytes retained by the result)."""
+    parse(content)  # builds the TypeAdapter outside the measurement
+    start = time.perf_counter()
+    for _ in range(iterations):
+        parse(content)
+    elapsed = (time.perf_counter() - start) / iterations
+
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    result = parse(content)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return elapsed, peak - baseline, retained - baseline
+
+
+def main(iterations: int, payload_dir: Path | None) -> None:
+    from model_definition.response_types import (
+        DailyForecastData, HourlyForecastData, SlimDailyForecastData, SlimHourlyForecastData,
+        SlimWeatherData, WeatherData, parse_response
+    )
+
+    models = {
+        "current": (WeatherData, SlimWeatherData),
+        "hourly": (HourlyForecastData, SlimHourlyForecastData),
+        "daily": (DailyForecastData, SlimDailyForecastData),
+    }
+    print(f"{'payload':<16} {'path':<22} {'parse':>10} {'peak alloc':>11} {'retained':>10}")
+    for name, content in load_payloads(payload_dir).items():
+        model, slim_model = models[name]
+        paths = [
+            ("json() + Model(**)", lambda data: model(**json.loads(data))),
+            ("validate_json", lambda data: parse_response(model, data)),
+            ("validate_json trusted", lambda data: parse_response(slim_model, data)),
+        ]
+        label = f"{name} ({len(content) // 1024} KiB)"
+        for path, parse in paths:
+            elapsed, peak, retained = measure(parse, content, iterations)
+            print(f"{label:<16} {path:<22} {elapsed * 1e6:>8.1f}us {peak / 1024:>9.1f}KiB {retained / 1024:>8.1f}KiB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--payload-dir", type=Path, default=None)
+    args = parser.parse_args()
+    main(args.iterations, args.payload_dir)
@@ -0,0 +1,59 @@
+"""Upstream fetches avoided by reusing forecasts within a conversation.
+
+Usage:
+    python benchmarks/bench_session_reuse.py
+
+Runs the same conversations with SESSION_STORE_ENABLED off and on against the local
+stand-in OpenWeatherMap server and reports the forecast requests per conversation and
+the session-store counters. Each conversation asks for a wider range first and then
+for narrower ones ("daily" -> "tomorrow", "hourly" -> next 6 hours).
+"""
+
+import asyncio
+import os
+
+import _bench_env
+from _stub_server import StubOWMServer
+
+CONVERSATIONS = {
+    "daily -> tomorrow -> next 3 days": [("daily", None, None), ("tomorrow", None, None), ("daily", 0, 3)],
+    "hourly -> next 6 h -> in 3 h for 2 h": [("hourly", None, None), ("hourly", 0, 6), ("hourly", 3, 2)],
+    "current -> tomorrow -> daily": [("current", None, None), ("tomorrow", None, None), ("daily", None, None)],
+}
+CITIES = ["Berlin", "London", "Paris", "Rome"]
+
+
+async def run(enabled: bool, server: StubOWMServer) -> None:
+    from configs.config import env
+    from tools.weather_tools import WeatherAPIClient
+
+    env.SESSION_STORE_ENABLED = enabled
+    for label, turns in CONVERSATIONS.items():
+        # A fresh client per conversation type, so the shared forecast cache starts empty
+        client = WeatherAPIClient()
+        server.reset_counters()
+        try:
+            for city in CITIES:
+                with client.session(f"{label}/{city}"):
+                    for forecast_range, start_offset, span in turns:
+                        await client.get_weather_forecast(city, forecast_range, start_offset=start_offset, span=span)
+        finally:
+            await client.aclose()
+        fetches = sum(count for path, count in server.requests.items() if path != "/geo/1.0/direct")
+        stats = client.session_stats
+        print(f"{'on' if enabled else 'off':<8} {label:<38} {fetches / len(CITIES):>8.2f} {stats.fetches_avoided:>8} "
+              f"{', '.join(f'{source}: {count}' for source, count in stats.reused_by_source.items())}")
+
+
+async def main() -> None:
+    os.environ["GEOCODING_CACHE_PATH"] = ""
+    async with StubOWMServer() as server:
+        os.environ["OWM_BASE_URL"] = server.base_url
+        print(f"{len(CITIES)} conversations per row")
+        print(f"{'session':<8} {'conversation':<38} {'fetches':>8} {'avoided':>8} reused")
+        for enabled in (False, True):
+            await run(enabled, server)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
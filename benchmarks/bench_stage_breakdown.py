@@ -0,0 +1,75 @@
+"""Per-stage latency breakdown (p50/p99) of agent queries, as exported by the metrics endpoint.
+
+Usage:
+    python benchmarks/bench_stage_breakdown.py [--runs 30]
+
+The agent runs with a stub model (pydantic-ai `FunctionModel`, wrapped like the real model
+so every LLM request is timed) against the local stand-in OpenWeatherMap server. The forecast
+cache is disabled, so every query geocodes, fetches, parses and transforms. Prints the
+stage histograms and the first lines of the Prometheus text output.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+
+import _bench_env
+from _stub_server import StubOWMServer
+
+QUERIES = [
+    ("Berlin", "current"), ("London", "hourly"), ("Paris", "daily"), ("Rome", "tomorrow"), ("Konya", "daily"),
+]
+
+
+def stub_model(rng: random.Random):
+    from pydantic_ai.messages import ModelResponse, TextPart, ToolCallPart, ToolReturnPart
+    from pydantic_ai.models.function import FunctionModel
+
+    async def respond(messages, info) -> ModelResponse:
+        returns = [part for message in messages for part in getattr(message, "parts", []) if isinstance(part, ToolReturnPart)]
+        await asyncio.sleep(rng.uniform(0.01, 0.05))
+        if not returns:
+            location_name, forecast_range = rng.choice(QUERIES)
+            return ModelResponse(parts=[ToolCallPart(tool_name="get_weather_forecast", args={"location_name": location_name, "forecast_range": forecast_range})])
+        return ModelResponse(parts=[TextPart(content="Mild with a few clouds.")])
+
+    return FunctionModel(respond)
+
+
+async def main(runs: int) -> None:
+    os.environ["FAST_PATH_ENABLED"] = "false"
+    os.environ["GAZETTEER_ENABLED"] = "false"
+    os.environ["GEOCODING_CACHE_PATH"] = ""
+    for forecast_range in ("CURRENT", "HOURLY", "DAILY"):
+        os.environ[f"FORECAST_CACHE_TTL_{forecast_range}"] = "0"
+    os.environ["FORECAST_CACHE_MAX_STALE"] = "0"
+
+    async with StubOWMServer(response_delay=0.01) as server:
+        os.environ["OWM_BASE_URL"] = server.base_url
+        from application.weather_caster import WeatherCaster
+        from observability.metrics import STAGE_DURATION, instrument_model, registry
+
+        registry.reset()
+        async with WeatherCaster() as caster:
+            with caster.agent.override(model=instrument_model(stub_model(random.Random(3)))):
+                for _ in range(runs):
+                    async for _response in caster.get_response("weather?"):
+                        pass
+
+        print(f"{'stage':<16} {'labels':<24} {'count':>6} {'p50':>10} {'p99':>10}")
+        rendered = registry.render_prometheus()
+        for labels, histogram in sorted(registry.histograms(STAGE_DURATION).items()):
+            label_map = dict(labels)
+            stage = label_map.pop("stage")
+            label_text = ",".join(f"{key}={value}" for key, value in label_map.items())
+            print(f"{stage:<16} {label_text:<24} {histogram.count:>6} {histogram.quantile(0.5) * 1000:>8.2f}ms {histogram.quantile(0.99) * 1000:>8.2f}ms")
+        print()
+        print("\n".join(line for line in rendered.splitlines() if line.startswith("weathercaster_llm") or "forecast_cache" in line))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=30)
+    args = parser.parse_args()
+    asyncio.run(main(args.runs))
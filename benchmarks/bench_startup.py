@@ -0,0 +1,160 @@
+"""Cold-start time of the CLI and GUI entry points: import time and time to first answer.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 5] [--budget-import-ms 1500] [--budget-first-answer-ms 4000]
+
+Every measurement runs in a fresh interpreter, so module caches of earlier runs do not
+count. Measured per entry point:
+
+- import: importing the entry module (`cli` or `gradio_ui`)
+- ready: additionally constructing WeatherCaster (and, for the GUI, building the Gradio interface)
+- first answer: wall time from spawning the process until the first answer is printed. The
+  query is answered by the fast path from the local stand-in OpenWeatherMap server, so no
+  LLM is needed and the number isolates the startup cost.
+
+Exits with status 1 if the median import or first-answer time exceeds its budget, so the
+script can hold cold start to a budget in CI. The slowest imports of the CLI are listed
+from `python -X importtime`.
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+import _bench_env
+from _stub_server import StubOWMServer
+
+QUERY = "weather in Berlin tomorrow"
+
+CHILD_SCRIPTS = {
+    "cli": """
+import time
+start = time.perf_counter()
+import cli
+imported = time.perf_counter()
+from application.weather_caster import WeatherCaster
+caster = WeatherCaster()
+ready = time.perf_counter()
+print(f"TIMES {imported - start} {ready - start}", flush=True)
+""",
+    "gui": """
+import time
+start = time.perf_counter()
+import gradio_ui
+imported = time.perf_counter()
+ui = gradio_ui.GradioWeatherUI()
+ui.build_interface()
+ready = time.perf_counter()
+print(f"TIMES {imported - start} {ready - start}", flush=True)
+""",
+}
+
+FIRST_ANSWER_SCRIPTS = {
+    "cli": """
+import asyncio
+from application.weather_caster import WeatherCaster
+import cli
+
+async def main():
+    async with WeatherCaster() as caster:
+        async for response in caster.get_response({query!r}, session_id="cli"):
+            print("ANSWER", len(response), flush=True)
+
+asyncio.run(main())
+""",
+    "gui": """
+import asyncio
+import gradio_ui
+
+async def main():
+    ui = gradio_ui.GradioWeatherUI()
+    ui.build_interface()
+    async for response in ui._get_weather_response({query!r}, session_id="bench"):
+        print("ANSWER", len(response), flush=True)
+    await ui.chatbot.shutdown()
+
+asyncio.run(main())
+""",
+}
+
+
+async def run_child(script: str, env: dict[str, str], *flags: str) -> tuple[float, str, str]:
+    """Runs a script in a fresh interpreter. Returns the wall time, stdout and stderr."""
+    start = time.perf_counter()
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, *flags, "-c", script, env=env, cwd=str(_bench_env.SRC_DIR),
+        stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+    )
+    stdout, stderr = await process.communicate()
+    elapsed = time.perf_counter() - start
+    if process.returncode != 0:
+        raise RuntimeError(f"child process failed:\n{stderr.decode()[-2000:]}")
+    return elapsed, stdout.decode(), stderr.decode()
+
+
+def slowest_imports(importtime_log: str, count: int = 10) -> list[tuple[int, str]]:
+    """Parses `-X importtime` output into the imports with the highest cumulative time (us)."""
+    entries = []
+    for line in importtime_log.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        if name.startswith("  "):
+            # Nested imports are indented below the module that imports them
+            continue
+        entries.append((int(cumulative_us), name.strip()))
+    return sorted(entries, reverse=True)[:count]
+
+
+async def main(runs: int, budget_import_ms: float, budget_first_answer_ms: float) -> int:
+    async with StubOWMServer() as server:
+        env = dict(os.environ)
+        env.update({
+            "OWM_BASE_URL": server.base_url,
+            "FAST_PATH_ENABLED": "true",
+            "GAZETTEER_ENABLED": "true",
+            "GEOCODING_CACHE_PATH": "",
+            "PYTHONPATH": os.pathsep.join([str(_bench_env.SRC_DIR), env.get("PYTHONPATH", "")]),
+        })
+        within_budget = True
+        print(f"{runs} fresh interpreters per measurement, budgets: import {budget_import_ms:.0f}ms, first answer {budget_first_answer_ms:.0f}ms")
+        print(f"{'entry point':<12} {'import':>10} {'ready':>10} {'first answer':>14}")
+        for entry_point in ("cli", "gui"):
+            imports, readies, answers = [], [], []
+            try:
+                for _ in range(runs):
+                    _elapsed, stdout, _stderr = await run_child(CHILD_SCRIPTS[entry_point], env)
+                    imported, ready = (float(value) for value in stdout.split("TIMES", 1)[1].split())
+                    imports.append(imported)
+                    readies.append(ready)
+                    elapsed, stdout, _stderr = await run_child(FIRST_ANSWER_SCRIPTS[entry_point].format(query=QUERY), env)
+                    if "ANSWER" not in stdout:
+                        raise RuntimeError(f"no answer from the {entry_point} child process")
+                    answers.append(elapsed)
+            except RuntimeError as e:
+                print(f"{entry_point:<12} skipped: {e}")
+                continue
+            import_ms = statistics.median(imports) * 1000
+            answer_ms = statistics.median(answers) * 1000
+            print(f"{entry_point:<12} {import_ms:>8.0f}ms {statistics.median(readies) * 1000:>8.0f}ms {answer_ms:>12.0f}ms")
+            if import_ms > budget_import_ms or answer_ms > budget_first_answer_ms:
+                within_budget = False
+                print(f"{'':<12} over budget")
+
+        _elapsed, _stdout, stderr = await run_child("import cli", env, "-X", "importtime")
+        print("\nslowest top-level imports of the CLI (cumulative):")
+        for cumulative_us, name in slowest_imports(stderr):
+            print(f"  {cumulative_us / 1000:>8.1f}ms  {name}")
+        return 0 if within_budget else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-import-ms", type=float, default=1500.0)
+    parser.add_argument("--budget-first-answer-ms", type=float, default=4000.0)
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.runs, args.budget_import_ms, args.budget_first_answer_ms)))
@@ -0,0 +1,86 @@
+"""Prompt tokens and agent latency for the JSON vs. compact tool result format.
+
+Usage:
+    python benchmarks/bench_tool_result_format.py [--prefill-tokens-per-second 400]
+
+The agent runs with a stub model (pydantic-ai `FunctionModel`) that calls the weather
+tool once and then answers. To model a local LLM, the stub sleeps for the time a model
+needs to process the tool result at the given prefill rate. Weather data comes from the
+local stand-in OpenWeatherMap server. Tokens are counted with tiktoken (cl100k_base) if
+it is installed, otherwise estimated as characters / 4.
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+import _bench_env
+from _stub_server import StubOWMServer
+
+CASES = [
+    ("current", {"location_name": "Berlin", "forecast_range": "current"}),
+    ("hourly (24 h)", {"location_name": "London", "forecast_range": "hourly"}),
+    ("daily (16 d)", {"location_name": "Paris", "forecast_range": "daily"}),
+    ("tomorrow", {"location_name": "Rome", "forecast_range": "tomorrow"}),
+]
+
+
+def token_counter():
+    try:
+        import tiktoken
+        encoding = tiktoken.get_encoding("cl100k_base")
+        return lambda text: len(encoding.encode(text)), "tiktoken cl100k_base"
+    except ImportError:
+        return lambda text: max(1, len(text) // 4), "chars/4 estimate"
+
+
+def stub_model(tool_args: dict, prefill_rate: float, count_tokens, tool_result_tokens: list[int]):
+    from pydantic_ai.messages import ModelResponse, TextPart, ToolCallPart, ToolReturnPart
+    from pydantic_ai.models.function import FunctionModel
+
+    async def respond(messages, info) -> ModelResponse:
+        returns = [part for message in messages for part in getattr(message, "parts", []) if isinstance(part, ToolReturnPart)]
+        if not returns:
+            return ModelResponse(parts=[ToolCallPart(tool_name="get_weather_forecast", args=tool_args)])
+        tokens = count_tokens(returns[-1].model_response_str())
+        tool_result_tokens.append(tokens)
+        await asyncio.sleep(tokens / prefill_rate)
+        return ModelResponse(parts=[TextPart(content="It is mild with a few clouds.")])
+
+    return FunctionModel(respond)
+
+
+async def main(prefill_rate: float, runs: int) -> None:
+    os.environ["FAST_PATH_ENABLED"] = "false"
+    count_tokens, counter_name = token_counter()
+    print(f"token counter: {counter_name}, modelled prefill rate: {prefill_rate:.0f} tokens/s, {runs} runs per case")
+
+    async with StubOWMServer() as server:
+        os.environ["OWM_BASE_URL"] = server.base_url
+        from application.weather_caster import WeatherCaster
+        from configs.config import env
+
+        print(f"{'case':<16} {'format':<8} {'tokens':>7} {'mean latency':>13}")
+        for label, tool_args in CASES:
+            for result_format in ("json", "compact"):
+                env.TOOL_RESULT_FORMAT = result_format
+                tool_result_tokens: list[int] = []
+                latencies = []
+                async with WeatherCaster() as caster:
+                    model = stub_model(tool_args, prefill_rate, count_tokens, tool_result_tokens)
+                    with caster.agent.override(model=model):
+                        for _ in range(runs):
+                            start = time.perf_counter()
+                            await caster.agent.run(f"weather for {tool_args['location_name']}")
+                            latencies.append(time.perf_counter() - start)
+                mean_ms = sum(latencies) / len(latencies) * 1000
+                print(f"{label:<16} {result_format:<8} {tool_result_tokens[-1]:>7} {mean_ms:>11.1f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--prefill-tokens-per-second", type=float, default=400.0)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(main(args.prefill_tokens_per_second, args.runs))
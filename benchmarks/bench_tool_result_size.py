@@ -0,0 +1,42 @@
+"""Serialized size of the tool result sent back to the LLM, with and without a time window.
+
+Usage:
+    python benchmarks/bench_tool_result_size.py
+
+"before" is the full payload as previously returned (e.g. all 16 days for "tomorrow"),
+"after" is the windowed result get_weather_forecast now returns for the same question.
+"""
+
+import time
+
+import _bench_env
+import _payloads
+
+
+def main() -> None:
+    from model_definition.response_types import DailyForecastData, HourlyForecastData
+    from tools.forecast_snapshot import ForecastSnapshot
+    from tools.weather_tools import ForecastRange, WeatherAPIClient
+
+    client = WeatherAPIClient()
+    now = int(time.time())
+    hourly = ForecastSnapshot.from_hourly(HourlyForecastData(**_payloads.hourly_payload(96, now=now)))
+    daily = ForecastSnapshot.from_daily(DailyForecastData(**_payloads.daily_payload(16, now=now)))
+
+    cases = [
+        ("tomorrow", ForecastRange.TOMORROW, None, None, daily),
+        ("daily, next 3 days", ForecastRange.DAILY, 0, 3, daily),
+        ("daily, the weekend (in 5 days, 2 days)", ForecastRange.DAILY, 5, 2, daily),
+        ("hourly, next 6 hours", ForecastRange.HOURLY, 0, 6, hourly),
+        ("hourly, this evening (in 3 hours, 4 hours)", ForecastRange.HOURLY, 3, 4, hourly),
+    ]
+    print(f"{'question':<44} {'before':>10} {'after':>10} {'saved':>8}")
+    for label, forecast_range, start_offset, span, snapshot in cases:
+        before = client._transform_api_data_to_weather_forecast("Berlin", snapshot).model_dump_json()
+        window = client._time_window(forecast_range, start_offset, span, snapshot)
+        after = client._transform_api_data_to_weather_forecast("Berlin", snapshot, window=window).model_dump_json()
+        print(f"{label:<44} {len(before):>9}B {len(after):>9}B {1 - len(after) / len(before):>7.0%}")
+
+
+if __name__ == "__main__":
+    main()
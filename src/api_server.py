@@ -0,0 +1,142 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator, AsyncIterator, Callable
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from starlette.types import Receive, Scope, Send
+from pydantic import BaseModel, Field
+from application.weather_caster import WeatherCaster
+from configs.config import env
+from model_definition.final_response import WeatherForecast
+from observability.metrics import registry
+from tools.weather_tools import ForecastRange
+
+logger = logging.getLogger(__name__)
+
+class ChatRequest(BaseModel):
+    """Body of a /chat request."""
+    query: str = Field(..., min_length=1, description="The user's weather question.")
+    session_id: str | None = Field(None, description="Identifies the conversation, so forecasts fetched in earlier turns can be reused.")
+    stream: bool = Field(True, description="Stream the answer as plain-text deltas instead of returning it as JSON.")
+
+class ChatResponse(BaseModel):
+    """Answer of a non-streamed /chat request."""
+    answer: str
+
+class _SlotStreamingResponse(StreamingResponse):
+    """Streaming response that releases a chat slot once it has been sent, failed or the client went away.
+
+    The slot is released here rather than in the body generator, whose `finally` does not run
+    if the client disconnects before the body is iterated.
+    """
+
+    def __init__(self, content: AsyncGenerator[str, None], release: Callable[[], None], **kwargs) -> None:
+        super().__init__(content, **kwargs)
+        self._release = release
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            try:
+                # Stops the agent run if the client went away mid-stream
+                await self.body_iterator.aclose()
+            finally:
+                self._release()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Creates one WeatherCaster per worker process.
+
+    Its WeatherAPIClient (HTTP pool, geocoding and forecast caches) is shared by the
+    /forecast and /chat requests of the worker.
+    """
+    caster = WeatherCaster()
+    await caster.startup()
+    app.state.caster = caster
+    app.state.chat_slots = asyncio.Semaphore(env.API_MAX_CONCURRENT_CHATS)
+    logger.info(f"WeatherCaster API worker ready ({env.API_MAX_CONCURRENT_CHATS} concurrent chats).")
+    try:
+        yield
+    finally:
+        await caster.shutdown()
+
+app = FastAPI(title="WeatherCaster API", lifespan=lifespan)
+
+@app.get("/forecast", response_model=WeatherForecast)
+async def get_forecast(request: Request,
+                       location: str = Query(..., min_length=1, description="The name of the location (e.g., \"London\", \"Paris, FR\")."),
+                       forecast_range: ForecastRange = Query(ForecastRange.CURRENT, alias="range", description="current, hourly, daily or tomorrow."),
+                       start_offset: int | None = Query(None, description="Start of the period: hours from now for hourly, days from today for daily."),
+                       span: int | None = Query(None, ge=1, description="Length of the period: hours for hourly, days for daily.")
+                       ) -> WeatherForecast:
+    """Returns the forecast of a location without going through the LLM."""
+    caster: WeatherCaster = request.app.state.caster
+    forecast = await caster.weather_client.get_weather_forecast(location, forecast_range, start_offset=start_offset, span=span)
+    if forecast is None:
+        raise HTTPException(status_code=404, detail=f"No weather forecast available for '{location}'.")
+    return forecast
+
+@app.post("/chat", response_model=ChatResponse)
+async def chat(request: Request, body: ChatRequest):
+    """Answers a weather question. Streams plain-text deltas unless `stream` is false.
+
+    At most API_MAX_CONCURRENT_CHATS chats run at once per worker; a request that cannot get
+    a slot within API_CHAT_QUEUE_TIMEOUT seconds is rejected with 503.
+    """
+    caster: WeatherCaster = request.app.state.caster
+    chat_slots: asyncio.Semaphore = request.app.state.chat_slots
+    # Time spent waiting for a slot counts against the query deadline
+    received_at = time.monotonic()
+    try:
+        await asyncio.wait_for(chat_slots.acquire(), timeout=env.API_CHAT_QUEUE_TIMEOUT)
+    except TimeoutError:
+        registry.inc("weathercaster_api_chats_rejected_total")
+        raise HTTPException(status_code=503, detail="Too many concurrent chats, please retry.", headers={"Retry-After": "1"})
+
+    if not body.stream:
+        try:
+            answer = ""
+            async for response in caster.get_response(body.query, session_id=body.session_id, received_at=received_at):
+                answer = response
+            return ChatResponse(answer=answer)
+        finally:
+            chat_slots.release()
+
+    return _SlotStreamingResponse(caster.stream_response(body.query, session_id=body.session_id, received_at=received_at),
+                                  release=chat_slots.release, media_type="text/plain; charset=utf-8")
+
+@app.get("/healthz")
+async def healthz() -> dict[str, str]:
+    return {"status": "ok"}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics() -> str:
+    """Metrics of this worker in the Prometheus text format."""
+    return registry.render_prometheus()
+
+def run_api_server_sync_wrapper() -> None:
+    """Runs the API server with uvicorn.
+
+    This function is used as an entry point in pyproject.toml's [project.scripts].
+    Every worker process builds its own WeatherCaster, HTTP pool and caches.
+    """
+    import uvicorn
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    uvicorn.run(
+        "api_server:app",
+        host=env.API_HOST,
+        port=env.API_PORT,
+        workers=env.API_WORKERS,
+        limit_concurrency=env.API_LIMIT_CONCURRENCY,
+        timeout_keep_alive=env.API_KEEPALIVE_TIMEOUT
+    )
+
+if __name__ == "__main__":
+    """ To run it directly with python src/api_server.py during development."""
+    run_api_server_sync_wrapper()
@@ -0,0 +1,115 @@
+"""Bounded pool of agent slots with admission control for serving many users at once.
+
+The pool allows `capacity` queries to run at once, which should match how many requests the
+LLM backend can generate in parallel. Further queries wait in line. A query is rejected
+right away if its estimated wait (queries ahead of it times the average service time)
+exceeds `max_queue_wait`, and shed if it actually waited that long without getting a slot.
+"""
+
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+from pydantic import BaseModel, Field
+
+from observability.metrics import record_stage
+
+logger = logging.getLogger(__name__)
+
+class AdmissionRejected(Exception):
+    """Raised when a query is not admitted because the queue wait would be too long."""
+
+    def __init__(self, reason: str, estimated_wait: float) -> None:
+        super().__init__(f"query {reason}, estimated queue wait {estimated_wait:.1f}s")
+        self.reason = reason
+        self.estimated_wait = estimated_wait
+
+class AgentPoolStats(BaseModel):
+    """Counters and current state of the agent pool."""
+    capacity: int = Field(default=0, description="Queries answered at once")
+    in_flight: int = Field(default=0, description="Queries currently being answered")
+    queue_depth: int = Field(default=0, description="Queries currently waiting for a slot")
+    max_queue_depth: int = Field(default=0, description="Highest queue depth seen")
+    admitted: int = Field(default=0, description="Queries that got a slot")
+    rejected: int = Field(default=0, description="Queries rejected because their estimated wait exceeded the limit")
+    shed: int = Field(default=0, description="Queries dropped after waiting the maximum time for a slot")
+    queue_wait_seconds_total: float = Field(default=0.0, description="Total time admitted queries waited for a slot")
+    avg_service_seconds: float = Field(default=0.0, description="Moving average of the time a query holds a slot")
+
+class AgentPool:
+    """Limits concurrent queries to the LLM capacity and sheds load when the queue gets too long.
+
+    Args:
+        capacity (int): Number of queries answered at once.
+        max_queue_wait (float): Seconds a query may wait for a slot, 0 waits indefinitely.
+        initial_service_time (float): Assumed seconds per query until real ones have been measured.
+    """
+
+    # Weight of the latest query in the moving average of the service time
+    SERVICE_TIME_SMOOTHING = 0.2
+
+    def __init__(self, capacity: int, max_queue_wait: float, initial_service_time: float = 5.0) -> None:
+        self.capacity = max(capacity, 1)
+        self.max_queue_wait = max_queue_wait
+        self.stats = AgentPoolStats(capacity=self.capacity, avg_service_seconds=initial_service_time)
+        self._slots = asyncio.Semaphore(self.capacity)
+
+    def estimated_wait(self) -> float:
+        """Estimated seconds a query arriving now waits for a slot."""
+        ahead = self.stats.in_flight + self.stats.queue_depth - self.capacity + 1
+        if ahead <= 0:
+            return 0.0
+        return ahead / self.capacity * self.stats.avg_service_seconds
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Waits for a free slot and holds it while the enclosed query runs.
+
+        Raises:
+            AdmissionRejected: If the estimated or actual wait exceeds `max_queue_wait`.
+        """
+        estimated_wait = self.estimated_wait()
+        if self.max_queue_wait > 0 and estimated_wait > self.max_queue_wait:
+            self.stats.rejected += 1
+            logger.warning(f"Rejected query: estimated queue wait {estimated_wait:.1f}s exceeds {self.max_queue_wait:.1f}s "
+                           f"(queue depth {self.stats.queue_depth}, in flight {self.stats.in_flight})")
+            raise AdmissionRejected("rejected", estimated_wait)
+
+        self.stats.queue_depth += 1
+        self.stats.max_queue_depth = max(self.stats.max_queue_depth, self.stats.queue_depth)
+        start = time.perf_counter()
+        try:
+            if self.max_queue_wait > 0:
+                async with asyncio.timeout(self.max_queue_wait):
+                    await self._slots.acquire()
+            else:
+                await self._slots.acquire()
+        except TimeoutError:
+            self.stats.shed += 1
+            record_stage("queue_wait", time.perf_counter() - start, "shed")
+            logger.warning(f"Shed query after waiting {self.max_queue_wait:.1f}s for a slot (queue depth {self.stats.queue_depth})")
+            raise AdmissionRejected("shed", self.max_queue_wait) from None
+        finally:
+            self.stats.queue_depth -= 1
+
+        wait = time.perf_counter() - start
+        self.stats.admitted += 1
+        self.stats.queue_wait_seconds_total += wait
+        record_stage("queue_wait", wait)
+        if wait >= 1.0:
+            logger.info(f"Query waited {wait:.1f}s for a slot (queue depth {self.stats.queue_depth}, in flight {self.stats.in_flight})")
+
+        self.stats.in_flight += 1
+        service_start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stats.in_flight -= 1
+            self._slots.release()
+            service_time = time.perf_counter() - service_start
+            self.stats.avg_service_seconds += self.SERVICE_TIME_SMOOTHING * (service_time - self.stats.avg_service_seconds)
+
+    def get_stats(self) -> dict:
+        """Returns the pool counters and current queue state."""
+        return self.stats.model_dump()
@@ -0,0 +1,242 @@
+"""Cache of final answers to repeated questions, validated against the forecast data behind them.
+
+An answer is stored under the normalized query text together with the weather tool calls
+made while answering it: the tool name, its arguments and a fingerprint (hash) of the tool
+result. Before a cached answer is served, the tool calls are repeated (they are answered by
+the geocoding and forecast caches, not the LLM) and their results fingerprinted again. If
+any fingerprint differs, the forecast data has been refreshed, or the time window of the
+question has moved on, and the answer is dropped.
+
+Entries live in an in-process LRU, optionally backed by a SQLite file, so answers survive
+a restart and are shared by the processes using the same file. Processes refresh their
+forecast caches independently, so the file keeps one row per query and version of its tool
+results: a process whose data differs from a row skips it (and stores its own answer next
+to it) instead of deleting an answer that is still valid for another process. Rows older
+than the maximum age are purged when answers are stored.
+"""
+
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Iterator
+from pydantic import BaseModel, Field
+from pydantic_core import to_json, to_jsonable_python
+
+from tools.context import bind
+
+logger = logging.getLogger(__name__)
+
+class AnswerCacheStats(BaseModel):
+    """Hit/miss counters of the answer cache."""
+    memory_hits: int = Field(default=0, description="Queries answered from the in-process LRU")
+    disk_hits: int = Field(default=0, description="Queries answered from the persistent store")
+    misses: int = Field(default=0, description="Queries without a cached answer")
+    invalidated: int = Field(default=0, description="Queries whose cached answers were all built from different forecast data")
+    stored: int = Field(default=0, description="Answers added to the cache")
+    uncacheable: int = Field(default=0, description="Answers not cached: no tool call, a failed tool call or an error/deadline answer")
+    evictions: int = Field(default=0, description="Entries dropped from the LRU to stay within the size bound")
+
+    @property
+    def hit_rate(self) -> float:
+        hits = self.memory_hits + self.disk_hits
+        lookups = hits + self.misses + self.invalidated
+        return hits / lookups if lookups else 0.0
+
+@dataclass(slots=True, frozen=True)
+class RecordedCall:
+    """A weather tool call an answer was built from."""
+    tool_name: str
+    arguments: dict[str, Any] # JSON-compatible, so the call can be persisted and repeated
+    fingerprint: str
+
+@dataclass(slots=True, frozen=True)
+class CachedAnswer:
+    answer: str
+    calls: tuple[RecordedCall, ...]
+    created_at: float
+    version: str # Hash of the tool calls, distinguishes answers to the same query built from different data
+
+@dataclass(slots=True)
+class ToolCallLog:
+    """The tool calls made while answering one query."""
+    calls: list[RecordedCall] = field(default_factory=list)
+    failed: bool = False # A tool call returned no data, the answer may only reflect a temporary failure
+
+def fingerprint(result: Any) -> str:
+    """Hash of a tool result (a WeatherForecast, a batch of them or None)."""
+    return hashlib.blake2b(to_json(result), digest_size=12).hexdigest()
+
+_recorded_calls: ContextVar[ToolCallLog | None] = ContextVar("weathercaster_recorded_calls", default=None)
+
+@contextmanager
+def record_tool_calls() -> Iterator[ToolCallLog]:
+    """Collects the tool calls made by the enclosed code and the tasks it starts (see `note_tool_call`)."""
+    log = ToolCallLog()
+    with bind(_recorded_calls, log):
+        yield log
+
+def note_tool_call(tool_name: str, arguments: dict[str, Any], result: Any, failed: bool = False) -> None:
+    """Records a tool call for the answer being generated, if calls are being recorded.
+
+    Args:
+        tool_name (str): Name of the WeatherAPIClient method that was called.
+        arguments (dict[str, Any]): Its keyword arguments.
+        result (Any): Its result, fingerprinted.
+        failed (bool): Whether (part of) the result is missing, which makes the answer uncacheable.
+    """
+    log = _recorded_calls.get()
+    if log is not None:
+        log.calls.append(RecordedCall(tool_name, to_jsonable_python(arguments), fingerprint(result)))
+        log.failed = log.failed or failed
+
+class AnswerCache:
+    """LRU of answers keyed by the normalized query, optionally persisted to SQLite.
+
+    Args:
+        max_entries (int): Capacity of the in-process LRU.
+        db_path (str | None): Path of the SQLite file. Persistence is disabled if empty or None.
+        max_age (float): Seconds after which an answer is dropped even if its data is unchanged.
+    """
+
+    _PUNCTUATION = re.compile(r"^[\s?!.]+|[\s?!.]+$")
+    _MAX_VERSIONS = 4 # Rows kept per query in the SQLite file
+
+    def __init__(self, max_entries: int, db_path: str | None, max_age: float) -> None:
+        self.max_entries = max_entries
+        self.db_path = db_path
+        self.max_age = max_age
+        self.stats = AnswerCacheStats()
+        self._entries: OrderedDict[str, CachedAnswer] = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: sqlite3.Connection | None = None
+        self._db_failed = False
+
+    @classmethod
+    def normalize(cls, user_query: str) -> str:
+        """Normalizes a query, e.g. " What's the weather in  Paris? " -> "what's the weather in paris"."""
+        return cls._PUNCTUATION.sub("", " ".join(user_query.casefold().split()))
+
+    def _connection(self) -> sqlite3.Connection | None:
+        """Opens the SQLite store on first use. Returns None if persistence is disabled or unavailable."""
+        if self._db is not None or self._db_failed or not self.db_path:
+            return self._db
+        try:
+            Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS answers "
+                "(key TEXT, version TEXT, answer TEXT, calls TEXT, created_at REAL, PRIMARY KEY (key, version))"
+            )
+            self._db.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Answer cache persistence disabled, could not open {self.db_path}: {e}")
+            self._db = None
+            self._db_failed = True
+        return self._db
+
+    async def lookup(self, key: str, is_valid: Callable[[CachedAnswer], Awaitable[bool]]) -> str | None:
+        """Returns a cached answer of a normalized query whose tool calls `is_valid` confirms still hold.
+
+        The in-process entry is tried first, then the persisted versions, newest first. An
+        in-process entry that fails the check is dropped; persisted rows are kept, as they may
+        match the forecast data of another process, and expire with `max_age`.
+        """
+        entry = self._get(key)
+        if entry is not None:
+            if await is_valid(entry):
+                self.stats.memory_hits += 1
+                return entry.answer
+            with self._lock:
+                if self._entries.get(key) is entry:
+                    del self._entries[key]
+
+        candidates = [stored for stored in self._load(key) if entry is None or stored.version != entry.version]
+        for stored in candidates:
+            if await is_valid(stored):
+                with self._lock:
+                    self._remember(key, stored)
+                self.stats.disk_hits += 1
+                return stored.answer
+
+        if entry is None and not candidates:
+            self.stats.misses += 1
+        else:
+            self.stats.invalidated += 1
+        return None
+
+    def _get(self, key: str) -> CachedAnswer | None:
+        """Returns the in-process entry of a query if it is not older than `max_age`."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.time() - entry.created_at > self.max_age:
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def _load(self, key: str) -> list[CachedAnswer]:
+        """Returns the persisted versions of a query not older than `max_age`, newest first."""
+        with self._lock:
+            db = self._connection()
+            if db is None:
+                return []
+            try:
+                rows = db.execute(
+                    "SELECT version, answer, calls, created_at FROM answers WHERE key = ? AND created_at >= ? ORDER BY created_at DESC",
+                    (key, time.time() - self.max_age)
+                ).fetchall()
+            except sqlite3.Error as e:
+                logger.warning(f"Answer cache read failed for '{key}': {e}")
+                return []
+        return [CachedAnswer(answer=answer, calls=tuple(RecordedCall(**call) for call in json.loads(calls)), created_at=created_at, version=version)
+                for version, answer, calls, created_at in rows]
+
+    def put(self, key: str, answer: str, calls: list[RecordedCall]) -> None:
+        """Stores an answer with the tool calls it was built from."""
+        serialized_calls = json.dumps([{"tool_name": call.tool_name, "arguments": call.arguments, "fingerprint": call.fingerprint}
+                                       for call in calls])
+        version = hashlib.blake2b(serialized_calls.encode(), digest_size=12).hexdigest()
+        entry = CachedAnswer(answer=answer, calls=tuple(calls), created_at=time.time(), version=version)
+        with self._lock:
+            self._remember(key, entry)
+            self.stats.stored += 1
+            db = self._connection()
+            if db is None:
+                return
+            try:
+                db.execute(
+                    "INSERT OR REPLACE INTO answers (key, version, answer, calls, created_at) VALUES (?, ?, ?, ?, ?)",
+                    (key, version, answer, serialized_calls, entry.created_at)
+                )
+                # Expired rows, and versions of this query beyond the newest few
+                db.execute("DELETE FROM answers WHERE created_at < ?", (entry.created_at - self.max_age,))
+                db.execute(
+                    "DELETE FROM answers WHERE key = ? AND version NOT IN "
+                    "(SELECT version FROM answers WHERE key = ? ORDER BY created_at DESC LIMIT ?)",
+                    (key, key, self._MAX_VERSIONS)
+                )
+                db.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"Answer cache write failed for '{key}': {e}")
+
+    def _remember(self, key: str, entry: CachedAnswer) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+
+    def close(self) -> None:
+        """Closes the persistent store. It is reopened on the next lookup."""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
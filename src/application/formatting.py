@@ -1,36 +1,73 @@
 """Formatting Functions for Weather Forecast"""
 
-from model_definition.final_response import WeatherForecast
+from datetime import datetime, timedelta, timezone
+from model_definition.final_response import CurrentWeather, DailyWeather, HourlyWeather, WeatherForecast
 
-def format_weather_summary(forecast: WeatherForecast) -> str:
+MAX_HOURLY_ENTRIES = 8
+MAX_DAILY_ENTRIES = 5
+
+def _format_current(current: CurrentWeather) -> list[str]:
+    return [
+        f"Currently in {current.location} ({current.date_time.strftime('%b %d, %H:%M')}):",
+        f"  Condition: {current.condition} {current.emoji}",
+        f"  Temperature: {current.temperature:.2f}°C (Feels like: {current.feels_like_temperature:.2f}°C)",
+        f"  Wind: {current.wind.speed:.2f} m/s @ {current.wind.direction}°",
+        f"  Humidity: {current.humidity}%",
+        f"  Pressure: {current.pressure} hPa",
+        f"  Sunrise: {current.daylight.sunrise.strftime('%b %d, %H:%M')} | Sunset: {current.daylight.sunset.strftime('%b %d, %H:%M')}",
+    ]
+
+def _format_hourly(hourly: HourlyWeather) -> str:
+    return f"  {hourly.time.strftime('%H:%M')}: {hourly.condition} {hourly.emoji}, {hourly.temperature:.1f}°C, Wind: {hourly.wind.speed:.1f} m/s @ {hourly.wind.direction}°"
+
+def _format_daily(daily: DailyWeather) -> str:
+    return f"  {daily.forecast_date.strftime('%b %d')}: {daily.condition} {daily.emoji}, High: {daily.max_temperature:.1f}°C, Low: {daily.min_temperature:.1f}°C, Wind: {daily.wind.speed:.1f} m/s @ {daily.wind.direction}°"
+
+def _tomorrow(daily: list[DailyWeather], utc_offset: int | None) -> DailyWeather | None:
+    """Finds tomorrow's entry in a daily forecast, in the local time of the location (UTC if unknown)."""
+    tomorrow = (datetime.now(timezone.utc) + timedelta(seconds=utc_offset or 0)).date() + timedelta(days=1)
+    for day in daily:
+        if day.forecast_date == tomorrow:
+            return day
+    return None
+
+def format_weather_summary(forecast: WeatherForecast, location_name: str | None = None, forecast_range: str | None = None) -> str:
     """Formats the WeatherForecast object into a summary string.
 
+    Works for any combination of current, hourly and daily data, so it can render the
+    result of every forecast range without going through the LLM.
+
     Args:
         forecast (WeatherForecast): The WeatherForecast object to format.
-         
+        location_name (str | None): Shown as heading if the forecast has no current weather.
+        forecast_range (str | None): The requested range. "tomorrow" renders only tomorrow's entry.
+
     Returns:
         str: The formatted summary string.
     """
     summary_parts = []
     current = forecast.current
-    summary_parts.append(f"Currently in {current.location} ({current.date_time.strftime('%b %d, %H:%M')}):")
-    summary_parts.append(f"  Condition: {current.condition} {current.emoji}")
-    summary_parts.append(f"  Temperature: {current.temperature:.2f}°C (Feels like: {current.feels_like_temperature:.2f}°C)")
-    summary_parts.append(f"  Wind: {current.wind.speed:.2f} m/s @ {current.wind.direction}°")
-    summary_parts.append(f"  Humidity: {current.humidity}%")
-    summary_parts.append(f"  Pressure: {current.pressure} hPa")
-    summary_parts.append(f"  Sunrise: {current.daylight.sunrise.strftime('%b %d, %H:%M')} | Sunset: {current.daylight.sunset.strftime('%b %d, %H:%M')}")
+    if current:
+        summary_parts.extend(_format_current(current))
+    elif location_name:
+        summary_parts.append(f"Weather forecast for {location_name}:")
 
     if forecast.hourly:
-        summary_parts.append("\nHourly Forecast (next 24 hours):")
-        # Display up to 8 hourly entries
-        for hourly in forecast.hourly[:8]:
-            summary_parts.append(f"  {hourly.time.strftime('%H:%M')}: {hourly.condition} {hourly.emoji}, {hourly.temperature:.1f}°C, Wind: {hourly.wind.speed:.1f} m/s @ {hourly.wind.direction}°")
+        hourly_entries = forecast.hourly[:MAX_HOURLY_ENTRIES]
+        summary_parts.append(f"\nHourly Forecast (next {len(hourly_entries)} hours):")
+        summary_parts.extend(_format_hourly(hourly) for hourly in hourly_entries)
 
     if forecast.daily:
-        summary_parts.append("\nDaily Forecast (next 5 days):")
-        # Display up to 5 daily entries
-        for daily in forecast.daily[:5]:
-            summary_parts.append(f"  {daily.forecast_date.strftime('%b %d')}: {daily.condition} {daily.emoji}, High: {daily.max_temperature:.1f}°C, Low: {daily.min_temperature:.1f}°C, Wind: {daily.wind.speed:.1f} m/s @ {daily.wind.direction}°")
+        tomorrow = _tomorrow(forecast.daily, forecast.utc_offset) if forecast_range and forecast_range.lower() == "tomorrow" else None
+        if tomorrow is not None:
+            summary_parts.append("\nTomorrow:")
+            summary_parts.append(_format_daily(tomorrow))
+            summary_parts.append(f"  Humidity: {tomorrow.humidity}% | Sunrise: {tomorrow.daylight.sunrise.strftime('%H:%M')} | Sunset: {tomorrow.daylight.sunset.strftime('%H:%M')}")
+        else:
+            daily_entries = forecast.daily[:MAX_DAILY_ENTRIES]
+            summary_parts.append(f"\nDaily Forecast (next {len(daily_entries)} days):")
+            summary_parts.extend(_format_daily(daily) for daily in daily_entries)
 
-    return "\n".join(summary_parts)
\ No newline at end of file
+    if not summary_parts:
+        return f"No weather data available for {location_name}." if location_name else "No weather data available."
+    return "\n".join(summary_parts).lstrip("\n")
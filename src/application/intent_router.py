@@ -0,0 +1,199 @@
+"""Deterministic fast path for simple weather queries that do not need the LLM."""
+
+import re
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable
+from pydantic import BaseModel, Field
+
+from configs.config import env
+from tools.gazetteer import Gazetteer
+from tools.weather_tools import ForecastRange
+
+# (start_offset, span) of a time phrase for the local time at the location, None if the period is over
+Window = tuple[int, int] | None
+
+MAX_DAILY_FORECAST_DAYS = 16
+
+# Words that read as a place name in "Nice weather today" but describe the weather
+_WEATHER_ADJECTIVES = {
+    "nice", "good", "bad", "great", "fine", "lovely", "beautiful", "perfect", "awful", "terrible",
+    "horrible", "hot", "cold", "warm", "cool", "mild", "sunny", "rainy", "windy", "stormy", "weird", "strange"
+}
+
+def _count(phrase: str) -> int:
+    """The number in "next 3 hours", "next few days", "next couple of hours"."""
+    number = re.search(r"\d+|few|couple", phrase).group()
+    return {"few": 3, "couple": 2}.get(number) or int(number)
+
+def _hours(first: int, last: int) -> Callable[[str, datetime], Window]:
+    """Hourly window from local hour `first` to `last` (exclusive, may exceed 24) of the current day."""
+    def window(phrase: str, local: datetime) -> Window:
+        start = max(first - local.hour, 0)
+        span = last - max(local.hour, first)
+        return (start, span) if span > 0 else None
+    return window
+
+def _tonight(phrase: str, local: datetime) -> Window:
+    # After midnight, "tonight" is the rest of the current night
+    return (0, 6 - local.hour) if local.hour < 6 else _hours(18, 30)(phrase, local)
+
+def _weekend(phrase: str, local: datetime) -> Window:
+    weekday = local.weekday()
+    if weekday == 6:
+        return 0, 1
+    return max(5 - weekday, 0), 2
+
+def _week(phrase: str, local: datetime) -> Window:
+    remaining = 7 - local.weekday()
+    return (remaining, 7) if phrase.lower().endswith("next week") else (0, remaining)
+
+# Time phrases, longest first so "later today" wins over "today", with the window they ask for
+_TIME_PHRASES: list[tuple[str, ForecastRange, Callable[[str, datetime], Window] | None]] = [
+    (r"(?:for )?(?:the )?next (?:\d+|few|couple of) hours?", ForecastRange.HOURLY, lambda phrase, local: (0, _count(phrase))),
+    (r"(?:for )?(?:the )?next (?:\d+|few|couple of) days?", ForecastRange.DAILY, lambda phrase, local: (0, _count(phrase))),
+    (r"(?:(?:for |over )?the|this) weekend", ForecastRange.DAILY, _weekend),
+    (r"(?:for )?(?:this|next) week", ForecastRange.DAILY, _week),
+    (r"this morning", ForecastRange.HOURLY, _hours(6, 12)),
+    (r"this afternoon", ForecastRange.HOURLY, _hours(12, 18)),
+    (r"this evening", ForecastRange.HOURLY, _hours(18, 24)),
+    (r"later today", ForecastRange.HOURLY, lambda phrase, local: (1, 23 - local.hour) if local.hour < 23 else None),
+    (r"tonight", ForecastRange.HOURLY, _tonight),
+    (r"tomorrow", ForecastRange.TOMORROW, None),
+    (r"(?:right )?now|currently|today", ForecastRange.CURRENT, None),
+]
+_RANGE_WORDS: dict[str, ForecastRange] = {
+    "current": ForecastRange.CURRENT,
+    "today's": ForecastRange.CURRENT,
+    "hourly": ForecastRange.HOURLY,
+    "daily": ForecastRange.DAILY,
+    "weekly": ForecastRange.DAILY,
+    "16 day": ForecastRange.DAILY,
+    "tomorrow's": ForecastRange.TOMORROW,
+}
+
+_TIME = "|".join(f"(?:{phrase})" for phrase, _, _ in _TIME_PHRASES)
+_RANGE = "|".join(re.escape(word) for word in _RANGE_WORDS)
+_SUBJECT = r"(?:weather(?: forecast)?|forecast|conditions|temperature)"
+_LEAD = r"(?:(?:what(?:'s| is| will)|how(?:'s| is| will)|show me|give me|get|tell me) )?(?:the )?"
+_BE = r"(?: (?:be|be like|look like|like))?"
+_LOCATION = r"(?P<location>[^\W\d_][\w .,'-]*?)"
+_WHEN = rf"(?: (?P<time>{_TIME}))?"
+
+_PATTERNS = [
+    # "weather in Berlin tomorrow", "hourly forecast for London", "what will the weather be like in Paris tomorrow"
+    re.compile(rf"^{_LEAD}(?:(?P<range>{_RANGE}) )?{_SUBJECT}{_BE} (?:in|for|at) {_LOCATION}{_WHEN}$", re.IGNORECASE),
+    # "Berlin weather tomorrow", "Paris current weather", "London hourly forecast"
+    re.compile(rf"^{_LOCATION} (?:(?P<range>{_RANGE}) )?{_SUBJECT}{_WHEN}$", re.IGNORECASE),
+    # "Paris", "Paris tomorrow", "Rome next week"
+    re.compile(rf"^{_LOCATION}{_WHEN}$", re.IGNORECASE),
+]
+_TIME_LOOKUP = [(re.compile(f"^(?:{phrase})$", re.IGNORECASE), forecast_range, window)
+                for phrase, forecast_range, window in _TIME_PHRASES]
+
+class RoutedQuery(BaseModel):
+    """Tool arguments extracted by the fast path."""
+    location_name: str = Field(..., description="The location as written by the user")
+    forecast_range: ForecastRange = Field(..., description="The forecast range implied by the query")
+    time_phrase: str | None = Field(None, description="The time phrase that narrows the range, e.g. \"tonight\" or \"next 3 days\"")
+
+    def period(self, utc_offset: int) -> tuple[int | None, int | None] | None:
+        """The start offset and span of the forecast tool for the time phrase.
+
+        Args:
+            utc_offset (int): Seconds the location's local time is ahead of UTC, as reported with
+                              its forecast, so the period uses the same clock as the forecast windows.
+
+        Returns:
+            tuple[int | None, int | None] | None: (None, None) without a time phrase. None if the
+                period is over or beyond the forecast horizon, so the agent should answer.
+        """
+        if not self.time_phrase:
+            return None, None
+        window = next((window for time_pattern, _, window in _TIME_LOOKUP if time_pattern.match(self.time_phrase)), None)
+        if window is None:
+            return None, None
+        local = datetime.fromtimestamp(time.time(), timezone(timedelta(seconds=utc_offset)))
+        period = window(self.time_phrase, local)
+        if period is None:
+            return None
+        start_offset, span = period
+        if self.forecast_range == ForecastRange.HOURLY:
+            within_horizon = 1 <= span <= env.MAX_HOURLY_FORECAST_ITEMS
+        else:
+            within_horizon = 1 <= span and start_offset + span <= MAX_DAILY_FORECAST_DAYS
+        return period if within_horizon else None
+
+class FastPathStats(BaseModel):
+    """Hit rate and latency of the fast path."""
+    queries: int = Field(default=0, description="Queries seen by the router")
+    hits: int = Field(default=0, description="Queries answered without the LLM")
+    total_latency: float = Field(default=0.0, description="Sum of fast-path answer latencies, seconds")
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.queries if self.queries else 0.0
+
+    @property
+    def mean_latency_ms(self) -> float:
+        return self.total_latency / self.hits * 1000 if self.hits else 0.0
+
+    def record_hit(self, latency: float) -> None:
+        self.hits += 1
+        self.total_latency += latency
+
+class IntentRouter:
+    """Parses location and forecast range from simple query patterns.
+
+    A query is only routed if it matches one of the known patterns as a whole and the
+    location is found in the gazetteer, so everything the router is not sure about
+    (conditions such as rain, follow-up questions, unknown places) goes to the agent.
+
+    Time phrases such as "this weekend" or "tonight" are kept with the routed query and
+    turned into the start offset and span of the forecast tool with `RoutedQuery.period`,
+    once the UTC offset of the location is known from its forecast. Periods that are already
+    over ("this morning" in the afternoon) or beyond the forecast horizon ("next 30 days")
+    go to the agent, as do queries whose "location" is a weather adjective ("Nice weather today").
+    """
+
+    def __init__(self, gazetteer: Gazetteer) -> None:
+        self.gazetteer = gazetteer
+        self.stats = FastPathStats()
+
+    def route(self, user_query: str) -> RoutedQuery | None:
+        """Returns the tool arguments for a simple query, or None if the agent should handle it."""
+        query = " ".join(user_query.strip().rstrip("?!.").split())
+        if not query:
+            return None
+        for pattern in _PATTERNS:
+            match = pattern.match(query)
+            if match is None:
+                continue
+            location = match.group("location").strip(" ,")
+            if pattern is not _PATTERNS[0] and location.casefold() in _WEATHER_ADJECTIVES:
+                return None
+            if self.gazetteer.lookup(location) is None:
+                continue
+            forecast_range, window = self._forecast_range(match)
+            time_phrase = match.group("time") if window is not None else None
+            return RoutedQuery(location_name=location, forecast_range=forecast_range, time_phrase=time_phrase)
+        return None
+
+    @staticmethod
+    def _forecast_range(match: re.Match) -> tuple[ForecastRange, Callable[[str, datetime], Window] | None]:
+        """Returns the forecast range of a match and, for a time phrase, the function computing its window."""
+        groups = match.groupdict()
+        time_phrase = None
+        if groups.get("time"):
+            time_phrase = next(((forecast_range, window) for time_pattern, forecast_range, window in _TIME_LOOKUP
+                                if time_pattern.match(groups["time"])), None)
+        # An explicit forecast type ("hourly forecast ... tomorrow") takes precedence over the time phrase
+        if groups.get("range"):
+            forecast_range = _RANGE_WORDS[groups["range"].lower()]
+            # Keep the window if it is given in the unit of the forecast type ("hourly forecast for Paris tonight")
+            if time_phrase is not None and time_phrase[0] == forecast_range:
+                return time_phrase
+            return forecast_range, None
+        if time_phrase is not None:
+            return time_phrase
+        return ForecastRange.CURRENT, None
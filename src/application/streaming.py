@@ -0,0 +1,69 @@
+"""Helpers for streaming LLM output to the user."""
+
+class ThinkTagFilter:
+    """Removes <think>...</think> blocks of reasoning models from a stream of text deltas.
+
+    Text is passed through as soon as it cannot be the start of a tag, so the filter
+    only holds back the few characters that might belong to a split "<think>" or "</think>".
+    """
+
+    OPEN_TAG = "<think>"
+    CLOSE_TAG = "</think>"
+
+    def __init__(self) -> None:
+        self._buffer = ""
+        self._inside = False
+        self._skip_newline = False
+
+    @staticmethod
+    def _partial_tag_length(text: str, tag: str) -> int:
+        """Length of the longest suffix of `text` that is a prefix of `tag`."""
+        for length in range(min(len(tag) - 1, len(text)), 0, -1):
+            if text.endswith(tag[:length]):
+                return length
+        return 0
+
+    def feed(self, delta: str) -> str:
+        """Adds a text delta and returns the part that can be shown to the user."""
+        self._buffer += delta
+        output = []
+        while self._buffer:
+            if self._skip_newline:
+                # Like the non-streaming filter, drop a single newline following "</think>"
+                if self._buffer.startswith("\n"):
+                    self._buffer = self._buffer[1:]
+                self._skip_newline = False
+                continue
+            if self._inside:
+                end = self._buffer.find(self.CLOSE_TAG)
+                if end == -1:
+                    keep = self._partial_tag_length(self._buffer, self.CLOSE_TAG)
+                    self._buffer = self._buffer[len(self._buffer) - keep:]
+                    break
+                self._buffer = self._buffer[end + len(self.CLOSE_TAG):]
+                self._inside = False
+                self._skip_newline = True
+            else:
+                start = self._buffer.find(self.OPEN_TAG)
+                if start == -1:
+                    keep = self._partial_tag_length(self._buffer, self.OPEN_TAG)
+                    output.append(self._buffer[:len(self._buffer) - keep])
+                    self._buffer = self._buffer[len(self._buffer) - keep:]
+                    break
+                output.append(self._buffer[:start])
+                self._buffer = self._buffer[start + len(self.OPEN_TAG):]
+                self._inside = True
+        return "".join(output)
+
+    def flush(self) -> str:
+        """Returns any held-back text at the end of the stream. An unterminated think block is dropped."""
+        remaining = "" if self._inside else self._buffer
+        self._buffer = ""
+        self._inside = False
+        self._skip_newline = False
+        return remaining
+
+def strip_think_tags(text: str) -> str:
+    """Removes <think>...</think> blocks from a complete response."""
+    think_filter = ThinkTagFilter()
+    return think_filter.feed(text) + think_filter.flush()
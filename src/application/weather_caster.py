@@ -1,16 +1,63 @@
+import asyncio
+import functools
+import itertools
 import logging
-import re
-from typing import AsyncGenerator
+import time
+from typing import AsyncGenerator, Callable, Union
 from dotenv import load_dotenv
 from pydantic_ai import Agent, Tool
+from application.answer_cache import AnswerCache, CachedAnswer, ToolCallLog, fingerprint, note_tool_call, record_tool_calls
 from application.formatting import format_weather_summary
-from model_definition.final_response import WeatherForecast
-from tools.weather_tools import WeatherAPIClient
-from configs.agent_prompt import AGENT_SYSTEM_PROMPT
-from configs.config import get_llm_model
+from application.intent_router import IntentRouter
+from application.streaming import ThinkTagFilter, strip_think_tags
+from model_definition.compact_encoding import COMPACT_FORMAT_DESCRIPTION, encode_batch_forecast, encode_weather_forecast
+from model_definition.final_response import BatchForecastResult, WeatherForecast
+from observability.metrics import enable_opentelemetry, flatten_stats, instrument_model, record_stage, registry, stage_span
+from observability.profiling import QueryProfiler
+from tools.context import run_in_task
+from tools.deadline import Deadline, DeadlineStats, current_deadline, remaining_time, use_deadline
+from tools.weather_tools import ForecastQuery, ForecastRequest, WeatherAPIClient
+from configs.config import env, get_llm_model
 
 logger = logging.getLogger(__name__)
 
+ERROR_MESSAGE = "An unexpected error occurred while trying to get the weather forecast. Please try again."
+DEADLINE_EXCEEDED_MESSAGE = "Sorry, getting the weather forecast took too long. Please try again."
+PARTIAL_ANSWER_NOTE = "I ran out of time to finish the answer. Here is the weather data I retrieved:"
+TRUNCATED_ANSWER_NOTE = "\n\n(The answer was cut short because it took too long.)"
+_STREAM_END = object()
+_instance_ids = itertools.count(1)
+
+def _result_missing(result: object) -> bool:
+    """Whether a tool result (a WeatherForecast or a batch of them) lacks forecast data."""
+    if isinstance(result, dict):
+        return any(item.forecast is None for item in result.values())
+    return result is None
+
+def _capture_tool(tool_function: Callable) -> Callable:
+    """Wraps a tool so its results are kept on the query deadline, to answer with them if time runs out.
+    The call is also recorded for the answer cache."""
+    @functools.wraps(tool_function)
+    async def wrapper(*args, **kwargs):
+        result = await tool_function(*args, **kwargs)
+        deadline = current_deadline()
+        if deadline is not None:
+            deadline.tool_results.append((kwargs, result))
+        note_tool_call(tool_function.__name__, kwargs, result, failed=_result_missing(result))
+        return result
+    return wrapper
+
+def _compact_tool(tool_function: Callable, encode: Callable[[object, dict], str]) -> Callable:
+    """Wraps a tool so its result is passed to the LLM in the compact encoding.
+
+    `functools.wraps` keeps the name, docstring and signature, so the tool schema seen
+    by the LLM is the same as for the unwrapped tool.
+    """
+    @functools.wraps(tool_function)
+    async def wrapper(*args, **kwargs) -> str:
+        return encode(await tool_function(*args, **kwargs), kwargs)
+    return wrapper
+
 class WeatherCaster:
     def __init__(self) -> None:
         """Initializes the WeatherCaster."""
@@ -21,38 +68,443 @@ class WeatherCaster:
         self.llm_model = get_llm_model()
         logger.info(f"WeatherCaster initialized with LLM: {self.llm_model.model_name}, Direct: {self.llm_model.is_direct}")
         self.weather_client = WeatherAPIClient()
-        self.agent = Agent(model=self.llm_model.model,
-                           tools=[Tool(self.weather_client.get_weather_forecast)
-                                  ],
-                           system_prompt=AGENT_SYSTEM_PROMPT,
+        self.intent_router: IntentRouter | None = None
+        self.deadline_stats = DeadlineStats()
+        self.profiler = QueryProfiler(
+            sample_rate=env.PROFILE_SAMPLE_RATE,
+            slow_threshold=env.PROFILE_SLOW_THRESHOLD,
+            directory=env.PROFILE_DIR,
+            max_files=env.PROFILE_MAX_FILES
+        )
+        if env.FAST_PATH_ENABLED and self.weather_client.gazetteer is not None:
+            self.intent_router = IntentRouter(self.weather_client.gazetteer)
+        self.answer_cache: AnswerCache | None = None
+        if env.ANSWER_CACHE_SIZE > 0:
+            self.answer_cache = AnswerCache(
+                max_entries=env.ANSWER_CACHE_SIZE,
+                db_path=env.ANSWER_CACHE_PATH,
+                max_age=env.ANSWER_CACHE_MAX_AGE
+            )
+        if env.OTEL_ENABLED:
+            enable_opentelemetry()
+        # Times every LLM request and counts its tokens
+        model = instrument_model(self.llm_model.model)
+        self.agent = Agent(model=model,
+                           tools=self._agent_tools(),
+                           system_prompt=self._agent_system_prompt(),
                            retries=5,
                            output_retries=5,
                            output_type=str # WeatherForecast  bigger models needed such as gpt-4.x or gpt-4o
                            )
+        # Direct-render mode: the LLM only extracts the tool arguments (one LLM call, no tool round trip)
+        # and the forecast is rendered by format_weather_summary instead of being paraphrased by the LLM.
+        self.extraction_agent: Agent | None = None
+        if env.RESPONSE_MODE == "direct":
+            from configs.agent_prompt import EXTRACTION_SYSTEM_PROMPT
+            self.extraction_agent = Agent(model=model,
+                                          system_prompt=EXTRACTION_SYSTEM_PROMPT,
+                                          output_retries=5,
+                                          output_type=Union[ForecastQuery, str]
+                                          )
+
+        # Each instance (the benchmarks and the API server may create several) exports its own gauges
+        self.instance_id = next(_instance_ids)
+        self._collector_name = f"weather_caster_{self.instance_id}"
+        registry.register_collector(self._collector_name, self.get_stats, instance=self.instance_id)
+
+    def get_stats(self) -> dict[str, float]:
+        """Returns the counters of the weather client, the fast path, the answer cache, the deadlines and the LLM backends as flat gauges."""
+        stats = {**self.weather_client.get_stats(), "deadline": self.deadline_stats.model_dump(), "profiling": self.profiler.stats.model_dump()}
+        if self.intent_router is not None:
+            stats["fast_path"] = self.intent_router.stats.model_dump()
+        if self.answer_cache is not None:
+            stats["answer_cache"] = {**self.answer_cache.stats.model_dump(), "hit_rate": self.answer_cache.stats.hit_rate}
+        if self.llm_model.backend_pool is not None:
+            stats["llm_backend"] = self.llm_model.backend_pool.get_stats()
+        return flatten_stats(stats)
+
+    def _agent_tools(self) -> list[Tool]:
+        """Returns the weather tools, wrapped to return compact tables if TOOL_RESULT_FORMAT is "compact"."""
+        get_forecast = _capture_tool(self.weather_client.get_weather_forecast)
+        get_forecasts = _capture_tool(self.weather_client.get_weather_forecasts)
+        if env.TOOL_RESULT_FORMAT == "compact":
+            get_forecast = _compact_tool(get_forecast, lambda result, kwargs: encode_weather_forecast(result, location_name=kwargs.get("location_name")))
+            get_forecasts = _compact_tool(get_forecasts, lambda result, kwargs: encode_batch_forecast(result))
+        return [Tool(get_forecast), Tool(get_forecasts)]
+
+    @staticmethod
+    def _agent_system_prompt() -> str:
+        # Imported on use: the prompts are formatted with settings, which are loaded lazily
+        from configs.agent_prompt import AGENT_SYSTEM_PROMPT
+        if env.TOOL_RESULT_FORMAT == "compact":
+            return f"{AGENT_SYSTEM_PROMPT}\n{COMPACT_FORMAT_DESCRIPTION}"
+        return AGENT_SYSTEM_PROMPT
+
+    async def startup(self) -> None:
+        """Opens long-lived resources such as the weather API connection pool."""
+        await self.weather_client.start()
 
-    async def get_response(self, user_query: str) -> AsyncGenerator:
+    async def shutdown(self) -> None:
+        """Releases long-lived resources opened in `startup()` and the connections to the LLM backends."""
+        registry.unregister_collector(self._collector_name)
+        await self.weather_client.aclose()
+        if self.answer_cache is not None:
+            self.answer_cache.close()
+        if self.llm_model.backend_pool is not None:
+            await self.llm_model.backend_pool.aclose()
+
+    async def __aenter__(self) -> "WeatherCaster":
+        await self.startup()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.shutdown()
+
+    def get_response(self, user_query: str, session_id: str | None = None, deadline: float | None = None, received_at: float | None = None) -> AsyncGenerator:
         """Gets a response from the chatbot for a given user query.
 
+        The response is generated in a task of its own, so the query's session, deadline and
+        trace are bound and released by one task whichever tasks iterate the generator.
+
         Args:
             user_query (str): The user's query or question.
+            session_id (str | None): Identifies the conversation, so forecasts fetched in earlier turns can be reused.
+            deadline (float | None): Seconds the answer may take, QUERY_DEADLINE if None. 0 disables the deadline.
+            received_at (float | None): `time.monotonic()` when the query arrived, before it waited for an agent slot.
+                                        The deadline counts from it, or from now if None.
 
         Returns:
             Response from LLM
         """
+        return run_in_task(self._scoped_response(user_query, session_id, deadline, received_at))
+
+    async def _scoped_response(self, user_query: str, session_id: str | None, deadline: float | None, received_at: float | None) -> AsyncGenerator:
+        budget = env.QUERY_DEADLINE if deadline is None else deadline
+        with self.weather_client.session(session_id), use_deadline(budget, received_at), self.profiler.profile(user_query):
+            async for response in self._get_response(user_query):
+                yield response
+
+    async def _get_response(self, user_query: str) -> AsyncGenerator:
+        deadline = current_deadline()
+        if deadline is not None:
+            self.deadline_stats.queries += 1
+        start = time.perf_counter()
+        outcome = "ok"
         try:
-            forecast_data = await self.agent.run(user_query)
+            # Cancels the agent run, its tool calls and their HTTP requests when the deadline expires
+            async with asyncio.timeout(remaining_time()):
+                response = await self._answer_with_cache(user_query)
+        except TimeoutError:
+            outcome = "deadline_exceeded"
+            response = self._deadline_answer(user_query, deadline)
+        record_stage("query", time.perf_counter() - start, outcome, mode="response")
+        yield response
+
+    async def _answer_with_cache(self, user_query: str) -> str:
+        """Serves a repeated query from the answer cache, otherwise answers it and caches the answer."""
+        if self.answer_cache is None:
+            return await self._answer(user_query)
+        key = self.answer_cache.normalize(user_query)
+        cached = await self._cached_answer(key)
+        if cached is not None:
+            return cached
+        with record_tool_calls() as tool_calls:
+            response = await self._answer(user_query)
+        self._cache_answer(key, response, tool_calls, current_deadline())
+        return response
+
+    async def _cached_answer(self, key: str) -> str | None:
+        """Looks up a normalized query in the answer cache."""
+        with stage_span("answer_cache"):
+            cached = await self.answer_cache.lookup(key, self._answer_still_valid)
+        if cached is not None:
+            logger.info(f"Answered '{key}' from the answer cache. Hit rate: {self.answer_cache.stats.hit_rate:.0%}")
+        return cached
+
+    async def _answer_still_valid(self, entry: CachedAnswer) -> bool:
+        """Repeats the tool calls of a cached answer and checks that their results are unchanged.
+
+        The calls are served by the geocoding and forecast caches. A different result means the
+        forecast data was refreshed or the time window asked about has moved on.
+        """
+        try:
+            for call in entry.calls:
+                if call.tool_name == "get_weather_forecast":
+                    result = await self.weather_client.get_weather_forecast(**call.arguments)
+                elif call.tool_name == "get_weather_forecasts":
+                    requests = [ForecastRequest.model_validate(request) for request in call.arguments["requests"]]
+                    result = await self.weather_client.get_weather_forecasts(requests)
+                else:
+                    return False
+                if fingerprint(result) != call.fingerprint:
+                    return False
+        except Exception as e:
+            logger.warning(f"Could not validate a cached answer, answering the query again: {e}")
+            return False
+        return True
+
+    def _cache_answer(self, key: str, response: str, tool_calls: ToolCallLog, deadline: Deadline | None) -> None:
+        """Caches an answer that is based on complete forecast data.
+
+        Answers without tool calls (fast path, refusals), with a failed tool call, errors and
+        partial answers at the deadline are not cached.
+        """
+        if (not tool_calls.calls or tool_calls.failed or response == ERROR_MESSAGE
+                or (deadline is not None and deadline.expired)):
+            self.answer_cache.stats.uncacheable += 1
+            return
+        self.answer_cache.put(key, response, tool_calls.calls)
+
+    async def _answer(self, user_query: str) -> str:
+        fast_path_response = await self._try_fast_path(user_query)
+        if fast_path_response is not None:
+            return fast_path_response
+
+        try:
+            if self.extraction_agent is not None:
+                return await self._get_direct_response(user_query)
+
+            with stage_span("agent_run"):
+                forecast_data = await self.agent.run(user_query, model_settings=self._model_settings())
             if forecast_data:
                 if isinstance(forecast_data.output, str):
                     # Remove think tag from thinking models
-                    cleaned_content = re.sub(r"<think>.*?</think>\n?", "", forecast_data.output)
-                    yield cleaned_content
+                    return strip_think_tags(forecast_data.output)
 
                 if isinstance (forecast_data.output, WeatherForecast):
                     # if output_type is given
-                    yield format_weather_summary(forecast_data.output)
-            else:
-                logger.warning("Agent run completed but no forecast_data was returned.")
-                yield "Sorry, I could not retrieve any information for your query."
+                    return format_weather_summary(forecast_data.output)
+            logger.warning("Agent run completed but no forecast_data was returned.")
+            return "Sorry, I could not retrieve any information for your query."
         except Exception as e:
+            deadline = current_deadline()
+            if deadline is not None and deadline.expired:
+                # The LLM request timed out at the deadline before the run was cancelled
+                return self._deadline_answer(user_query, deadline)
             logger.error(f"Exception occurred during agent response generation for query '{user_query}': {e}", exc_info=True)
-            yield "An unexpected error occurred while trying to get the weather forecast. Please try again."
+            return ERROR_MESSAGE
+
+    def stream_response(self, user_query: str, session_id: str | None = None, deadline: float | None = None, received_at: float | None = None) -> AsyncGenerator[str, None]:
+        """Streams the response to a user query as text deltas while the LLM generates it.
+
+        `<think>` blocks of reasoning models are filtered out incrementally. Fast-path
+        answers are yielded as a single chunk. Like `get_response`, the response is generated
+        in a task of its own.
+
+        Args:
+            user_query (str): The user's query or question.
+            session_id (str | None): Identifies the conversation, so forecasts fetched in earlier turns can be reused.
+            deadline (float | None): Seconds the answer may take, QUERY_DEADLINE if None. 0 disables the deadline.
+            received_at (float | None): `time.monotonic()` when the query arrived, before it waited for an agent slot.
+                                        The deadline counts from it, or from now if None.
+
+        Returns:
+            Text deltas that, concatenated, form the full response.
+        """
+        return run_in_task(self._scoped_stream(user_query, session_id, deadline, received_at))
+
+    async def _scoped_stream(self, user_query: str, session_id: str | None, deadline: float | None, received_at: float | None) -> AsyncGenerator[str, None]:
+        budget = env.QUERY_DEADLINE if deadline is None else deadline
+        start = time.perf_counter()
+        outcome = "ok"
+        try:
+            with self.weather_client.session(session_id), use_deadline(budget, received_at) as query_deadline, self.profiler.profile(user_query):
+                async for delta in self._stream_response(user_query):
+                    yield delta
+                if query_deadline is not None and query_deadline.expired:
+                    outcome = "deadline_exceeded"
+        finally:
+            # Timed here rather than with a span: the stream is suspended between deltas
+            record_stage("query", time.perf_counter() - start, outcome, mode="stream")
+
+    async def _stream_response(self, user_query: str) -> AsyncGenerator[str, None]:
+        deadline = current_deadline()
+        if deadline is not None:
+            self.deadline_stats.queries += 1
+        cache_key = self.answer_cache.normalize(user_query) if self.answer_cache is not None else None
+        tool_calls = ToolCallLog()
+        try:
+            async with asyncio.timeout(remaining_time()):
+                response = await self._cached_answer(cache_key) if cache_key is not None else None
+                if response is None:
+                    response = await self._try_fast_path(user_query)
+                if response is None and self.extraction_agent is not None:
+                    # Nothing to stream: the answer is rendered in one piece once the arguments are known
+                    with record_tool_calls() as tool_calls:
+                        response = await self._get_direct_response(user_query)
+                    if cache_key is not None:
+                        self._cache_answer(cache_key, response, tool_calls, deadline)
+        except TimeoutError:
+            response = self._deadline_answer(user_query, deadline)
+        except Exception as e:
+            logger.error(f"Exception occurred during streamed response generation for query '{user_query}': {e}", exc_info=True)
+            response = ERROR_MESSAGE
+        if response is not None:
+            yield response
+            return
+
+        think_filter = ThinkTagFilter()
+        streamed_any = False
+        streamed_text: list[str] = []
+        try:
+            # The agent run task is started within this block and inherits the tool call log
+            with record_tool_calls() as tool_calls:
+                async for delta in self._stream_agent_text(user_query):
+                    if text := think_filter.feed(delta):
+                        streamed_any = True
+                        streamed_text.append(text)
+                        yield text
+            if text := think_filter.flush():
+                streamed_any = True
+                streamed_text.append(text)
+                yield text
+            if not streamed_any:
+                logger.warning("Agent stream completed but no text was returned.")
+                yield "Sorry, I could not retrieve any information for your query."
+            elif cache_key is not None:
+                self._cache_answer(cache_key, "".join(streamed_text), tool_calls, deadline)
+        except TimeoutError:
+            if streamed_any:
+                # Part of the answer is already on screen, end it with a note instead of repeating the data
+                self._record_deadline_miss(user_query, deadline)
+                self.deadline_stats.truncated_streams += 1
+                yield TRUNCATED_ANSWER_NOTE
+            else:
+                yield self._deadline_answer(user_query, deadline)
+        except Exception as e:
+            if deadline is not None and deadline.expired and not streamed_any:
+                yield self._deadline_answer(user_query, deadline)
+                return
+            logger.error(f"Exception occurred during streamed response generation for query '{user_query}': {e}", exc_info=True)
+            yield ERROR_MESSAGE
+
+    async def _stream_agent_text(self, user_query: str) -> AsyncGenerator[str, None]:
+        """Streams the text deltas of an agent run. Raises TimeoutError when the query deadline expires.
+
+        The run happens in its own task, which inherits the query's session and deadline and
+        is cancelled by the deadline no matter which task consumes the stream.
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+
+        async def produce() -> None:
+            try:
+                with stage_span("agent_run", mode="stream"):
+                    async with asyncio.timeout(remaining_time()):
+                        async with self.agent.run_stream(user_query, model_settings=self._model_settings()) as result:
+                            async for delta in result.stream_text(delta=True):
+                                queue.put_nowait(delta)
+                queue.put_nowait(_STREAM_END)
+            except Exception as e:
+                queue.put_nowait(e)
+
+        producer = asyncio.create_task(produce())
+        try:
+            while (item := await queue.get()) is not _STREAM_END:
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            producer.cancel()
+
+    @staticmethod
+    def _model_settings() -> dict | None:
+        """Limits each LLM request to the time left before the query deadline."""
+        remaining = remaining_time()
+        return {"timeout": remaining} if remaining is not None else None
+
+    def _record_deadline_miss(self, user_query: str, deadline: Deadline | None) -> None:
+        if deadline is None:
+            return
+        stats = self.deadline_stats
+        stats.misses += 1
+        logger.warning(
+            f"Deadline of {deadline.budget:.1f}s exceeded for query '{user_query}' "
+            f"({len(deadline.tool_results)} tool results retrieved). Miss rate: {stats.miss_rate:.0%}"
+        )
+
+    def _deadline_answer(self, user_query: str, deadline: Deadline | None) -> str:
+        """Answers a query whose deadline expired with the forecast data its tool calls retrieved so far."""
+        self._record_deadline_miss(user_query, deadline)
+        if deadline is None:
+            # A timeout that is not ours, e.g. raised by the LLM client
+            logger.error(f"Timeout during response generation for query '{user_query}'")
+            return ERROR_MESSAGE
+        sections = []
+        for arguments, result in deadline.tool_results:
+            if isinstance(result, WeatherForecast):
+                sections.append(format_weather_summary(result, location_name=arguments.get("location_name"), forecast_range=arguments.get("forecast_range")))
+            elif isinstance(result, dict):
+                sections.extend(self._render_batch(result, include_missing=False))
+        if not sections:
+            return DEADLINE_EXCEEDED_MESSAGE
+        self.deadline_stats.partial_answers += 1
+        return "\n\n".join([PARTIAL_ANSWER_NOTE, *sections])
+
+    @staticmethod
+    def _render_batch(batch: dict[str, BatchForecastResult], include_missing: bool = True) -> list[str]:
+        """Renders the forecasts of a batch result, one section per location."""
+        sections = []
+        for item in batch.values():
+            if item.forecast is not None:
+                sections.append(format_weather_summary(item.forecast, location_name=item.location_name, forecast_range=item.forecast_range))
+            elif include_missing:
+                sections.append(f"Sorry, I could not retrieve the weather data for {item.location_name}.")
+        return sections
+
+    async def _get_direct_response(self, user_query: str) -> str:
+        """Uses the LLM only to extract the tool arguments and renders the forecasts deterministically.
+
+        Args:
+            user_query (str): The user's query or question.
+
+        Returns:
+            str: The rendered forecast(s), or the LLM's text reply for queries that are not forecast requests.
+        """
+        with stage_span("agent_run", mode="extraction"):
+            result = await self.extraction_agent.run(user_query, model_settings=self._model_settings())
+        if isinstance(result.output, str):
+            return strip_think_tags(result.output)
+        if not result.output.requests:
+            return "Please enter the name of a specific location."
+
+        batch = await self.weather_client.get_weather_forecasts(result.output.requests)
+        note_tool_call("get_weather_forecasts", {"requests": result.output.requests}, batch, failed=_result_missing(batch))
+        return "\n\n".join(self._render_batch(batch))
+
+    async def _try_fast_path(self, user_query: str) -> str | None:
+        """Answers simple queries without the LLM.
+
+        Returns:
+            str | None: The rendered forecast, or None if the query must go through the agent.
+        """
+        if self.intent_router is None:
+            return None
+        start = time.perf_counter()
+        stats = self.intent_router.stats
+        stats.queries += 1
+        routed = self.intent_router.route(user_query)
+        if routed is None:
+            return None
+        try:
+            start_offset = span = None
+            if routed.time_phrase is not None:
+                # Local periods are placed with the UTC offset the forecast windows are aligned to
+                utc_offset = await self.weather_client.get_utc_offset(routed.location_name, routed.forecast_range)
+                period = routed.period(utc_offset) if utc_offset is not None else None
+                if period is None:
+                    return None
+                start_offset, span = period
+            forecast = await self.weather_client.get_weather_forecast(routed.location_name, routed.forecast_range,
+                                                                      start_offset=start_offset, span=span)
+        except Exception as e:
+            logger.error(f"Fast path failed for query '{user_query}', falling back to the agent: {e}", exc_info=True)
+            return None
+        if forecast is None:
+            return None
+        latency = time.perf_counter() - start
+        stats.record_hit(latency)
+        logger.info(
+            f"Fast path answered '{user_query}' ({routed.location_name}, {routed.forecast_range.value}) "
+            f"in {latency * 1000:.1f} ms. Hit rate: {stats.hit_rate:.0%}, mean latency: {stats.mean_latency_ms:.1f} ms"
+        )
+        return format_weather_summary(forecast, location_name=routed.location_name, forecast_range=routed.forecast_range)
@@ -1,5 +1,6 @@
 import logging
 from application.weather_caster import WeatherCaster
+from configs.config import env
 
 logger = logging.getLogger(__name__)
 
@@ -13,24 +14,33 @@ async def run_cli() -> None:
     # load .env and set up the agent.
     # Ensure Ollama server is running with the specified model.
 
-    chatbot = WeatherCaster()
-
-    while True:
-        user_input = input("User Query: ")
-        if user_input.lower() in ["quit", "exit"]:
-            logger.info("Exiting WeatherCaster. Goodbye!")
-            break
-
-        if not user_input.strip():
-            continue
-
-        try:
-            # Await the async generator and iterate over its results
-            async for response in chatbot.get_response(user_input):
-                logger.info(f"WeatherCaster: {response}")
-        except Exception as e:
-            logger.error(f"Error getting response from chatbot: {e}", exc_info=True)
-            logger.info("WeatherCaster: An error occurred. Please try again.")
+    # The whole CLI run is one conversation
+    session_id = "cli"
+    async with WeatherCaster() as chatbot:
+        while True:
+            user_input = input("User Query: ")
+            if user_input.lower() in ["quit", "exit"]:
+                logger.info("Exiting WeatherCaster. Goodbye!")
+                break
+
+            if not user_input.strip():
+                continue
+
+            try:
+                if env.STREAM_RESPONSES:
+                    # Print text deltas as they arrive
+                    print("WeatherCaster: ", end="", flush=True)
+                    async for delta in chatbot.stream_response(user_input, session_id=session_id):
+                        print(delta, end="", flush=True)
+                    print()
+                    continue
+
+                # Await the async generator and iterate over its results
+                async for response in chatbot.get_response(user_input, session_id=session_id):
+                    logger.info(f"WeatherCaster: {response}")
+            except Exception as e:
+                logger.error(f"Error getting response from chatbot: {e}", exc_info=True)
+                logger.info("WeatherCaster: An error occurred. Please try again.")
 
 def run_cli_sync_wrapper() -> None:
     """Runs the WeatherCaster Chatbot CLI synchronously.
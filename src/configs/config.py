@@ -2,12 +2,10 @@
 
 import logging
 import os
-from typing import Any
-from pydantic import BaseModel, Field
+from functools import lru_cache
+from typing import Any, Literal
+from pydantic import BaseModel, Field, model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from pydantic_ai.providers.openai import OpenAIProvider
-from pydantic_ai.models.openai import OpenAIModel
-from pydantic_ai.models.gemini import GeminiModel
 
 logger = logging.getLogger(__name__)
 class APISettings(BaseSettings):
@@ -23,16 +21,137 @@ class APISettings(BaseSettings):
 
     # Weather API Endpoints
     MAX_HOURLY_FORECAST_ITEMS: int = Field(default=24, description="Maximum number of hourly forecast items to return")
+    BATCH_MAX_CONCURRENCY: int = Field(default=4, description="Maximum number of locations fetched concurrently by the batch forecast tool")
+    OWM_BASE_URL: str | None = Field(default=None, description="Overrides scheme and host of all OpenWeatherMap URLs (e.g. a local stand-in server)")
+    FORECAST_BACKEND: Literal["per_range", "onecall"] = Field(default="per_range", description="'per_range' fetches each forecast range from its own endpoint, 'onecall' fetches current, hourly (48 h) and daily (8 days) data in one One Call 3.0 request and caches all ranges from it")
+    OWM_TRUSTED_PARSING: bool = Field(default=False, description="Validate OpenWeatherMap responses against slim models that only contain the fields WeatherCaster uses")
+
+    # HTTP connection pool used for all OpenWeatherMap requests
+    HTTP_MAX_CONNECTIONS: int = Field(default=20, description="Maximum number of concurrent connections in the pool")
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = Field(default=10, description="Maximum number of idle connections kept alive")
+    HTTP_KEEPALIVE_EXPIRY: float = Field(default=30.0, description="Seconds an idle connection is kept alive")
+    HTTP_CONNECT_TIMEOUT: float = Field(default=5.0, description="Timeout in seconds for establishing a connection")
+    HTTP_READ_TIMEOUT: float = Field(default=10.0, description="Timeout in seconds for reading, writing and acquiring a pooled connection")
+    HTTP2_ENABLED: bool = Field(default=False, description="Use HTTP/2 if the optional 'h2' package is installed")
+
+    # Protection of the OpenWeatherMap upstream
+    OWM_RATE_LIMIT_PER_SECOND: float = Field(default=10.0, description="Requests per second sent to OpenWeatherMap by the whole process (0 disables the limiter)")
+    OWM_RATE_LIMIT_BURST: int = Field(default=10, description="Requests that may be sent at once before the rate limit applies")
+    OWM_RETRY_ATTEMPTS: int = Field(default=3, description="Attempts per request on 429, 5xx and connection errors, including the first one")
+    OWM_RETRY_BASE_DELAY: float = Field(default=0.2, description="Base of the jittered exponential backoff between attempts in seconds")
+    OWM_RETRY_MAX_DELAY: float = Field(default=2.0, description="Maximum backoff between attempts in seconds, also caps Retry-After")
+    OWM_CIRCUIT_FAILURE_THRESHOLD: int = Field(default=5, description="Consecutive failed requests after which OpenWeatherMap calls fail fast")
+    OWM_CIRCUIT_RESET_TIMEOUT: float = Field(default=30.0, description="Seconds calls fail fast before a probe request is sent again")
+
+    # Offline gazetteer, consulted before the geocoding cache and API
+    GAZETTEER_ENABLED: bool = Field(default=False, description="Resolve well-known cities from the bundled gazetteer without a geocoding call")
+    GAZETTEER_PATH: str | None = Field(default=None, description="GeoNames-style TSV file to use instead of the bundled one")
+
+    # Geocoding cache
+    GEOCODING_CACHE_SIZE: int = Field(default=1024, description="Number of geocoding results kept in memory")
+    GEOCODING_CACHE_PATH: str = Field(default=".cache/geocoding.sqlite3", description="SQLite file backing the geocoding cache. Empty disables persistence")
+    GEOCODING_NEGATIVE_TTL: float = Field(default=600.0, description="Seconds a 'location not found' result is cached")
+
+    # Forecast cache (stale-while-revalidate)
+    FORECAST_CACHE_SIZE: int = Field(default=512, description="Maximum number of cached forecast payloads")
+    FORECAST_CACHE_TTL_CURRENT: float = Field(default=600.0, description="Seconds current weather stays fresh")
+    FORECAST_CACHE_TTL_HOURLY: float = Field(default=1800.0, description="Seconds an hourly forecast stays fresh")
+    FORECAST_CACHE_TTL_DAILY: float = Field(default=3600.0, description="Seconds a daily/tomorrow forecast stays fresh")
+    FORECAST_CACHE_MAX_STALE: float = Field(default=1800.0, description="Seconds past the TTL a stale forecast is served while it is refreshed")
+    FORECAST_CACHE_COORD_PRECISION: int = Field(default=2, description="Decimal places coordinates are rounded to for the cache key")
+
+    # Per-conversation reuse of fetched forecasts ("tomorrow" from "daily", near-term hours from "hourly")
+    SESSION_STORE_ENABLED: bool = Field(default=False, description="Answer narrower ranges from data already fetched in the same conversation")
+    SESSION_MAX_AGE: float = Field(default=3600.0, description="Seconds hourly/daily data fetched in a conversation may be reused in it (current weather uses FORECAST_CACHE_TTL_CURRENT)")
+    SESSION_MAX_SESSIONS: int = Field(default=1000, description="Maximum number of conversations whose fetched data is kept")
+    SESSION_IDLE_TIMEOUT: float = Field(default=1800.0, description="Seconds after which the data of an idle conversation is dropped")
+
+    # Fast path
+    FAST_PATH_ENABLED: bool = Field(default=False, description="Answer simple queries (e.g. 'weather in Berlin tomorrow') without the LLM, requires GAZETTEER_ENABLED")
+
+    # Response generation
+    RESPONSE_MODE: Literal["llm", "direct"] = Field(default="llm", description="'llm' lets the LLM phrase the answer from the tool result, 'direct' uses the LLM only to extract the tool arguments and renders the forecast deterministically")
+
+    # Tool results sent to the LLM
+    TOOL_RESULT_FORMAT: Literal["json", "compact"] = Field(default="json", description="'json' returns the WeatherForecast model to the LLM, 'compact' a header-plus-rows table with rounded numbers and relative times that needs far fewer prompt tokens")
+
+    # Latency budget
+    QUERY_DEADLINE: float = Field(default=0.0, description="Seconds a query may take, including the wait for an agent slot and all LLM and OpenWeatherMap calls, before it is answered with the data retrieved so far (0 disables the deadline)")
+
+    # Response streaming
+    STREAM_RESPONSES: bool = Field(default=False, description="Stream LLM output to the CLI and GUI as it is generated")
+
+    # Answer cache for repeated queries
+    ANSWER_CACHE_SIZE: int = Field(default=0, description="Answers to repeated queries kept in memory (0 disables the answer cache)")
+    ANSWER_CACHE_PATH: str = Field(default="", description="SQLite file persisting the answer cache across restarts and processes. Empty disables persistence")
+    ANSWER_CACHE_MAX_AGE: float = Field(default=3600.0, description="Seconds after which a cached answer is dropped even if its forecast data is unchanged")
+
+    # Observability
+    METRICS_PORT: int | None = Field(default=None, description="Port of the Prometheus text endpoint (/metrics) served next to the GUI, disabled if unset")
+    METRICS_HOST: str = Field(default="0.0.0.0", description="Interface the metrics endpoint listens on")
+    PROFILE_SAMPLE_RATE: float = Field(default=0.0, description="Fraction of queries run under cProfile and written to PROFILE_DIR (0 disables sampling)")
+    PROFILE_SLOW_THRESHOLD: float = Field(default=0.0, description="Seconds above which a query arms the profiler: the next queries run under cProfile until a slow one is captured (0 disables it)")
+    PROFILE_DIR: str = Field(default="profiles", description="Directory query profiles (.prof) and their tags (.json) are written to")
+    PROFILE_MAX_FILES: int = Field(default=50, description="Number of query profiles kept in PROFILE_DIR, older ones are deleted")
+    OTEL_ENABLED: bool = Field(default=False, description="Report every processing stage as an OpenTelemetry span and histogram (requires 'opentelemetry-api' and a configured SDK)")
+
+    # Multi-user GUI serving
+    LLM_MAX_CONCURRENCY: int = Field(default=4, description="Queries the GUI answers at once (agent pool size), sized to the number of requests the LLM backend generates in parallel")
+    QUEUE_MAX_WAIT: float = Field(default=30.0, description="Seconds a GUI query may wait for an agent; queries whose estimated wait exceeds it are rejected, 0 waits indefinitely")
+    GRADIO_CONCURRENCY_LIMIT: int = Field(default=32, description="Gradio events processed at once; must exceed LLM_MAX_CONCURRENCY so waiting queries are visible to the agent pool")
+    GRADIO_MAX_QUEUE_SIZE: int = Field(default=100, description="Events Gradio keeps in its queue before rejecting new ones")
+
+    # Headless API server (weathercaster-api)
+    API_HOST: str = Field(default="0.0.0.0", description="Interface the headless API server (weathercaster-api) listens on")
+    API_PORT: int = Field(default=8000, description="Port of the headless API server")
+    API_WORKERS: int = Field(default=1, description="Worker processes of the API server, each with its own WeatherCaster, HTTP pool and caches")
+    API_MAX_CONCURRENT_CHATS: int = Field(default=8, description="Chats answered at once per API worker, further /chat requests wait for a slot")
+    API_CHAT_QUEUE_TIMEOUT: float = Field(default=10.0, description="Seconds a /chat request waits for a slot before it is rejected with 503")
+    API_LIMIT_CONCURRENCY: int | None = Field(default=None, description="Open connections per API worker before uvicorn answers with 503, unlimited if unset")
+    API_KEEPALIVE_TIMEOUT: int = Field(default=30, description="Seconds an idle keep-alive connection to the API server stays open")
 
     # Model configuration
     MODEL_ID: str = Field(..., description="ID of the LLM model to use")
 
     # Local LLM configuration
-    MODEL_HOST: str = Field(..., description="Host of the LLM model")
-    MODEL_PORT: int = Field(..., description="Port of the LLM model")
+    MODEL_HOST: str | None = Field(default=None, description="Host of the LLM model, required unless MODEL_BACKENDS is set")
+    MODEL_PORT: int | None = Field(default=None, description="Port of the LLM model, required unless MODEL_BACKENDS is set")
+    MODEL_BACKENDS: str | None = Field(default=None, description="Comma-separated base URLs of several OpenAI-compatible LLM servers (e.g. 'http://gpu1:11434,http://gpu2:11434'); requests are balanced over them instead of MODEL_HOST:MODEL_PORT")
+    MODEL_BACKEND_EJECT_AFTER_FAILURES: int = Field(default=3, description="Consecutive failures after which an LLM backend is taken out of rotation until a health check succeeds")
+    MODEL_BACKEND_HEALTH_CHECK_INTERVAL: float = Field(default=10.0, description="Seconds between active health checks of the LLM backends (0 disables them)")
+    MODEL_BACKEND_HEALTH_CHECK_PATH: str = Field(default="/v1/models", description="Path requested by the LLM backend health checks")
+    MODEL_BACKEND_HEALTH_CHECK_TIMEOUT: float = Field(default=2.0, description="Timeout in seconds of an LLM backend health check")
+
+    @model_validator(mode="after")
+    def _check_llm_servers(self) -> "APISettings":
+        """Requires the local LLM server as MODEL_HOST and MODEL_PORT, or several of them as MODEL_BACKENDS."""
+        if not self.MODEL_BACKENDS and (not self.MODEL_HOST or self.MODEL_PORT is None):
+            raise ValueError("Set MODEL_HOST and MODEL_PORT, or MODEL_BACKENDS")
+        return self
+
+@lru_cache(maxsize=1)
+def get_settings() -> APISettings:
+    """Loads the API settings from the environment and .env on first use."""
+    return APISettings()
+
+class _LazySettings:
+    """Stands in for the `APISettings` instance and loads it on first attribute access.
+
+    Importing modules that use `env` therefore neither reads .env nor validates the
+    settings; that happens when a setting is first needed.
+    """
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(get_settings(), name)
 
-# Global instance of API settings, loaded from .env
-env = APISettings()
+    def __setattr__(self, name: str, value: Any) -> None:
+        setattr(get_settings(), name, value)
+
+    def __repr__(self) -> str:
+        return repr(get_settings())
+
+# Global API settings, loaded from .env on first use
+env: APISettings = _LazySettings() # type: ignore[assignment]
 
 
 class LLMDetails(BaseModel):
@@ -41,6 +160,7 @@ class LLMDetails(BaseModel):
     description: str
     model_name: str
     is_direct: bool # True if using directly OpenAI or Gemini..., False for local LLM
+    backend_pool: Any = None # BackendPool balancing the requests if MODEL_BACKENDS is set
 
 def get_llm_model() -> LLMDetails:
     """Determines the LLM provider configuration based on environment variables.
@@ -56,18 +176,46 @@ def get_llm_model() -> LLMDetails:
         exit(1)
 
     model_name = env.MODEL_ID
+    backend_pool = None
 
+    # Provider modules are imported here, so only the selected backend (and its SDK) is loaded
     if openai_api_key and openai_api_key.strip() != "":
+        from pydantic_ai.models.openai import OpenAIModel
         model = OpenAIModel(model_name=model_name)
         description = f"Powered by OpenAI LLM: [{model_name}](https://platform.openai.com/docs/models)."
         logger.info(f"Using OpenAI LLM: {model_name}")
         is_direct = True
     elif gemini_api_key and gemini_api_key.strip() != "":
+        from pydantic_ai.models.gemini import GeminiModel
         model = GeminiModel(model_name=model_name)
         description = f"Powered by Gemini LLM: [{model_name}](https://ai.google.dev/gemini-api/docs/)."
         logger.info(f"Using Gemini LLM: {model_name}")
         is_direct = True
+    elif env.MODEL_BACKENDS:
+        import httpx
+        from pydantic_ai.models.openai import OpenAIModel
+        from pydantic_ai.providers.openai import OpenAIProvider
+        from tools.llm_backends import POOL_BASE_URL, BackendPool
+        backend_urls = [url.strip() for url in env.MODEL_BACKENDS.split(",") if url.strip()]
+        backend_pool = BackendPool(
+            backend_urls,
+            eject_after_failures=env.MODEL_BACKEND_EJECT_AFTER_FAILURES,
+            health_check_interval=env.MODEL_BACKEND_HEALTH_CHECK_INTERVAL,
+            health_check_path=env.MODEL_BACKEND_HEALTH_CHECK_PATH,
+            health_check_timeout=env.MODEL_BACKEND_HEALTH_CHECK_TIMEOUT
+        )
+        http_client = httpx.AsyncClient(transport=backend_pool, timeout=httpx.Timeout(600, connect=5))
+        _provider = OpenAIProvider(base_url=POOL_BASE_URL, http_client=http_client)
+        model = OpenAIModel(model_name=model_name, provider=_provider)
+        logger.info(f"Using local LLM: {model_name} balanced over {len(backend_urls)} backends: {', '.join(backend_urls)}")
+        description = (
+            f"Powered by local LLM: [{model_name}](https://ollama.com/) on {len(backend_urls)} load-balanced servers.\n"
+            f"Ensure your local LLM servers (e.g., Ollama) are running and the model is available."
+        )
+        is_direct = False
     else:
+        from pydantic_ai.models.openai import OpenAIModel
+        from pydantic_ai.providers.openai import OpenAIProvider
         _provider = OpenAIProvider(base_url=f"{env.MODEL_HOST}:{env.MODEL_PORT}/v1")
         model = OpenAIModel(model_name=model_name, provider=_provider)
         logger.info(f"Using local LLM: {model_name} via {env.MODEL_HOST}:{env.MODEL_PORT}")
@@ -81,5 +229,6 @@ def get_llm_model() -> LLMDetails:
         model=model,
         description=description,
         model_name=model_name,
-        is_direct=is_direct
+        is_direct=is_direct,
+        backend_pool=backend_pool
     )
\ No newline at end of file
@@ -12,4 +12,38 @@ example_questions=[
                     ["What will the weather be like in Paris tomorrow?"],
                     ["How is the weather in Bat Cave?"],
                     ["What is the population of London? "],
-                   ]
\ No newline at end of file
+                   ]
+
+# Expected fast-path routing as (query, (location_name, forecast_range)).
+# None means the query must be left to the agent.
+# Built from `example_questions` plus simple variants of them.
+fast_path_corpus=[
+                    ("Konya and Phuket", None),
+                    ("What's the current temperature and wind speed in Berlin? ", None),
+                    ("What will the weather be like in Paris tomorrow?", ("Paris", "tomorrow")),
+                    ("How will the weather be in New York this evening?", ("New York", "hourly")),
+                    ("Give me the daily weather forecast for Rome for the next 3 days", ("Rome", "daily")),
+                    ("Is it sunny/cloudy in Madrid right now? ", None),
+                    ("Will it rain in Amsterdam tomorrow?", None),
+                    ("What's the expected high temperature in Tokyo on the day after tomorrow?", None),
+                    ("How is the weather in Bat Cave?", None),
+                    ("What is the population of London? ", None),
+                    ("Konya", ("Konya", "current")),
+                    ("Phuket", ("Phuket", "current")),
+                    ("Berlin", ("Berlin", "current")),
+                    ("weather in Berlin tomorrow", ("Berlin", "tomorrow")),
+                    ("What's the weather in Madrid right now?", ("Madrid", "current")),
+                    ("Amsterdam weather tomorrow", ("Amsterdam", "tomorrow")),
+                    ("hourly forecast for London", ("London", "hourly")),
+                    ("Paris current weather", ("Paris", "current")),
+                    ("Forecast for Berlin tomorrow", ("Berlin", "tomorrow")),
+                    ("Tokyo hourly forecast", ("Tokyo", "hourly")),
+                    ("Rome next week", ("Rome", "daily")),
+                    ("Weather in New York tonight", ("New York", "hourly")),
+                    ("Paris, FR", ("Paris, FR", "current")),
+                    ("Madrid weather this weekend", ("Madrid", "daily")),
+                    ("Daily forecast for Paris next 3 days", ("Paris", "daily")),
+                    ("Is it going to rain in New York this evening?", None),
+                    ("Tell me a joke", None),
+                    ("forecast", None),
+                 ]
\ No newline at end of file
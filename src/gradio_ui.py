@@ -1,10 +1,20 @@
 import logging
-import gradio as gr
+import time
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, Any, AsyncGenerator, AsyncIterator
+from application.agent_pool import AdmissionRejected, AgentPool
 from application.weather_caster import WeatherCaster
+from configs.config import env
 from configs.weather_questions import example_questions
+from observability.metrics import flatten_stats, registry, start_metrics_server
+
+if TYPE_CHECKING:
+    import gradio as gr
 
 logger = logging.getLogger(__name__)
 
+BUSY_MESSAGE = "WeatherCaster is busy answering other questions right now. Please try again in a moment."
+
 class GradioWeatherUI:
     """Manages the Gradio web UI for WeatherCaster."""
 
@@ -12,6 +22,8 @@ class GradioWeatherUI:
         """Initializes the GradioWeatherUI and the WeatherCaster agent."""
         self.logger = logging.getLogger(__name__ + "." + self.__class__.__name__)
         self.chatbot: WeatherCaster | None = None
+        self.agent_pool = AgentPool(env.LLM_MAX_CONCURRENCY, env.QUEUE_MAX_WAIT)
+        registry.register_collector("agent_pool", lambda: flatten_stats({"agent_pool": self.agent_pool.get_stats()}))
         self._initialize_chatbot()
 
     def _initialize_chatbot(self) -> None:
@@ -24,40 +36,66 @@ class GradioWeatherUI:
             self.logger.critical(f"Failed to initialize WeatherCaster: {e}", exc_info=True)
             exit(1)
 
-    async def _get_weather_response(self, user_query: str) -> str:
-        """Async function to get weather response for the Gradio interface.
-        It interacts with the initialized WeatherCaster agent.
+    async def _get_weather_response(self, user_query: str, session_id: str | None = None) -> AsyncGenerator[str, None]:
+        """Async generator to get weather response for the Gradio interface.
+        It interacts with the initialized WeatherCaster agent. With STREAM_RESPONSES enabled
+        the text accumulated so far is yielded on every delta, so the output box updates progressively.
+        The query runs in a slot of the agent pool; if it would wait too long for one, a busy message is returned.
         Args:
             user_query (str): The user's input query.
+            session_id (str | None): Gradio's session hash, identifies the browser session.
         Returns:
-            str: The response from the WeatherCaster agent.
+            str: The (partial) response from the WeatherCaster agent.
         """
         if self.chatbot is None:
             self.logger.error("WeatherCaster chatbot is not initialized in _get_weather_response.")
-            return "Error: Chatbot is not available. Please check the application logs."
+            yield "Error: Chatbot is not available. Please check the application logs."
+            return
 
         if not user_query.strip():
-            return "Please enter a query about the weather."
+            yield "Please enter a query about the weather."
+            return
 
+        # Time spent waiting for a slot counts against the query deadline
+        received_at = time.monotonic()
         try:
-            async for response_obj in self.chatbot.get_response(user_query):
-                return response_obj
+            async with self.agent_pool.slot():
+                if env.STREAM_RESPONSES:
+                    response_text = ""
+                    async for delta in self.chatbot.stream_response(user_query, session_id=session_id, received_at=received_at):
+                        response_text += delta
+                        yield response_text
+                    if response_text:
+                        return
+                else:
+                    async for response_obj in self.chatbot.get_response(user_query, session_id=session_id, received_at=received_at):
+                        yield response_obj
+                        return
             self.logger.warning(f"No response yielded by agent for query: '{user_query}'")
-            return "No response received from the agent. This might indicate an issue."
+            yield "No response received from the agent. This might indicate an issue."
+        except AdmissionRejected:
+            yield BUSY_MESSAGE
         except Exception as e:
             self.logger.error(f"Error during agent interaction for query '{user_query}': {e}", exc_info=True)
-            return f"An error occurred while processing your request: {str(e)}"
+            yield f"An error occurred while processing your request: {str(e)}"
 
-    def launch(self) -> None:
-        """Sets up and launches the Gradio web UI."""
-        if self.chatbot is None:
-            self.logger.error("Gradio UI cannot be launched due to WeatherCaster initialization failure. Displaying error UI.")
-            exit(1)
+    def build_interface(self) -> "gr.Interface":
+        """Builds the Gradio interface. Gradio is imported here, so importing this module stays cheap.
+
+        Gradio's queue runs up to GRADIO_CONCURRENCY_LIMIT events at once and holds GRADIO_MAX_QUEUE_SIZE more;
+        within those, the agent pool limits how many queries reach the LLM.
+        """
+        import gradio as gr
 
         llm_config = self.chatbot.llm_model
 
-        iface = gr.Interface(
-            fn=self._get_weather_response,
+        async def respond(user_query: str, request: gr.Request) -> AsyncGenerator[str, None]:
+            # Gradio injects the request because of the gr.Request annotation
+            async for response_text in self._get_weather_response(user_query, request.session_hash if request else None):
+                yield response_text
+
+        return gr.Interface(
+            fn=respond,
             inputs=gr.Textbox(
                 lines=3,
                 label="Weather Query",
@@ -72,8 +110,18 @@ class GradioWeatherUI:
             ),
             flagging_mode="never",
             examples=example_questions,
-            theme="soft"
-        )
+            theme="soft",
+            concurrency_limit=env.GRADIO_CONCURRENCY_LIMIT
+        ).queue(max_size=env.GRADIO_MAX_QUEUE_SIZE)
+
+    def launch(self) -> None:
+        """Sets up and launches the Gradio web UI."""
+        if self.chatbot is None:
+            self.logger.error("Gradio UI cannot be launched due to WeatherCaster initialization failure. Displaying error UI.")
+            exit(1)
+
+        llm_config = self.chatbot.llm_model
+        iface = self.build_interface()
 
         self.logger.info("Launching WeatherCaster Gradio UI on http://127.0.0.1:7860 (or the next available port)...")
         if llm_config.is_direct:
@@ -81,7 +129,30 @@ class GradioWeatherUI:
         else:
             self.logger.info(f"Using local LLM: {llm_config.model_name} (via configured host/port)")
             self.logger.info("Ensure your local LLM server (e.g., Ollama) is running and the model is available.")
-        iface.launch(share=False, server_name="0.0.0.0", server_port=7860, pwa=True)
+        self.logger.info(f"Answering {self.agent_pool.capacity} queries at once, max. queue wait {env.QUEUE_MAX_WAIT:.0f}s, "
+                         f"Gradio concurrency limit {env.GRADIO_CONCURRENCY_LIMIT}, queue size {env.GRADIO_MAX_QUEUE_SIZE}")
+        metrics_server = start_metrics_server(env.METRICS_PORT, env.METRICS_HOST) if env.METRICS_PORT else None
+        try:
+            iface.launch(share=False, server_name="0.0.0.0", server_port=7860, pwa=True, app_kwargs={"lifespan": self._lifespan})
+        finally:
+            if metrics_server is not None:
+                metrics_server.shutdown()
+
+    @asynccontextmanager
+    async def _lifespan(self, app: Any) -> AsyncIterator[None]:
+        """Opens the WeatherCaster resources when the Gradio server starts and releases them when it stops.
+
+        Runs as the lifespan of Gradio's app, so the weather API connection pool is opened and
+        closed on the event loop that serves the queries.
+        """
+        await self.chatbot.startup()
+        try:
+            yield
+        finally:
+            try:
+                await self.chatbot.shutdown()
+            except Exception as e:
+                self.logger.warning(f"Error while shutting down WeatherCaster: {e}")
 
 def run_gradio_ui_sync_wrapper() -> None:
     """Synchronous wrapper to launch the Gradio UI.
@@ -0,0 +1,111 @@
+"""Compact, token-efficient text encoding of the WeatherForecast models for tool results.
+
+The default tool result is the Pydantic JSON of `WeatherForecast`, which repeats every
+field name, full ISO datetimes and the nested wind/daylight objects on each row. This
+encoding writes each series once as a header plus rows, with rounded numbers and times
+relative to a reference time stated once:
+
+    Berlin | ref 2026-06-17 14:00 UTC
+    current: 21°C feels 21°C, hi 23°C lo 20°C, Broken clouds, wind 3.6 m/s from 250°, hum 56%, 1014 hPa, sunrise 04:43 sunset 19:33 UTC
+    hourly: t|°C|cond|wind m/s|from °|hum %|hPa
+    +1h|21|Broken clouds|3.6|250|56|1014
+    daily: day|date|max °C|min °C|cond|wind m/s|from °|hum %|sunrise|sunset UTC
+    +1d|Thu Jun 18|24|15|Light rain|4.1|230|61|04:43|19:33
+
+Emojis are left out, they are decoration the LLM does not need to answer the question.
+"""
+
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict
+
+from model_definition.final_response import BatchForecastResult, CurrentWeather, DailyWeather, HourlyWeather, WeatherForecast
+
+# Short legend for the system prompt, so the LLM knows how to read the tables
+COMPACT_FORMAT_DESCRIPTION = (
+    "Tool results are compact tables instead of JSON objects. The first line names the location and a reference "
+    "time (UTC). `current:` lists the current conditions. `hourly:` and `daily:` are followed by a header line with "
+    "the column names separated by '|' and one row per hour/day. `+3h` means 3 hours after the reference time, "
+    "`+1d` means 1 day after the reference date (tomorrow). Temperatures are °C, wind is the speed in m/s and the "
+    "direction it blows from in degrees, `hum` is the relative humidity."
+)
+
+_HOURLY_HEADER = "hourly: t|°C|cond|wind m/s|from °|hum %|hPa"
+_DAILY_HEADER = "daily: day|date|max °C|min °C|cond|wind m/s|from °|hum %|sunrise|sunset UTC"
+
+def _temperature(value: float) -> str:
+    return f"{round(value):d}"
+
+def _clock(value: datetime) -> str:
+    return value.astimezone(timezone.utc).strftime("%H:%M")
+
+def _relative_hours(value: datetime, reference: datetime) -> str:
+    return f"{round((value - reference).total_seconds() / 3600):+d}h"
+
+def _encode_current(current: CurrentWeather) -> str:
+    return (
+        f"current: {_temperature(current.temperature)}°C feels {_temperature(current.feels_like_temperature)}°C, "
+        f"hi {_temperature(current.high_temperature)}°C lo {_temperature(current.low_temperature)}°C, {current.condition}, "
+        f"wind {current.wind.speed:.1f} m/s from {current.wind.direction}°, hum {current.humidity}%, {current.pressure} hPa, "
+        f"sunrise {_clock(current.daylight.sunrise)} sunset {_clock(current.daylight.sunset)} UTC"
+    )
+
+def _encode_hourly(hourly: HourlyWeather, reference: datetime) -> str:
+    return "|".join((
+        _relative_hours(hourly.time, reference), _temperature(hourly.temperature), hourly.condition,
+        f"{hourly.wind.speed:.1f}", str(hourly.wind.direction), str(hourly.humidity), str(hourly.pressure),
+    ))
+
+def _encode_daily(daily: DailyWeather, today: date) -> str:
+    return "|".join((
+        f"{(daily.forecast_date - today).days:+d}d", daily.forecast_date.strftime("%a %b %d"),
+        _temperature(daily.max_temperature), _temperature(daily.min_temperature), daily.condition,
+        f"{daily.wind.speed:.1f}", str(daily.wind.direction), str(daily.humidity),
+        _clock(daily.daylight.sunrise), _clock(daily.daylight.sunset),
+    ))
+
+def encode_weather_forecast(forecast: WeatherForecast | None, location_name: str | None = None, now: datetime | None = None) -> str:
+    """Encodes a WeatherForecast as compact header-plus-rows text.
+
+    Args:
+        forecast (WeatherForecast | None): The forecast returned by the weather tool.
+        location_name (str | None): Used as heading if the forecast has no current weather.
+        now (datetime | None): Reference time the relative times are based on, defaults to the current hour (UTC).
+
+    Returns:
+        str: The encoded forecast, or a short notice if there is no data.
+    """
+    if forecast is None:
+        return f"No weather data available for {location_name}." if location_name else "No weather data available."
+
+    reference = (now or datetime.now(timezone.utc)).astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    heading = forecast.current.location if forecast.current else location_name
+    lines = [f"{heading} | ref {reference.strftime('%Y-%m-%d %H:%M')} UTC" if heading else f"ref {reference.strftime('%Y-%m-%d %H:%M')} UTC"]
+    if forecast.current:
+        lines.append(_encode_current(forecast.current))
+    if forecast.hourly:
+        lines.append(_HOURLY_HEADER)
+        lines.extend(_encode_hourly(hourly, reference) for hourly in forecast.hourly)
+    if forecast.daily:
+        lines.append(_DAILY_HEADER)
+        # Forecast dates are local, so days are counted from today at the location
+        today = (reference + timedelta(seconds=forecast.utc_offset or 0)).date()
+        lines.extend(_encode_daily(daily, today) for daily in forecast.daily)
+    return "\n".join(lines)
+
+def encode_batch_forecast(results: Dict[str, BatchForecastResult], now: datetime | None = None) -> str:
+    """Encodes the result of the batch forecast tool, one compact block per location.
+
+    Args:
+        results (Dict[str, BatchForecastResult]): The batch result keyed by "<location_name> (<forecast_range>)".
+        now (datetime | None): Reference time the relative times are based on.
+
+    Returns:
+        str: The encoded blocks separated by blank lines.
+    """
+    blocks = []
+    for key, result in results.items():
+        if result.forecast is None:
+            blocks.append(f"{key}: error: {result.error or 'no data'}")
+        else:
+            blocks.append(f"{key}:\n{encode_weather_forecast(result.forecast, location_name=result.location_name, now=now)}")
+    return "\n\n".join(blocks)
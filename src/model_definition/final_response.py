@@ -47,4 +47,11 @@ class DailyWeather(BaseModel):
 class WeatherForecast(BaseModel):
     current: CurrentWeather | None = Field(..., description="The current weather conditions.")
     hourly: List[HourlyWeather] | None = Field(..., description="A list of hourly weather forecasts.")
-    daily: List[DailyWeather] | None = Field(..., description="A list of daily weather forecasts.")
\ No newline at end of file
+    daily: List[DailyWeather] | None = Field(..., description="A list of daily weather forecasts.")
+    utc_offset: int | None = Field(None, description="Shift in seconds of the location's local time from UTC. Forecast dates are local dates.")
+
+class BatchForecastResult(BaseModel):
+    location_name: str = Field(..., description="The location name as requested.")
+    forecast_range: str = Field(..., description="The forecast range that was requested for this location.")
+    forecast: WeatherForecast | None = Field(None, description="The weather forecast, or None if it could not be retrieved.")
+    error: str | None = Field(None, description="Why the forecast could not be retrieved, if it failed.")
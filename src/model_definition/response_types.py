@@ -1,5 +1,6 @@
-from typing import List, Optional
-from pydantic import BaseModel, Field, AliasChoices, computed_field
+from functools import lru_cache
+from typing import Any, List, Optional
+from pydantic import BaseModel, Field, AliasChoices, TypeAdapter, computed_field
 from datetime import datetime, timezone
 
 class Coordinates(BaseModel):
@@ -172,4 +173,151 @@ class DailyForecastData(BaseModel):
     cod: str = Field(..., description="API response code")
     message: Optional[float | int] = Field(None, description="Internal message parameter, can be float or int")
     cnt: Optional[int] = Field(None, description="Number of daily forecast items returned")
-    list: List[DailyForecastItem] = Field(..., description="List of daily forecast items")
\ No newline at end of file
+    list: List[DailyForecastItem] = Field(..., description="List of daily forecast items")
+
+# Geocoding API (https://openweathermap.org/api/geocoding-api)
+class GeocodingItem(BaseModel):
+    """Represents one location returned by the geocoding API."""
+    name: Optional[str] = Field(None, description="Name of the found location")
+    lat: float = Field(..., description="Geographical coordinates of the found location (latitude)")
+    lon: float = Field(..., description="Geographical coordinates of the found location (longitude)")
+    country: Optional[str] = Field(None, description="Country of the found location")
+
+# Slim models for trusted parsing (OWM_TRUSTED_PARSING=true).
+# They declare only the fields WeatherCaster reads and have no computed fields; everything
+# else in the response is skipped by the validator. Attribute names match the full models.
+
+class SlimWeatherItem(BaseModel):
+    description: str = Field(..., description="Weather condition within the group")
+    icon: str = Field(..., description="Weather icon id")
+
+class SlimMain(BaseModel):
+    temp: float = Field(..., description="Temperature, Celsius")
+    feels_like: float = Field(..., description="Feels like temperature, Celsius")
+    temp_min: float = Field(..., description="Minimum temperature at the moment, Celsius")
+    temp_max: float = Field(..., description="Maximum temperature at the moment, Celsius")
+    pressure: int = Field(..., description="Atmospheric pressure on the sea level, hPa")
+    humidity: int = Field(..., description="Humidity, %")
+
+class SlimWind(BaseModel):
+    speed: float = Field(..., description="Wind speed, meter/sec")
+    deg: int = Field(..., description="Wind direction, degrees (meteorological)")
+
+class SlimSys(BaseModel):
+    sunrise: int = Field(..., description="Sunrise time, unix, UTC")
+    sunset: int = Field(..., description="Sunset time, unix, UTC")
+
+class SlimWeatherData(BaseModel):
+    """Slim counterpart of `WeatherData`."""
+    weather: List[SlimWeatherItem] = Field(..., description="List of weather conditions")
+    main: SlimMain = Field(..., description="Main weather parameters")
+    wind: SlimWind = Field(..., description="Wind information")
+    dt: int = Field(..., description="Time of data calculation, unix, UTC")
+    sys: SlimSys = Field(..., description="Sunrise and sunset times")
+    name: str = Field(..., description="City name")
+    timezone: Optional[int] = Field(None, description="Shift in seconds from UTC")
+
+class SlimCityInfo(BaseModel):
+    timezone: Optional[int] = Field(None, description="Shift in seconds from UTC")
+
+class SlimHourlyForecastItem(BaseModel):
+    dt: int = Field(..., description="Time of data forecasted, unix, UTC")
+    main: SlimMain = Field(..., description="Main weather parameters for this hourly forecast point")
+    weather: List[SlimWeatherItem] = Field(..., description="List of weather conditions for this hourly forecast point")
+    wind: SlimWind = Field(..., description="Wind information for this hourly forecast point")
+
+class SlimHourlyForecastData(BaseModel):
+    """Slim counterpart of `HourlyForecastData`."""
+    list: List[SlimHourlyForecastItem] = Field(..., description="List of hourly forecast items")
+    city: SlimCityInfo = Field(..., description="Information about the city for the forecast")
+
+class SlimDailyTemp(BaseModel):
+    day: float = Field(..., description="Daytime temperature")
+    min: Optional[float] = Field(None, description="Minimum daily temperature")
+    max: Optional[float] = Field(None, description="Maximum daily temperature")
+
+class SlimDailyForecastItem(BaseModel):
+    dt: int = Field(..., description="Time of data forecasted, unix, UTC")
+    sunrise: Optional[int] = Field(None, description="Sunrise time, unix, UTC")
+    sunset: Optional[int] = Field(None, description="Sunset time, unix, UTC")
+    temp: SlimDailyTemp = Field(..., description="Temperature details for the day")
+    humidity: int = Field(..., description="Humidity, %")
+    weather: List[SlimWeatherItem] = Field(..., description="List of weather conditions for the day")
+    speed: Optional[float] = Field(None, description="Wind speed, meter/sec")
+    deg: Optional[int] = Field(None, description="Wind direction, degrees (meteorological)")
+
+class SlimDailyForecastData(BaseModel):
+    """Slim counterpart of `DailyForecastData`."""
+    city: SlimCityInfo = Field(..., description="Information about the city for the forecast")
+    list: List[SlimDailyForecastItem] = Field(..., description="List of daily forecast items")
+
+# Models for the One Call API, which returns current, hourly and daily data in one response.
+# The structure is taken from https://openweathermap.org/api/one-call-3
+
+class OneCallCurrent(BaseModel):
+    """Represents the current weather of a One Call response."""
+    dt: int = Field(..., description="Current time, unix, UTC")
+    sunrise: Optional[int] = Field(None, description="Sunrise time, unix, UTC")
+    sunset: Optional[int] = Field(None, description="Sunset time, unix, UTC")
+    temp: float = Field(..., description="Temperature, Celsius")
+    feels_like: float = Field(..., description="Temperature accounting for the human perception of weather, Celsius")
+    pressure: int = Field(..., description="Atmospheric pressure on the sea level, hPa")
+    humidity: int = Field(..., description="Humidity, %")
+    clouds: Optional[int] = Field(None, description="Cloudiness, %")
+    uvi: Optional[float] = Field(None, description="Current UV index")
+    visibility: Optional[int] = Field(None, description="Average visibility, metres")
+    wind_speed: float = Field(..., description="Wind speed, meter/sec")
+    wind_deg: int = Field(..., description="Wind direction, degrees (meteorological)")
+    wind_gust: Optional[float] = Field(None, description="Wind gust, meter/sec")
+    weather: List[WeatherItem] = Field(..., description="List of weather conditions")
+
+class OneCallHourlyItem(BaseModel):
+    """Represents one hour of the One Call hourly forecast (48 hours)."""
+    dt: int = Field(..., description="Time of the forecasted data, unix, UTC")
+    temp: float = Field(..., description="Temperature, Celsius")
+    feels_like: float = Field(..., description="Feels like temperature, Celsius")
+    pressure: int = Field(..., description="Atmospheric pressure on the sea level, hPa")
+    humidity: int = Field(..., description="Humidity, %")
+    clouds: Optional[int] = Field(None, description="Cloudiness, %")
+    wind_speed: float = Field(..., description="Wind speed, meter/sec")
+    wind_deg: int = Field(..., description="Wind direction, degrees (meteorological)")
+    wind_gust: Optional[float] = Field(None, description="Wind gust, meter/sec")
+    pop: Optional[float] = Field(None, description="Probability of precipitation")
+    weather: List[WeatherItem] = Field(..., description="List of weather conditions")
+
+class OneCallDailyItem(BaseModel):
+    """Represents one day of the One Call daily forecast (8 days)."""
+    dt: int = Field(..., description="Time of the forecasted data (local noon), unix, UTC")
+    sunrise: Optional[int] = Field(None, description="Sunrise time, unix, UTC")
+    sunset: Optional[int] = Field(None, description="Sunset time, unix, UTC")
+    temp: DailyTemp = Field(..., description="Temperature details for the day")
+    feels_like: DailyFeelsLike = Field(..., description="Feels like temperature details for the day")
+    pressure: int = Field(..., description="Atmospheric pressure on the sea level, hPa")
+    humidity: int = Field(..., description="Humidity, %")
+    wind_speed: Optional[float] = Field(None, description="Wind speed, meter/sec")
+    wind_deg: Optional[int] = Field(None, description="Wind direction, degrees (meteorological)")
+    wind_gust: Optional[float] = Field(None, description="Wind gust, meter/sec")
+    clouds: Optional[int] = Field(None, description="Cloudiness, %")
+    pop: Optional[float] = Field(None, description="Probability of precipitation")
+    rain: Optional[float] = Field(None, description="Precipitation volume, mm")
+    snow: Optional[float] = Field(None, description="Snow volume, mm")
+    weather: List[WeatherItem] = Field(..., description="List of weather conditions for the day")
+
+class OneCallData(BaseModel):
+    """Represents a One Call response with current, hourly and daily data of one location."""
+    lat: float = Field(..., description="Latitude of the location")
+    lon: float = Field(..., description="Longitude of the location")
+    timezone: Optional[str] = Field(None, description="Timezone name for the requested location")
+    timezone_offset: int = Field(0, description="Shift in seconds from UTC")
+    current: Optional[OneCallCurrent] = Field(None, description="Current weather data")
+    hourly: List[OneCallHourlyItem] = Field(default_factory=list, description="Hourly forecast for 48 hours")
+    daily: List[OneCallDailyItem] = Field(default_factory=list, description="Daily forecast for 8 days")
+
+@lru_cache(maxsize=None)
+def get_type_adapter(response_type: Any) -> TypeAdapter:
+    """Returns the TypeAdapter for a response type. Building one compiles the validator, so it is done once per type."""
+    return TypeAdapter(response_type)
+
+def parse_response(response_type: Any, content: bytes | str) -> Any:
+    """Validates raw response bytes against a response type without building an intermediate dict."""
+    return get_type_adapter(response_type).validate_json(content)
@@ -0,0 +1,361 @@
+"""Per-stage timing spans, histograms and counters, exported as Prometheus text and to OpenTelemetry.
+
+Stages instrumented by WeatherCaster:
+
+- ``query``: a whole `WeatherCaster.get_response`/`stream_response` call
+- ``agent_run``: the pydantic-ai agent run, including its tool calls
+- ``llm``: a single LLM request inside the agent run (with token counts)
+- ``geocode``: resolving a location (gazetteer, cache or API)
+- ``forecast_fetch``: an OpenWeatherMap forecast request, including retries
+- ``parse``: validation of a response and conversion into a snapshot
+- ``transform``: building the `WeatherForecast` tool result from a snapshot
+
+The registry is process-wide. `start_metrics_server()` serves it in the Prometheus text
+format from a daemon thread; `enable_opentelemetry()` additionally opens an OpenTelemetry
+span and records an OpenTelemetry histogram for every stage.
+"""
+
+import bisect
+import logging
+import re
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Any, Callable, Iterator
+
+from tools.context import bind
+
+if TYPE_CHECKING:
+    from http.server import ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+# Seconds, from a cached lookup up to a slow local LLM
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+TOKEN_BUCKETS = (16, 64, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768)
+
+STAGE_DURATION = "weathercaster_stage_duration_seconds"
+LLM_TOKENS_PER_CALL = "weathercaster_llm_tokens_per_call"
+LLM_TOKENS_TOTAL = "weathercaster_llm_tokens_total"
+LLM_CALLS_TOTAL = "weathercaster_llm_calls_total"
+
+Labels = tuple[tuple[str, str], ...]
+
+class Histogram:
+    """Cumulative bucket counts, sum and count of observed values (Prometheus histogram semantics)."""
+
+    def __init__(self, buckets: tuple[float, ...]) -> None:
+        self.buckets = buckets
+        self.bucket_counts = [0] * (len(buckets) + 1) # Last one is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.bucket_counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float:
+        """Estimates a quantile by linear interpolation within its bucket, like Prometheus' histogram_quantile."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.bucket_counts):
+            if seen + bucket_count >= rank and bucket_count:
+                if index == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[index - 1] if index else 0.0
+                return lower + (self.buckets[index] - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.buckets[-1]
+
+class MetricsRegistry:
+    """Thread-safe store of histograms and counters, keyed by metric name and label values.
+
+    Components with their own counters (caches, single-flight, ...) register a collector
+    that returns them as gauges when the metrics are rendered.
+    """
+
+    def __init__(self) -> None:
+        self._histograms: dict[tuple[str, Labels], Histogram] = {}
+        self._counters: dict[tuple[str, Labels], float] = {}
+        self._collectors: dict[str, tuple[Callable[[], dict[str, float]], Labels]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _labels(labels: dict[str, Any]) -> Labels:
+        return tuple(sorted((name, str(value)) for name, value in labels.items() if value is not None))
+
+    def observe(self, name: str, value: float, buckets: tuple[float, ...] = LATENCY_BUCKETS, **labels: Any) -> None:
+        key = (name, self._labels(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def inc(self, name: str, amount: float = 1, **labels: Any) -> None:
+        key = (name, self._labels(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def histogram(self, name: str, **labels: Any) -> Histogram | None:
+        return self._histograms.get((name, self._labels(labels)))
+
+    def histograms(self, name: str) -> dict[Labels, Histogram]:
+        """All histograms of a metric, by their labels."""
+        with self._lock:
+            return {labels: histogram for (metric, labels), histogram in self._histograms.items() if metric == name}
+
+    def register_collector(self, name: str, collect: Callable[[], dict[str, float]], **labels: Any) -> None:
+        """Registers (or replaces under `name`) a callable returning gauge values, exported as `weathercaster_<key>`.
+
+        Components that can have several instances pass a distinguishing label, so their gauges do not clash.
+        """
+        with self._lock:
+            self._collectors[name] = (collect, self._labels(labels))
+
+    def unregister_collector(self, name: str) -> None:
+        """Removes the collector registered under `name`, if any."""
+        with self._lock:
+            self._collectors.pop(name, None)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    def render_prometheus(self) -> str:
+        """Renders all metrics in the Prometheus text exposition format (version 0.0.4)."""
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+            counters = sorted(self._counters.items())
+            collectors = list(self._collectors.items())
+
+        lines: list[str] = []
+        declared: set[str] = set()
+
+        def declare(name: str, metric_type: str) -> None:
+            if name not in declared:
+                declared.add(name)
+                lines.append(f"# TYPE {name} {metric_type}")
+
+        for (name, labels), histogram in histograms:
+            declare(name, "histogram")
+            cumulative = 0
+            bounds = [f"{bound:g}" for bound in histogram.buckets] + ["+Inf"]
+            for bound, bucket_count in zip(bounds, histogram.bucket_counts):
+                cumulative += bucket_count
+                lines.append(f"{name}_bucket{_format_labels(labels + (('le', bound),))} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {histogram.sum:.6f}")
+            lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+        for (name, labels), value in counters:
+            declare(name, "counter")
+            lines.append(f"{name}{_format_labels(labels)} {value:g}")
+        gauges: dict[str, list[str]] = {}
+        for collector_name, (collect, labels) in collectors:
+            try:
+                values = collect()
+            except Exception as e:
+                logger.warning(f"Metrics collector '{collector_name}' failed: {e}")
+                continue
+            for key, value in sorted(values.items()):
+                name = f"weathercaster_{key}"
+                gauges.setdefault(name, []).append(f"{name}{_format_labels(labels)} {value:g}")
+        # Samples of one metric must be grouped under its TYPE line, whichever collector reported them
+        for name, samples in gauges.items():
+            declare(name, "gauge")
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    escaped = []
+    for name, value in labels:
+        value = value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        escaped.append(f'{name}="{value}"')
+    return "{" + ",".join(escaped) + "}"
+
+_INVALID_NAME_CHARACTERS = re.compile(r"[^a-zA-Z0-9_]")
+
+def flatten_stats(stats: dict[str, Any], prefix: str = "") -> dict[str, float]:
+    """Flattens nested stats dicts (as returned by `WeatherAPIClient.get_stats`) into numeric gauges."""
+    flat: dict[str, float] = {}
+    for key, value in stats.items():
+        name = _INVALID_NAME_CHARACTERS.sub("_", f"{prefix}_{key}" if prefix else key)
+        if isinstance(value, bool):
+            flat[name] = float(value)
+        elif isinstance(value, (int, float)):
+            flat[name] = value
+        elif isinstance(value, dict):
+            flat.update(flatten_stats(value, name))
+    return flat
+
+registry = MetricsRegistry()
+
+class QueryTrace:
+    """Stage durations and tags of a single query, collected across the tasks it starts."""
+    __slots__ = ("stages", "tags")
+
+    def __init__(self) -> None:
+        self.stages: dict[str, float] = {} # Total seconds per stage
+        self.tags: dict[str, list[str]] = {}
+
+    def add_stage(self, stage: str, duration: float) -> None:
+        self.stages[stage] = self.stages.get(stage, 0.0) + duration
+
+    def tag(self, key: str, value: str) -> None:
+        values = self.tags.setdefault(key, [])
+        if value not in values:
+            values.append(value)
+
+_current_trace: ContextVar[QueryTrace | None] = ContextVar("weathercaster_trace", default=None)
+
+@contextmanager
+def trace_query() -> Iterator[QueryTrace]:
+    """Collects the stage durations and tags of the enclosed code and the tasks it starts."""
+    trace = QueryTrace()
+    with bind(_current_trace, trace):
+        yield trace
+
+def tag_query(key: str, value: str) -> None:
+    """Tags the traced query the current task belongs to (no-op if it is not traced)."""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.tag(key, value)
+
+# OpenTelemetry tracer and histogram, set by enable_opentelemetry()
+_otel_tracer: Any = None
+_otel_stage_histogram: Any = None
+
+def enable_opentelemetry() -> bool:
+    """Reports every stage to OpenTelemetry as a span and a histogram observation.
+
+    Uses the globally configured tracer and meter providers, so exporters are set up the
+    usual OpenTelemetry way (SDK, environment variables or auto-instrumentation).
+
+    Returns:
+        bool: False if the 'opentelemetry-api' package is not installed.
+    """
+    global _otel_tracer, _otel_stage_histogram
+    try:
+        from opentelemetry import metrics as otel_metrics, trace
+    except ImportError:
+        logger.warning("OTEL_ENABLED is set but the 'opentelemetry-api' package is not installed. Stages are not exported to OpenTelemetry.")
+        return False
+    _otel_tracer = trace.get_tracer("weathercaster")
+    _otel_stage_histogram = otel_metrics.get_meter("weathercaster").create_histogram(
+        "weathercaster.stage.duration", unit="s", description="Duration of a WeatherCaster processing stage"
+    )
+    return True
+
+@contextmanager
+def _otel_span(stage: str, labels: dict[str, Any]) -> Iterator[None]:
+    if _otel_tracer is None:
+        yield
+        return
+    attributes = {name: str(value) for name, value in labels.items() if value is not None}
+    with _otel_tracer.start_as_current_span(stage, attributes=attributes):
+        yield
+
+def record_stage(stage: str, duration: float, outcome: str = "ok", **labels: Any) -> None:
+    """Records the duration of a stage that was timed by the caller."""
+    registry.observe(STAGE_DURATION, duration, stage=stage, outcome=outcome, **labels)
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add_stage(stage, duration)
+    if _otel_stage_histogram is not None:
+        _otel_stage_histogram.record(duration, {"stage": stage, "outcome": outcome, **{k: str(v) for k, v in labels.items() if v is not None}})
+
+@contextmanager
+def stage_span(stage: str, **labels: Any) -> Iterator[None]:
+    """Times the enclosed code as one stage and records it in the stage duration histogram.
+
+    Args:
+        stage (str): Name of the stage, e.g. "geocode" or "llm".
+        **labels: Low-cardinality labels such as the forecast range (None values are dropped).
+    """
+    outcome = "ok"
+    start = time.perf_counter()
+    try:
+        with _otel_span(stage, labels):
+            yield
+    except BaseException:
+        outcome = "error"
+        raise
+    finally:
+        record_stage(stage, time.perf_counter() - start, outcome, **labels)
+
+def record_llm_usage(model_name: str, usage: Any) -> None:
+    """Records the token counts of one LLM request.
+
+    Args:
+        model_name (str): Name of the model that served the request.
+        usage (Any): The pydantic-ai usage of the request (`input_tokens`/`output_tokens`
+                     or, in older versions, `request_tokens`/`response_tokens`).
+    """
+    registry.inc(LLM_CALLS_TOTAL, model=model_name)
+    if usage is None:
+        return
+    input_tokens = getattr(usage, "input_tokens", None) or getattr(usage, "request_tokens", None) or 0
+    output_tokens = getattr(usage, "output_tokens", None) or getattr(usage, "response_tokens", None) or 0
+    for kind, tokens in (("input", input_tokens), ("output", output_tokens)):
+        registry.inc(LLM_TOKENS_TOTAL, tokens, model=model_name, kind=kind)
+        registry.observe(LLM_TOKENS_PER_CALL, tokens, buckets=TOKEN_BUCKETS, model=model_name, kind=kind)
+
+def instrument_model(model: Any) -> Any:
+    """Wraps a pydantic-ai model so every LLM request is timed as an "llm" stage and its tokens are counted."""
+    from pydantic_ai.models.wrapper import WrapperModel
+
+    class InstrumentedLLM(WrapperModel):
+        async def request(self, *args, **kwargs):
+            with stage_span("llm", mode="request"):
+                response = await super().request(*args, **kwargs)
+            record_llm_usage(self.model_name, getattr(response, "usage", None))
+            return response
+
+        @asynccontextmanager
+        async def request_stream(self, *args, **kwargs):
+            with stage_span("llm", mode="stream"):
+                async with super().request_stream(*args, **kwargs) as stream:
+                    yield stream
+            record_llm_usage(self.model_name, stream.usage())
+
+    return InstrumentedLLM(model)
+
+def start_metrics_server(port: int, host: str = "0.0.0.0") -> "ThreadingHTTPServer | None":
+    """Serves the metrics at http://<host>:<port>/metrics from a daemon thread.
+
+    Returns:
+        ThreadingHTTPServer | None: The server (call `shutdown()` to stop it), or None if the port is unavailable.
+    """
+    # Imported here, processes without a metrics endpoint do not load http.server
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            if self.path.split("?", 1)[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render_prometheus().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args: Any) -> None:
+            logger.debug(f"Metrics endpoint: {format % args}")
+
+    try:
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+    except OSError as e:
+        logger.error(f"Could not start the metrics endpoint on {host}:{port}: {e}")
+        return None
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="weathercaster-metrics", daemon=True).start()
+    logger.info(f"Metrics endpoint listening on http://{host}:{port}/metrics")
+    return server
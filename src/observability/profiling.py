@@ -0,0 +1,137 @@
+"""Opt-in cProfile capture of individual queries.
+
+A query is profiled if it is sampled (`sample_rate`). Slow queries are caught without
+profiling every query: with a `slow_threshold`, unsampled queries are only timed, and once
+one exceeds the threshold the profiler is armed. The following queries are then profiled
+until one of them is slow again, whose profile is written, or `ARMED_QUERIES` were fast
+and the profiler disarms. Profiles are written to a directory that keeps
+the newest `max_files` captures: a `.prof` file (load it with `pstats` or snakeviz) and a
+`.json` file with the query, its duration, the stage timings and the forecast ranges.
+
+cProfile profiles the whole event-loop thread, so a capture also contains the work of
+queries running concurrently. Only one query is profiled at a time; the others run
+unprofiled. When both settings are off, `profile()` only checks a flag; with only the
+threshold set, it reads the clock twice per query until the profiler is armed.
+"""
+
+import cProfile
+import json
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator
+from pydantic import BaseModel, Field
+
+from observability.metrics import QueryTrace, trace_query
+
+logger = logging.getLogger(__name__)
+
+class ProfilingStats(BaseModel):
+    """Counters of the query profiler."""
+    profiled: int = Field(default=0, description="Queries run under the profiler")
+    written: int = Field(default=0, description="Profiles written to the profile directory")
+    sampled: int = Field(default=0, description="Profiles written because the query was sampled")
+    slow: int = Field(default=0, description="Profiles written because the query exceeded the slow threshold")
+    slow_detected: int = Field(default=0, description="Unprofiled queries that exceeded the slow threshold and armed the profiler")
+    skipped_concurrent: int = Field(default=0, description="Queries not profiled because another query was being profiled")
+
+class QueryProfiler:
+    """Profiles a sample of queries and the slow ones, and writes the profiles to a rotating directory.
+
+    Args:
+        sample_rate (float): Fraction of queries to profile (0 to 1).
+        slow_threshold (float): Seconds above which a query arms the profiler, and above which an
+                                armed query's profile is kept. 0 disables it.
+        directory (str): Directory the profiles are written to.
+        max_files (int): Number of profiles kept; older ones are deleted.
+    """
+
+    ARMED_QUERIES = 10 # Queries profiled after a slow one before the profiler disarms
+
+    def __init__(self, sample_rate: float, slow_threshold: float, directory: str, max_files: int) -> None:
+        self.sample_rate = sample_rate
+        self.slow_threshold = slow_threshold
+        self.directory = Path(directory)
+        self.max_files = max_files
+        self.enabled = sample_rate > 0 or slow_threshold > 0
+        self.stats = ProfilingStats()
+        self._armed = 0 # Queries left to profile while waiting for a slow one
+        # cProfile allows one active profiler per thread
+        self._active = threading.Lock()
+
+    @contextmanager
+    def profile(self, user_query: str) -> Iterator[None]:
+        """Runs the enclosed code under cProfile if the query is sampled or the profiler is armed."""
+        if not self.enabled:
+            yield
+            return
+        sampled = self.sample_rate > 0 and random.random() < self.sample_rate
+        armed = not sampled and self._armed > 0
+        if not sampled and not armed:
+            start = time.perf_counter()
+            yield
+            if self.slow_threshold > 0 and time.perf_counter() - start >= self.slow_threshold:
+                self.stats.slow_detected += 1
+                self._armed = self.ARMED_QUERIES
+            return
+        if not self._active.acquire(blocking=False):
+            self.stats.skipped_concurrent += 1
+            yield
+            return
+
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        try:
+            with trace_query() as trace:
+                profiler.enable()
+                try:
+                    yield
+                finally:
+                    profiler.disable()
+        finally:
+            self._active.release()
+        duration = time.perf_counter() - start
+        self.stats.profiled += 1
+        slow = self.slow_threshold > 0 and duration >= self.slow_threshold
+        if armed:
+            self._armed = 0 if slow else max(self._armed - 1, 0)
+        if sampled:
+            reason = "sampled"
+        elif slow:
+            reason = "slow"
+        else:
+            return
+        try:
+            self._write(profiler, user_query, duration, trace, reason)
+        except OSError as e:
+            logger.warning(f"Could not write query profile to {self.directory}: {e}")
+
+    def _write(self, profiler: cProfile.Profile, user_query: str, duration: float, trace: QueryTrace, reason: str) -> None:
+        """Writes the profile and its tags, then deletes the oldest profiles beyond `max_files`."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        name = f"{datetime.now():%Y%m%d-%H%M%S-%f}-{reason}-{duration * 1000:.0f}ms"
+        profiler.dump_stats(self.directory / f"{name}.prof")
+        tags = {
+            "query": user_query[:500],
+            "duration_seconds": round(duration, 6),
+            "reason": reason,
+            "stages": {stage: round(seconds, 6) for stage, seconds in sorted(trace.stages.items())},
+            "forecast_ranges": trace.tags.get("forecast_range", []),
+            "tags": trace.tags
+        }
+        (self.directory / f"{name}.json").write_text(json.dumps(tags, indent=2, ensure_ascii=False), encoding="utf-8")
+        self.stats.written += 1
+        if reason == "sampled":
+            self.stats.sampled += 1
+        else:
+            self.stats.slow += 1
+        logger.info(f"Wrote {reason} query profile ({duration * 1000:.0f} ms) to {self.directory / name}.prof")
+
+        profiles = sorted(self.directory.glob("*.prof"))
+        for old_profile in profiles[:max(len(profiles) - self.max_files, 0)]:
+            old_profile.unlink(missing_ok=True)
+            old_profile.with_suffix(".json").unlink(missing_ok=True)
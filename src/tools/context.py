@@ -0,0 +1,51 @@
+"""Scoping of the context variables that carry per-query state (deadline, session, trace, tool calls)."""
+
+import asyncio
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import AsyncGenerator, Iterator, TypeVar
+
+T = TypeVar("T")
+
+_STREAM_END = object()
+
+@contextmanager
+def bind(var: ContextVar[T], value: T) -> Iterator[T]:
+    """Sets `var` to `value` for the enclosed code and the tasks it starts, then restores it.
+
+    The scope must be entered and exited by the same task. Async generators that hold such a
+    scope across their yields are therefore iterated by one task with `run_in_task`.
+    """
+    token = var.set(value)
+    try:
+        yield value
+    finally:
+        var.reset(token)
+
+async def run_in_task(stream: AsyncGenerator[T, None]) -> AsyncGenerator[T, None]:
+    """Iterates `stream` in a task of its own and relays its items.
+
+    Consumers such as Gradio resume a generator from a new task per item, and each task has
+    its own context. Run in one task, the context variables `stream` binds are set and reset
+    in the same context however the relay is consumed. Closing the relay cancels the stream.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=1)
+
+    async def produce() -> None:
+        try:
+            async for item in stream:
+                await queue.put(item)
+        except Exception as e:
+            await queue.put(e)
+        else:
+            await queue.put(_STREAM_END)
+
+    producer = asyncio.create_task(produce())
+    try:
+        while (item := await queue.get()) is not _STREAM_END:
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        producer.cancel()
+        await asyncio.gather(producer, return_exceptions=True)
@@ -0,0 +1,68 @@
+"""Per-query latency budget, propagated to the agent run and every upstream request."""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterator
+from pydantic import BaseModel, Field
+
+from tools.context import bind
+
+class DeadlineExceeded(TimeoutError):
+    """Raised instead of starting work that cannot finish before the deadline."""
+
+class DeadlineStats(BaseModel):
+    """Counters of queries answered within (or past) their latency budget."""
+    queries: int = Field(default=0, description="Queries that ran with a deadline")
+    misses: int = Field(default=0, description="Queries whose deadline expired before the answer was complete")
+    partial_answers: int = Field(default=0, description="Misses answered with the tool data retrieved before the deadline")
+    truncated_streams: int = Field(default=0, description="Misses whose streamed answer was cut off after some text was sent")
+
+    @property
+    def miss_rate(self) -> float:
+        return self.misses / self.queries if self.queries else 0.0
+
+class Deadline:
+    """Point in time (monotonic clock) by which a query must be answered.
+
+    The budget counts from `started_at` (monotonic clock), e.g. when the query arrived before
+    it waited for an agent slot, or from now. Tool results obtained before the deadline are
+    collected in `tool_results`, so a query that runs out of time can still be answered with
+    the data retrieved so far.
+    """
+    __slots__ = ("budget", "expires_at", "tool_results")
+
+    def __init__(self, budget: float, started_at: float | None = None) -> None:
+        self.budget = budget
+        self.expires_at = (time.monotonic() if started_at is None else started_at) + budget
+        # (tool arguments, tool result) in call order
+        self.tool_results: list[tuple[dict[str, Any], Any]] = []
+
+    def remaining(self) -> float:
+        """Seconds left, 0 once the deadline has passed."""
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+_current_deadline: ContextVar[Deadline | None] = ContextVar("weathercaster_deadline", default=None)
+
+def current_deadline() -> Deadline | None:
+    """The deadline of the query the current task belongs to, if any."""
+    return _current_deadline.get()
+
+def remaining_time() -> float | None:
+    """Seconds left for the current query, None if it has no deadline."""
+    deadline = _current_deadline.get()
+    return deadline.remaining() if deadline is not None else None
+
+@contextmanager
+def use_deadline(budget: float | None, started_at: float | None = None) -> Iterator[Deadline | None]:
+    """Gives the enclosed code and the tasks it starts `budget` seconds, counted from `started_at` (now if None).
+
+    None or 0 means no deadline.
+    """
+    deadline = Deadline(budget, started_at) if budget else None
+    with bind(_current_deadline, deadline):
+        yield deadline
@@ -0,0 +1,97 @@
+"""Bounded TTL cache for forecast payloads with stale-while-revalidate semantics."""
+
+import threading
+import time
+from collections import OrderedDict
+from enum import Enum
+from typing import Any, Hashable
+from pydantic import BaseModel, Field
+
+class CacheState(str, Enum):
+    """Freshness of a cache lookup."""
+    FRESH = "fresh" # Within its TTL, serve as is
+    STALE = "stale" # TTL expired but within the stale window, serve and refresh in the background
+    MISS = "miss"   # Not cached (or too old to serve), fetch before answering
+
+class ForecastCacheStats(BaseModel):
+    """Counters of the forecast cache."""
+    fresh_hits: int = Field(default=0, description="Lookups served from a fresh entry")
+    stale_hits: int = Field(default=0, description="Lookups served from a stale entry while it is refreshed")
+    misses: int = Field(default=0, description="Lookups that required an upstream fetch")
+    evictions: int = Field(default=0, description="Entries dropped to stay within the size bound")
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.fresh_hits + self.stale_hits + self.misses
+        return (self.fresh_hits + self.stale_hits) / lookups if lookups else 0.0
+
+class ForecastCache:
+    """LRU cache of forecast payloads keyed by quantized coordinates and forecast range.
+
+    An entry is fresh for the TTL of its range. After that it may still be served for
+    `max_stale` seconds while the caller refreshes it in the background.
+    """
+
+    def __init__(self, ttls: dict[str, float], max_stale: float, max_entries: int, precision: int) -> None:
+        """
+        Args:
+            ttls (dict[str, float]): Time-to-live in seconds per forecast range value.
+            max_stale (float): Seconds past the TTL during which a stale entry may still be served.
+            max_entries (int): Maximum number of cached payloads.
+            precision (int): Decimal places the coordinates are rounded to (2 ~ 1 km).
+        """
+        self.ttls = ttls
+        self.max_stale = max_stale
+        self.max_entries = max_entries
+        self.precision = precision
+        self.stats = ForecastCacheStats()
+        # key -> (payload, fetched_at)
+        self._entries: OrderedDict[Hashable, tuple[Any, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def key(self, lat: float, lon: float, forecast_range: str) -> tuple[float, float, str]:
+        """Builds the cache key for a location and forecast range."""
+        return round(lat, self.precision), round(lon, self.precision), str(forecast_range)
+
+    def get(self, key: tuple[float, float, str]) -> tuple[CacheState, Any]:
+        """Looks up a payload.
+
+        Returns:
+            tuple[CacheState, Any]: The freshness state and the payload (None on a miss).
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                payload, fetched_at = entry
+                age = now - fetched_at
+                ttl = self.ttls.get(key[2], 0.0)
+                if age <= ttl:
+                    self._entries.move_to_end(key)
+                    self.stats.fresh_hits += 1
+                    return CacheState.FRESH, payload
+                if age <= ttl + self.max_stale:
+                    self._entries.move_to_end(key)
+                    self.stats.stale_hits += 1
+                    return CacheState.STALE, payload
+                # Expired entries stay until they are evicted, `peek()` may still serve them while the upstream is down
+            self.stats.misses += 1
+            return CacheState.MISS, None
+
+    def peek(self, key: tuple[float, float, str]) -> Any:
+        """Returns the cached payload regardless of its age (None if there is none). Does not count as a lookup."""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry[0] if entry is not None else None
+
+    def set(self, key: tuple[float, float, str], payload: Any) -> None:
+        """Stores a freshly fetched payload, evicting the least recently used entries if needed."""
+        with self._lock:
+            self._entries[key] = (payload, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,226 @@
+"""Struct-of-arrays representation of hourly and daily forecast series.
+
+An OpenWeatherMap forecast arrives as a list of nested items. The series below decode it
+once into one typed `array` per column (timestamps, temperatures, wind, ...) and a table of
+the distinct conditions, so windowing and slicing work on compact columns. The per-row
+Pydantic models of `model_definition.final_response` are only built for the rows a
+consumer actually asks for. They are built anew on every request and never kept with
+the cached series, so a cached forecast stays at its decoded size and no two answers
+share (mutable) row objects.
+
+Decoding reads each item once into a row tuple and transposes the rows into columns, as
+the decode runs on every fetch and is paid by the first request after it.
+"""
+
+import bisect
+from abc import ABC, abstractmethod
+from array import array
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Iterator
+
+from model_definition.final_response import DailyWeather, DaylightInfo, HourlyWeather, WindInfo
+from model_definition.response_types import DailyForecastData, HourlyForecastData, OneCallDailyItem, OneCallHourlyItem
+
+# Reference: https://openweathermap.org/weather-conditions
+WEATHER_ICON_EMOJIS = {
+    # Day icons
+    "01d": "☀️",  # clear sky
+    "02d": "🌤️",  # few clouds
+    "03d": "☁️",  # scattered clouds
+    "04d": "🌥️",  # broken clouds / overcast clouds
+    "09d": "🌦️",  # shower rain
+    "10d": "🌧️",  # rain
+    "11d": "⛈️",  # thunderstorm
+    "13d": "❄️",  # snow
+    "50d": "🌫️",  # mist
+    # Night icons
+    "01n": "🌙",  # clear sky
+    "02n": "☁️",  # few clouds
+    "03n": "☁️",  # scattered clouds
+    "04n": "🌥️",  # broken clouds / overcast clouds
+    "09n": "🌦️",  # shower rain
+    "10n": "🌧️",  # rain
+    "11n": "⛈️",  # thunderstorm
+    "13n": "❄️",  # snow
+    "50n": "🌫️",  # mist
+}
+UNKNOWN_WEATHER_EMOJI = "❓"
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_EPOCH_ORDINAL = _EPOCH.toordinal()
+_SECONDS_PER_DAY = 86400
+
+@lru_cache(maxsize=1024)
+def weather_condition(description: str, icon: str) -> tuple[str, str]:
+    """(condition, emoji) for an OWM weather description and icon. OWM uses a small fixed set of both."""
+    return description.capitalize(), WEATHER_ICON_EMOJIS.get(icon, UNKNOWN_WEATHER_EMOJI)
+
+def _to_datetime(timestamp: int) -> datetime:
+    return _EPOCH + timedelta(seconds=timestamp)
+
+def _to_date(timestamp: int) -> date:
+    return date.fromordinal(_EPOCH_ORDINAL + timestamp // _SECONDS_PER_DAY)
+
+class _Series(ABC):
+    """Columns shared by the hourly and daily series.
+
+    Subclasses list their columns in `_COLUMNS` and the `array` typecode of each in `_TYPECODES`.
+    """
+    __slots__ = ("timestamps", "wind_speeds", "wind_directions", "humidities", "condition_codes", "conditions")
+    _COLUMNS: tuple[str, ...] = ("timestamps", "wind_speeds", "wind_directions", "humidities", "condition_codes")
+    _TYPECODES = "qdHBH"
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    @classmethod
+    def _from_rows(cls, rows: list[tuple], conditions: dict[tuple[str, str], int]):
+        """Builds a series from decoded rows holding one value per column, in `_COLUMNS` order.
+
+        Args:
+            rows (list[tuple]): The decoded items.
+            conditions (dict[tuple[str, str], int]): The distinct (description, icon) pairs and the
+                                                     codes the rows refer to them by.
+        """
+        series = object.__new__(cls)
+        columns = zip(*rows) if rows else [()] * len(cls._COLUMNS)
+        for column, typecode, values in zip(cls._COLUMNS, cls._TYPECODES, columns):
+            setattr(series, column, array(typecode, values))
+        series.conditions = [weather_condition(description, icon) for description, icon in conditions]
+        return series
+
+    def _take(self, index: slice):
+        """Returns a new series with `index` applied to every column. The condition table is shared."""
+        series = object.__new__(type(self))
+        for column in self._COLUMNS:
+            setattr(series, column, getattr(self, column)[index])
+        series.conditions = self.conditions
+        return series
+
+    def window(self, start: int, end: int):
+        """Rows with start <= timestamp < end (unix, UTC). Timestamps are sorted, so this is two bisections."""
+        return self._take(slice(bisect.bisect_left(self.timestamps, start), bisect.bisect_left(self.timestamps, end)))
+
+    def head(self, count: int):
+        """The first `count` rows."""
+        return self._take(slice(0, count))
+
+    @abstractmethod
+    def _materialize(self, position: int):
+        """Builds the Pydantic model of a row."""
+
+    def __getitem__(self, position: int):
+        return self._materialize(position)
+
+    def __iter__(self) -> Iterator:
+        return (self._materialize(position) for position in range(len(self)))
+
+    def to_models(self) -> list:
+        """Materializes all rows as Pydantic models."""
+        return list(self)
+
+class HourlySeries(_Series):
+    """Hourly forecast as columns; rows materialize as `HourlyWeather`."""
+    __slots__ = ("temperatures", "pressures")
+    _COLUMNS = _Series._COLUMNS + ("temperatures", "pressures")
+    _TYPECODES = _Series._TYPECODES + "dH"
+
+    @classmethod
+    def from_api(cls, data: HourlyForecastData) -> "HourlySeries":
+        conditions: dict[tuple[str, str], int] = {}
+        rows = []
+        for item in data.list:
+            main, wind, weather = item.main, item.wind, item.weather[0]
+            code = conditions.setdefault((weather.description, weather.icon), len(conditions))
+            rows.append((item.dt, wind.speed, wind.deg, main.humidity, code, main.temp, main.pressure))
+        return cls._from_rows(rows, conditions)
+
+    @classmethod
+    def from_onecall(cls, items: list[OneCallHourlyItem]) -> "HourlySeries":
+        """Decodes the `hourly` list of a One Call response, which has flat wind and temperature fields."""
+        conditions: dict[tuple[str, str], int] = {}
+        rows = []
+        for item in items:
+            weather = item.weather[0]
+            code = conditions.setdefault((weather.description, weather.icon), len(conditions))
+            rows.append((item.dt, item.wind_speed, item.wind_deg, item.humidity, code, item.temp, item.pressure))
+        return cls._from_rows(rows, conditions)
+
+    def _materialize(self, position: int) -> HourlyWeather:
+        condition, emoji = self.conditions[self.condition_codes[position]]
+        return HourlyWeather(
+            time=_to_datetime(self.timestamps[position]),
+            temperature=self.temperatures[position],
+            condition=condition,
+            emoji=emoji,
+            wind=WindInfo(speed=self.wind_speeds[position], direction=self.wind_directions[position]),
+            humidity=self.humidities[position],
+            pressure=self.pressures[position]
+        )
+
+class DailySeries(_Series):
+    """Daily forecast as columns; rows materialize as `DailyWeather`.
+
+    Missing sunrise/sunset times are stored as 0 and replaced by `default_daylight` on materialization.
+    Forecast dates are local dates of the location, shifted by `utc_offset` seconds from UTC.
+    """
+    __slots__ = ("max_temperatures", "min_temperatures", "sunrises", "sunsets", "default_daylight", "utc_offset")
+    _COLUMNS = _Series._COLUMNS + ("max_temperatures", "min_temperatures", "sunrises", "sunsets")
+    _TYPECODES = _Series._TYPECODES + "ddqq"
+
+    @classmethod
+    def from_api(cls, data: DailyForecastData, default_daylight: DaylightInfo | None = None) -> "DailySeries":
+        conditions: dict[tuple[str, str], int] = {}
+        rows = []
+        for item in data.list:
+            temp, weather = item.temp, item.weather[0]
+            code = conditions.setdefault((weather.description, weather.icon), len(conditions))
+            # min/max are optional in the API, fall back to the daytime temperature
+            rows.append((item.dt, item.speed or 0.0, item.deg or 0, item.humidity, code,
+                         temp.max if temp.max is not None else temp.day, temp.min if temp.min is not None else temp.day,
+                         item.sunrise or 0, item.sunset or 0))
+        series = cls._from_rows(rows, conditions)
+        series.default_daylight = default_daylight
+        series.utc_offset = data.city.timezone or 0
+        return series
+
+    @classmethod
+    def from_onecall(cls, items: list[OneCallDailyItem], utc_offset: int = 0) -> "DailySeries":
+        """Decodes the `daily` list of a One Call response, whose `timezone_offset` is passed as `utc_offset`."""
+        conditions: dict[tuple[str, str], int] = {}
+        rows = []
+        for item in items:
+            temp, weather = item.temp, item.weather[0]
+            code = conditions.setdefault((weather.description, weather.icon), len(conditions))
+            rows.append((item.dt, item.wind_speed or 0.0, item.wind_deg or 0, item.humidity, code,
+                         temp.max if temp.max is not None else temp.day, temp.min if temp.min is not None else temp.day,
+                         item.sunrise or 0, item.sunset or 0))
+        series = cls._from_rows(rows, conditions)
+        series.default_daylight = None
+        series.utc_offset = utc_offset
+        return series
+
+    def _take(self, index: slice) -> "DailySeries":
+        series = super()._take(index)
+        series.default_daylight = self.default_daylight
+        series.utc_offset = self.utc_offset
+        return series
+
+    def _materialize(self, position: int) -> DailyWeather:
+        condition, emoji = self.conditions[self.condition_codes[position]]
+        sunrise, sunset = self.sunrises[position], self.sunsets[position]
+        default = self.default_daylight
+        return DailyWeather(
+            forecast_date=_to_date(self.timestamps[position] + self.utc_offset),
+            max_temperature=self.max_temperatures[position],
+            min_temperature=self.min_temperatures[position],
+            condition=condition,
+            emoji=emoji,
+            wind=WindInfo(speed=self.wind_speeds[position], direction=self.wind_directions[position]),
+            humidity=self.humidities[position],
+            daylight=DaylightInfo(
+                sunrise=_to_datetime(sunrise) if sunrise else (default.sunrise if default else None),
+                sunset=_to_datetime(sunset) if sunset else (default.sunset if default else None)
+            )
+        )
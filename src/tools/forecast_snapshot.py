@@ -0,0 +1,164 @@
+"""Compact internal form of an OpenWeatherMap payload, as kept in the forecast cache.
+
+A validated API payload is a tree of Pydantic models with one object per nested field
+and forecast hour. It is converted once, right after the fetch, into the `__slots__`
+classes below (plus the columnar series of `tools.forecast_series`) and only the
+snapshot is cached. The Pydantic `WeatherForecast` schema is built from a snapshot when
+the tool returns its result.
+"""
+
+from dataclasses import dataclass, replace
+from datetime import datetime, timedelta, timezone
+
+from model_definition.final_response import CurrentWeather, DaylightInfo, WeatherForecast, WindInfo
+from model_definition.response_types import DailyForecastData, HourlyForecastData, OneCallData, WeatherData
+from tools.forecast_series import DailySeries, HourlySeries, weather_condition
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+@dataclass(slots=True, frozen=True)
+class CurrentConditions:
+    """Current weather of one location. Times are unix timestamps (UTC)."""
+    location: str
+    timestamp: int
+    condition: str
+    emoji: str
+    temperature: float
+    feels_like_temperature: float
+    high_temperature: float
+    low_temperature: float
+    wind_speed: float
+    wind_direction: int
+    humidity: int
+    pressure: int
+    sunrise: int
+    sunset: int
+
+    @classmethod
+    def from_api(cls, data: WeatherData) -> "CurrentConditions":
+        weather_item = data.weather[0]
+        # Condition strings come from a shared lookup, so cached entries do not hold copies
+        condition, emoji = weather_condition(weather_item.description, weather_item.icon)
+        return cls(
+            location=data.name,
+            timestamp=data.dt,
+            condition=condition,
+            emoji=emoji,
+            temperature=data.main.temp,
+            feels_like_temperature=data.main.feels_like,
+            high_temperature=data.main.temp_max,
+            low_temperature=data.main.temp_min,
+            wind_speed=data.wind.speed,
+            wind_direction=data.wind.deg,
+            humidity=data.main.humidity,
+            pressure=data.main.pressure,
+            sunrise=data.sys.sunrise,
+            sunset=data.sys.sunset
+        )
+
+    @classmethod
+    def from_onecall(cls, data: OneCallData, location: str) -> "CurrentConditions | None":
+        """Current weather of a One Call response. High and low are taken from today's daily entry.
+
+        One Call responses carry no place name, so `location` is the geocoded name of the coordinates.
+        """
+        current = data.current
+        if current is None:
+            return None
+        weather_item = current.weather[0]
+        condition, emoji = weather_condition(weather_item.description, weather_item.icon)
+        today = data.daily[0].temp if data.daily else None
+        return cls(
+            location=location,
+            timestamp=current.dt,
+            condition=condition,
+            emoji=emoji,
+            temperature=current.temp,
+            feels_like_temperature=current.feels_like,
+            high_temperature=today.max if today and today.max is not None else current.temp,
+            low_temperature=today.min if today and today.min is not None else current.temp,
+            wind_speed=current.wind_speed,
+            wind_direction=current.wind_deg,
+            humidity=current.humidity,
+            pressure=current.pressure,
+            sunrise=current.sunrise or (data.daily[0].sunrise if data.daily else None) or 0,
+            sunset=current.sunset or (data.daily[0].sunset if data.daily else None) or 0
+        )
+
+    def to_model(self) -> CurrentWeather:
+        """Builds the Pydantic `CurrentWeather` returned to the agent."""
+        return CurrentWeather(
+            location=self.location,
+            date_time=_EPOCH + timedelta(seconds=self.timestamp),
+            condition=self.condition,
+            emoji=self.emoji,
+            temperature=self.temperature,
+            feels_like_temperature=self.feels_like_temperature,
+            high_temperature=self.high_temperature,
+            low_temperature=self.low_temperature,
+            wind=WindInfo(speed=self.wind_speed, direction=self.wind_direction),
+            humidity=self.humidity,
+            pressure=self.pressure,
+            daylight=DaylightInfo(
+                sunrise=_EPOCH + timedelta(seconds=self.sunrise),
+                sunset=_EPOCH + timedelta(seconds=self.sunset)
+            )
+        )
+
+@dataclass(slots=True, frozen=True)
+class ForecastSnapshot:
+    """The data of one forecast payload.
+
+    Per-range payloads set one of `current`, `hourly` and `daily`; a One Call payload sets all
+    three and is narrowed to a single range with `only()`.
+    """
+    utc_offset: int = 0
+    current: CurrentConditions | None = None
+    hourly: HourlySeries | None = None
+    daily: DailySeries | None = None
+
+    @classmethod
+    def from_current(cls, data: WeatherData) -> "ForecastSnapshot":
+        return cls(utc_offset=data.timezone or 0, current=CurrentConditions.from_api(data))
+
+    @classmethod
+    def from_hourly(cls, data: HourlyForecastData) -> "ForecastSnapshot":
+        return cls(utc_offset=data.city.timezone or 0, hourly=HourlySeries.from_api(data))
+
+    @classmethod
+    def from_daily(cls, data: DailyForecastData) -> "ForecastSnapshot":
+        return cls(utc_offset=data.city.timezone or 0, daily=DailySeries.from_api(data))
+
+    @classmethod
+    def from_onecall(cls, data: OneCallData, location: str) -> "ForecastSnapshot":
+        return cls(
+            utc_offset=data.timezone_offset,
+            current=CurrentConditions.from_onecall(data, location),
+            hourly=HourlySeries.from_onecall(data.hourly) if data.hourly else None,
+            daily=DailySeries.from_onecall(data.daily, data.timezone_offset) if data.daily else None
+        )
+
+    def only(self, part: str) -> "ForecastSnapshot":
+        """A snapshot sharing only one of "current", "hourly" and "daily" with this one (no data is copied)."""
+        return replace(self, **{name: None for name in ("current", "hourly", "daily") if name != part})
+
+    def to_weather_forecast(self, window: tuple[int, int] | None = None, max_hourly_items: int | None = None) -> WeatherForecast | None:
+        """Builds the Pydantic `WeatherForecast` for the rows inside `window`.
+
+        Args:
+            window (tuple[int, int] | None): Only hourly/daily rows with start <= dt < end (unix, UTC) are kept.
+            max_hourly_items (int | None): Maximum number of hourly rows.
+
+        Returns:
+            WeatherForecast | None: None if the snapshot has no data (in the window).
+        """
+        current = self.current.to_model() if self.current else None
+        hourly, daily = [], []
+        if self.hourly:
+            hourly_series = self.hourly.window(*window) if window else self.hourly
+            hourly = hourly_series.head(max_hourly_items).to_models() if max_hourly_items is not None else hourly_series.to_models()
+        if self.daily:
+            daily = (self.daily.window(*window) if window else self.daily).to_models()
+        if current or hourly or daily:
+            return WeatherForecast(current=current, hourly=hourly, daily=daily, utc_offset=self.utc_offset)
+        return None
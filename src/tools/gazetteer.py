@@ -0,0 +1,135 @@
+"""Offline gazetteer of frequently requested cities, consulted before the OWM geocoding API."""
+
+import logging
+import mmap
+import threading
+import unicodedata
+from pathlib import Path
+
+from model_definition.response_types import Coordinates, GeocodingResult
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_GAZETTEER_PATH = Path(__file__).parent / "data" / "cities.tsv"
+
+# Characters that are not part of the normalized key: "Tel Aviv-Yafo" -> "tel aviv yafo"
+_SEPARATORS = str.maketrans({"-": " ", "'": " ", ".": " ", "ı": "i"})
+
+class Gazetteer:
+    """Read-only index over a GeoNames-style TSV file of cities.
+
+    Columns (tab separated): name, asciiname, alternatenames (comma separated), latitude,
+    longitude, country code, population. Lines starting with '#' are comments.
+
+    The file is memory-mapped and only a mapping of normalized names to line offsets is kept
+    in memory. Records are decoded from the mapped file on demand. Nothing is loaded until
+    the first lookup. A name matches cities that carry it as their name before those that
+    list it as an alternate name, so "Paris" is not mistaken for an alias of another city.
+    """
+
+    def __init__(self, path: str | Path = DEFAULT_GAZETTEER_PATH) -> None:
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._mmap: mmap.mmap | None = None
+        # normalized name -> line offsets, cities with that name first, then by population
+        self._index: dict[str, tuple[int, ...]] | None = None
+
+    @staticmethod
+    def normalize(name: str) -> str:
+        """Normalizes a city name: case, diacritics and punctuation are ignored ("Zürich" -> "zurich")."""
+        decomposed = unicodedata.normalize("NFKD", name.casefold().translate(_SEPARATORS))
+        if not decomposed.isascii():
+            decomposed = "".join(char for char in decomposed if not unicodedata.combining(char))
+        return " ".join(decomposed.split())
+
+    @classmethod
+    def _normalize_list(cls, names: str) -> list[str]:
+        """Normalizes a comma-separated list of names in one call, which is much faster than one call per name."""
+        return [" ".join(part.split()) for part in cls.normalize(names).split(",")]
+
+    def _ensure_loaded(self) -> bool:
+        """Maps the file and builds the name index on first use. Returns False if the gazetteer is unavailable."""
+        if self._index is not None:
+            return bool(self._index)
+        with self._lock:
+            if self._index is not None:
+                return bool(self._index)
+            entries: dict[str, list[tuple[bool, int, int]]] = {}
+            try:
+                with open(self.path, "rb") as file:
+                    self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+                offset, size = 0, len(self._mmap)
+                while offset < size:
+                    end = self._mmap.find(b"\n", offset)
+                    end = size if end == -1 else end
+                    line = self._mmap[offset:end]
+                    if line.strip() and not line.startswith(b"#"):
+                        name, asciiname, alternatenames, _lat, _lon, _country, population = line.decode("utf-8").rstrip("\r").split("\t")
+                        population = int(population or 0)
+                        names = set(self._normalize_list(f"{name},{asciiname}"))
+                        for key in names:
+                            entries.setdefault(key, []).append((True, population, offset))
+                        for key in self._normalize_list(alternatenames):
+                            if key and key not in names:
+                                entries.setdefault(key, []).append((False, population, offset))
+                    offset = end + 1
+            except (OSError, ValueError) as e:
+                logger.warning(f"Gazetteer disabled, could not load {self.path}: {e}")
+                self._index = {}
+                return False
+
+            self._index = {
+                key: (found[0][2],) if len(found) == 1 else tuple(offset for *_, offset in sorted(set(found), reverse=True))
+                for key, found in entries.items()
+            }
+            logger.info(f"Gazetteer loaded: {len(self._index)} names from {self.path}")
+            return True
+
+    def load(self) -> bool:
+        """Builds the name index now instead of on the first lookup. Returns False if the gazetteer is unavailable."""
+        return self._ensure_loaded()
+
+    def _record(self, offset: int) -> GeocodingResult:
+        end = self._mmap.find(b"\n", offset)
+        fields = self._mmap[offset:end if end != -1 else len(self._mmap)].decode("utf-8").rstrip("\r").split("\t")
+        return GeocodingResult(
+            coordinates=Coordinates(lat=float(fields[3]), lon=float(fields[4])),
+            name=fields[0],
+            country=fields[5]
+        )
+
+    def lookup(self, location_name: str) -> GeocodingResult | None:
+        """Resolves "City" or "City, CC" (ISO 3166 alpha-2 country code).
+
+        Without a country code the most populous city of that name is returned.
+
+        Returns:
+            GeocodingResult | None: The match, or None if the location is not in the gazetteer
+                                    (including qualifiers other than a country code).
+        """
+        if not self._ensure_loaded():
+            return None
+        name, _, country = location_name.partition(",")
+        key, country = self.normalize(name), country.strip().upper()
+        if country and len(country) != 2:
+            return None
+        with self._lock:
+            # close() may have unmapped the file since it was loaded
+            if self._mmap is None:
+                return None
+            offsets = self._index.get(key, ())
+            if not country:
+                return self._record(offsets[0]) if offsets else None
+            for offset in offsets:
+                record = self._record(offset)
+                if record.country == country:
+                    return record
+            return None
+
+    def close(self) -> None:
+        """Unmaps the file once running lookups are done. The index is rebuilt on the next lookup."""
+        with self._lock:
+            if self._mmap is not None:
+                self._mmap.close()
+                self._mmap = None
+            self._index = None
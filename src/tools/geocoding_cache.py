@@ -0,0 +1,142 @@
+"""Two-tier geocoding cache: an in-process LRU in front of a persistent SQLite store."""
+
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from pydantic import BaseModel, Field
+
+from model_definition.response_types import GeocodingResult
+
+logger = logging.getLogger(__name__)
+
+class GeocodingCacheStats(BaseModel):
+    """Hit/miss counters of the geocoding cache."""
+    memory_hits: int = Field(default=0, description="Lookups answered by the in-process LRU")
+    disk_hits: int = Field(default=0, description="Lookups answered by the persistent store")
+    negative_hits: int = Field(default=0, description="Hits on cached 'location not found' entries")
+    misses: int = Field(default=0, description="Lookups that require a geocoding API call")
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0
+
+class GeocodingCache:
+    """Caches `GeocodingResult`s keyed by the normalized location name.
+
+    Positive results never expire (city coordinates do not change). Negative lookups
+    (location not found) are cached as well, but only for `negative_ttl` seconds.
+    """
+
+    def __init__(self, max_entries: int, db_path: str | None, negative_ttl: float) -> None:
+        """
+        Args:
+            max_entries (int): Capacity of the in-process LRU.
+            db_path (str | None): Path of the SQLite file. Persistence is disabled if empty or None.
+            negative_ttl (float): Seconds a "location not found" result is kept.
+        """
+        self.max_entries = max_entries
+        self.db_path = db_path
+        self.negative_ttl = negative_ttl
+        self.stats = GeocodingCacheStats()
+        # value, expires_at (None = never expires)
+        self._entries: OrderedDict[str, tuple[GeocodingResult | None, float | None]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: sqlite3.Connection | None = None
+        self._db_failed = False
+
+    @staticmethod
+    def normalize(location_name: str) -> str:
+        """Normalizes a location name, e.g. "  Paris ,FR " -> "paris, fr"."""
+        parts = [" ".join(part.split()) for part in location_name.casefold().split(",")]
+        return ", ".join(part for part in parts if part)
+
+    def _connection(self) -> sqlite3.Connection | None:
+        """Opens the SQLite store on first use. Returns None if persistence is disabled or unavailable."""
+        if self._db is not None or self._db_failed or not self.db_path:
+            return self._db
+        try:
+            Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS geocoding (key TEXT PRIMARY KEY, payload TEXT, expires_at REAL)"
+            )
+            self._db.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Geocoding cache persistence disabled, could not open {self.db_path}: {e}")
+            self._db = None
+            self._db_failed = True
+        return self._db
+
+    def get(self, location_name: str) -> tuple[bool, GeocodingResult | None]:
+        """Looks up a location.
+
+        Returns:
+            tuple[bool, GeocodingResult | None]: (found, result). `found` is True for cached negative
+                                                 lookups as well, in which case `result` is None.
+        """
+        key = self.normalize(location_name)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                result, expires_at = entry
+                if expires_at is None or expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.stats.memory_hits += 1
+                    if result is None:
+                        self.stats.negative_hits += 1
+                    return True, result
+                del self._entries[key]
+
+            db = self._connection()
+            if db is not None:
+                try:
+                    row = db.execute("SELECT payload, expires_at FROM geocoding WHERE key = ?", (key,)).fetchone()
+                except sqlite3.Error as e:
+                    logger.warning(f"Geocoding cache read failed for '{key}': {e}")
+                    row = None
+                if row is not None and (row[1] is None or row[1] > now):
+                    result = GeocodingResult.model_validate_json(row[0]) if row[0] is not None else None
+                    self._remember(key, result, row[1])
+                    self.stats.disk_hits += 1
+                    if result is None:
+                        self.stats.negative_hits += 1
+                    return True, result
+
+            self.stats.misses += 1
+            return False, None
+
+    def set(self, location_name: str, result: GeocodingResult | None) -> None:
+        """Stores a geocoding result. `None` records a negative lookup with the negative TTL."""
+        key = self.normalize(location_name)
+        expires_at = None if result is not None else time.time() + self.negative_ttl
+        with self._lock:
+            self._remember(key, result, expires_at)
+            db = self._connection()
+            if db is None:
+                return
+            try:
+                db.execute(
+                    "INSERT OR REPLACE INTO geocoding (key, payload, expires_at) VALUES (?, ?, ?)",
+                    (key, result.model_dump_json() if result is not None else None, expires_at)
+                )
+                db.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"Geocoding cache write failed for '{key}': {e}")
+
+    def _remember(self, key: str, result: GeocodingResult | None, expires_at: float | None) -> None:
+        self._entries[key] = (result, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def close(self) -> None:
+        """Closes the persistent store. It is reopened on the next lookup."""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
@@ -0,0 +1,235 @@
+"""Load balancing of LLM requests over several OpenAI-compatible servers (e.g. Ollama instances).
+
+`BackendPool` is an httpx transport: the OpenAI client talks to a placeholder base URL and
+the pool sends every request to the healthy backend with the fewest outstanding requests
+(ties are broken round-robin). A request counts as outstanding until its response body is
+closed, so streamed generations are included.
+
+A backend is ejected after `eject_after_failures` consecutive failures (connection errors,
+timeouts, 5xx), either of real requests or of the active health checks, and rejoins once a
+health check succeeds. Requests that could not connect are retried on the next backend.
+If every backend is ejected, requests are still sent to them rather than failing outright.
+"""
+
+import asyncio
+import contextvars
+import logging
+import time
+from typing import AsyncIterator, Callable
+import httpx
+from pydantic import BaseModel, Field
+
+from observability.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# Base URL the OpenAI client is configured with; the pool replaces it with a backend's URL
+POOL_BASE_URL = "http://llm-backends/v1"
+
+BACKEND_DURATION = "weathercaster_llm_backend_duration_seconds"
+BACKEND_REQUESTS = "weathercaster_llm_backend_requests_total"
+BACKEND_ERRORS = "weathercaster_llm_backend_errors_total"
+
+class BackendStats(BaseModel):
+    """Counters and state of one LLM backend."""
+    healthy: bool = Field(default=True, description="False while the backend is ejected")
+    outstanding: int = Field(default=0, description="Requests sent to the backend whose response is not finished yet")
+    requests: int = Field(default=0, description="Requests sent to the backend")
+    errors: int = Field(default=0, description="Requests that failed with a connection error, timeout or 5xx")
+    consecutive_failures: int = Field(default=0, description="Failures since the last success")
+    ejections: int = Field(default=0, description="Times the backend was ejected")
+    health_checks_failed: int = Field(default=0, description="Failed active health checks")
+
+class Backend:
+    """One OpenAI-compatible server, given by its base URL without the /v1 path (e.g. http://gpu1:11434)."""
+
+    def __init__(self, url: str) -> None:
+        self.url = httpx.URL(url.rstrip("/"))
+        self.name = self.url.netloc.decode()
+        self.stats = BackendStats()
+
+    def route(self, url: httpx.URL) -> httpx.URL:
+        """Rewrites a URL of the placeholder base to this backend."""
+        return url.copy_with(scheme=self.url.scheme, netloc=self.url.netloc, path=self.url.path.rstrip("/") + url.path)
+
+class _TrackedStream(httpx.AsyncByteStream):
+    """Response body that reports to the pool when it is closed, and whether reading it failed."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, on_close: Callable[[bool], None]) -> None:
+        self._stream = stream
+        self._on_close = on_close
+        self._failed = False
+        self._closed = False
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        try:
+            async for chunk in self._stream:
+                yield chunk
+        except Exception:
+            self._failed = True
+            raise
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            if not self._closed:
+                self._closed = True
+                self._on_close(self._failed)
+
+class BackendPool(httpx.AsyncBaseTransport):
+    """Routes LLM requests to the least busy healthy backend.
+
+    Args:
+        urls (list[str]): Base URLs of the backends (scheme, host and port, e.g. http://gpu1:11434).
+        eject_after_failures (int): Consecutive failures after which a backend is ejected.
+        health_check_interval (float): Seconds between active health checks, 0 disables them.
+        health_check_path (str): Path requested by the health checks, relative to a backend's URL.
+        health_check_timeout (float): Timeout of a health check in seconds.
+    """
+
+    def __init__(self, urls: list[str], eject_after_failures: int = 3, health_check_interval: float = 10.0,
+                 health_check_path: str = "/v1/models", health_check_timeout: float = 2.0) -> None:
+        if not urls:
+            raise ValueError("BackendPool needs at least one backend URL")
+        self.backends = [Backend(url) for url in urls]
+        self.eject_after_failures = max(eject_after_failures, 1)
+        self.health_check_interval = health_check_interval
+        self.health_check_path = health_check_path
+        self.health_check_timeout = health_check_timeout
+        self._transport: httpx.AsyncHTTPTransport | None = None
+        self._health_task: asyncio.Task | None = None
+        self._next = 0
+
+    @property
+    def transport(self) -> httpx.AsyncHTTPTransport:
+        """The connection pool to the backends, recreated after `aclose()`."""
+        if self._transport is None:
+            self._transport = httpx.AsyncHTTPTransport()
+        return self._transport
+
+    def choose(self, exclude: list[Backend]) -> Backend | None:
+        """The healthy backend with the fewest outstanding requests, skipping `exclude`."""
+        candidates = [backend for backend in self.backends if backend not in exclude]
+        if not candidates:
+            return None
+        healthy = [backend for backend in candidates if backend.stats.healthy] or candidates
+        # Start the search at a rotating offset, so ties are spread round-robin
+        offset = self._next % len(healthy)
+        self._next += 1
+        return min(healthy[offset:] + healthy[:offset], key=lambda backend: backend.stats.outstanding)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self._ensure_health_checks()
+        original_url = request.url
+        tried: list[Backend] = []
+        while True:
+            backend = self.choose(tried)
+            tried.append(backend)
+            request.url = backend.route(original_url)
+            request.headers["Host"] = backend.name
+            backend.stats.outstanding += 1
+            backend.stats.requests += 1
+            start = time.perf_counter()
+            try:
+                response = await self.transport.handle_async_request(request)
+            except (httpx.ConnectError, httpx.ConnectTimeout) as e:
+                self._finish(backend, start, "connect_error")
+                self._record_failure(backend, f"{type(e).__name__}: {e}")
+                if len(tried) < len(self.backends):
+                    logger.warning(f"LLM backend {backend.name} is unreachable, retrying on another backend")
+                    continue
+                raise
+            except Exception as e:
+                self._finish(backend, start, "error")
+                self._record_failure(backend, f"{type(e).__name__}: {e}")
+                raise
+            except BaseException:
+                # Cancelled: not the backend's fault
+                self._finish(backend, start, "cancelled")
+                raise
+
+            status_failed = response.status_code >= 500
+            if not status_failed:
+                self._record_success(backend)
+
+            def on_close(read_failed: bool, backend: Backend = backend, start: float = start, status_code: int = response.status_code) -> None:
+                self._finish(backend, start, "error" if read_failed or status_failed else "ok")
+                if status_failed:
+                    self._record_failure(backend, f"HTTP {status_code}")
+                elif read_failed:
+                    self._record_failure(backend, "response body could not be read")
+
+            response.stream = _TrackedStream(response.stream, on_close)
+            return response
+
+    def _finish(self, backend: Backend, start: float, outcome: str) -> None:
+        backend.stats.outstanding -= 1
+        registry.observe(BACKEND_DURATION, time.perf_counter() - start, backend=backend.name, outcome=outcome)
+        registry.inc(BACKEND_REQUESTS, backend=backend.name, outcome=outcome)
+
+    def _record_success(self, backend: Backend) -> None:
+        backend.stats.consecutive_failures = 0
+        if not backend.stats.healthy:
+            backend.stats.healthy = True
+            logger.info(f"LLM backend {backend.name} recovered and rejoined the pool")
+
+    def _record_failure(self, backend: Backend, reason: str) -> None:
+        backend.stats.errors += 1
+        backend.stats.consecutive_failures += 1
+        registry.inc(BACKEND_ERRORS, backend=backend.name)
+        if backend.stats.healthy and backend.stats.consecutive_failures >= self.eject_after_failures:
+            backend.stats.healthy = False
+            backend.stats.ejections += 1
+            logger.warning(f"Ejected LLM backend {backend.name} after {backend.stats.consecutive_failures} consecutive failures ({reason})")
+
+    def _ensure_health_checks(self) -> None:
+        """Starts the health check loop on the running event loop, if it is not running yet."""
+        if self.health_check_interval <= 0 or (self._health_task is not None and not self._health_task.done()):
+            return
+        # A fresh context, so the loop does not inherit the deadline and trace of the query that started it
+        self._health_task = asyncio.get_running_loop().create_task(self._health_check_loop(), context=contextvars.Context())
+
+    async def _health_check_loop(self) -> None:
+        while True:
+            await asyncio.gather(*(self.check_health(backend) for backend in self.backends))
+            await asyncio.sleep(self.health_check_interval)
+
+    async def check_health(self, backend: Backend) -> bool:
+        """Requests the health check path of a backend and updates its state. Returns True if it is healthy."""
+        url = backend.url.copy_with(path=backend.url.path.rstrip("/") + self.health_check_path)
+        request = httpx.Request("GET", url, extensions={"timeout": httpx.Timeout(self.health_check_timeout).as_dict()})
+        try:
+            response = await self.transport.handle_async_request(request)
+            try:
+                await response.aread()
+            finally:
+                await response.aclose()
+            healthy = response.status_code < 400
+            reason = f"health check returned HTTP {response.status_code}"
+        except httpx.HTTPError as e:
+            healthy = False
+            reason = f"health check failed: {type(e).__name__}"
+        if healthy:
+            self._record_success(backend)
+        else:
+            backend.stats.health_checks_failed += 1
+            self._record_failure(backend, reason)
+        return healthy
+
+    def get_stats(self) -> dict:
+        """Returns the state and counters of every backend, by backend name."""
+        return {backend.name: backend.stats.model_dump() for backend in self.backends}
+
+    async def aclose(self) -> None:
+        """Stops the health checks and closes the connections to the backends."""
+        if self._health_task is not None and not self._health_task.done():
+            try:
+                self._health_task.cancel()
+            except RuntimeError:
+                # The loop the task ran on is already closed
+                pass
+        self._health_task = None
+        if self._transport is not None:
+            await self._transport.aclose()
+            self._transport = None
@@ -0,0 +1,227 @@
+"""Protection of the OpenWeatherMap upstream: rate limiting, retries with jitter and a circuit breaker."""
+
+import asyncio
+import logging
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from enum import Enum
+from functools import lru_cache
+from typing import Awaitable, Callable
+import httpx
+from pydantic import BaseModel, Field
+
+from tools.deadline import DeadlineExceeded, remaining_time
+
+logger = logging.getLogger(__name__)
+
+# Responses worth retrying: rate limited or a (probably transient) server error
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the upstream while the circuit breaker is open."""
+
+class ResilienceStats(BaseModel):
+    """Counters of the upstream protection."""
+    requests: int = Field(default=0, description="Upstream requests sent, including retries")
+    retries: int = Field(default=0, description="Requests repeated after a retryable failure")
+    failures: int = Field(default=0, description="Calls that failed after all attempts")
+    rate_limited_waits: int = Field(default=0, description="Requests that had to wait for a rate-limit token")
+    rate_limited_seconds: float = Field(default=0.0, description="Total time spent waiting for rate-limit tokens")
+    short_circuited: int = Field(default=0, description="Calls rejected without a request because the circuit was open")
+    circuit_opened: int = Field(default=0, description="Times the circuit breaker opened")
+    stale_served: int = Field(default=0, description="Answers served from expired cache entries because the upstream failed")
+    deadline_exceeded: int = Field(default=0, description="Calls given up because the query deadline left no time for (another) attempt")
+
+class TokenBucket:
+    """Token-bucket rate limiter shared by all coroutines (and event loops) of the process.
+
+    Holds at most `burst` tokens and refills `rate` tokens per second. `acquire()` waits
+    until a token is available.
+    """
+
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Takes a token and returns how long the caller has to wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            # A negative balance is a queue of reserved tokens, each due 1/rate after the previous one
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    async def acquire(self) -> float:
+        """Waits for a token. Returns the time waited in seconds."""
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+@lru_cache(maxsize=None)
+def shared_rate_limiter(rate: float, burst: int) -> TokenBucket:
+    """The process-wide token bucket for a rate and burst, so all clients draw from the same budget."""
+    return TokenBucket(rate, burst)
+
+class CircuitState(str, Enum):
+    CLOSED = "closed"       # Requests pass
+    OPEN = "open"           # Requests fail fast until the reset timeout has passed
+    HALF_OPEN = "half_open" # One probe request decides whether to close or reopen
+
+class CircuitBreaker:
+    """Opens after `failure_threshold` consecutive failures and fails fast for `reset_timeout` seconds."""
+
+    def __init__(self, failure_threshold: int, reset_timeout: float) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CircuitState.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        """True while calls would be rejected (the reset timeout has not passed yet)."""
+        return self.state == CircuitState.OPEN and time.monotonic() - self._opened_at < self.reset_timeout
+
+    def allow(self) -> bool:
+        """Whether a call may go to the upstream now. After the reset timeout one probe is let through."""
+        with self._lock:
+            if self.state == CircuitState.CLOSED:
+                return True
+            if self.state == CircuitState.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = CircuitState.HALF_OPEN
+            if self.state == CircuitState.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.state != CircuitState.CLOSED:
+                logger.info("OpenWeatherMap circuit breaker closed, upstream recovered")
+            self.state = CircuitState.CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def release_probe(self) -> None:
+        """Lets another probe through if the current one ended without a result (e.g. it was cancelled)."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_failure(self) -> bool:
+        """Counts a failed call. Returns True if this failure opened the circuit."""
+        with self._lock:
+            self._failures += 1
+            self._probe_in_flight = False
+            if self.state == CircuitState.HALF_OPEN or (self.state == CircuitState.CLOSED and self._failures >= self.failure_threshold):
+                self.state = CircuitState.OPEN
+                self._opened_at = time.monotonic()
+                logger.warning(f"OpenWeatherMap circuit breaker opened after {self._failures} consecutive failures, "
+                               f"failing fast for {self.reset_timeout:.0f}s")
+                return True
+            return False
+
+class ResilientCaller:
+    """Sends upstream requests through the rate limiter, with retries and the circuit breaker.
+
+    Args:
+        rate_limiter (TokenBucket | None): Shared limiter, None disables rate limiting.
+        circuit_breaker (CircuitBreaker): Breaker of the upstream.
+        max_attempts (int): Attempts per call, including the first one.
+        base_delay (float): Backoff base in seconds; attempt n waits up to base_delay * 2**n ("full jitter").
+        max_delay (float): Upper bound of a single backoff in seconds.
+    """
+
+    def __init__(self, rate_limiter: TokenBucket | None, circuit_breaker: CircuitBreaker, max_attempts: int, base_delay: float, max_delay: float) -> None:
+        self.rate_limiter = rate_limiter
+        self.circuit_breaker = circuit_breaker
+        self.max_attempts = max(max_attempts, 1)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.stats = ResilienceStats()
+
+    def _backoff(self, attempt: int, response: httpx.Response | None) -> float:
+        """Jittered exponential backoff; a Retry-After header of a 429/503 response is respected."""
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        if retry_after:
+            try:
+                delay = max(delay, float(retry_after))
+            except ValueError:
+                try:
+                    delay = max(delay, parsedate_to_datetime(retry_after).timestamp() - time.time())
+                except (TypeError, ValueError):
+                    pass
+            delay = min(delay, self.max_delay)
+        return delay
+
+    async def call(self, send: Callable[[], Awaitable[httpx.Response]]) -> httpx.Response:
+        """Sends a request built by `send()` and returns the first successful response.
+
+        Raises:
+            CircuitOpenError: If the circuit breaker is open.
+            DeadlineExceeded: If the deadline of the current query leaves no time for a request.
+            httpx.HTTPStatusError: For non-retryable error responses, or if the last attempt failed with one.
+            httpx.TransportError: If the last attempt failed on the transport level (timeout, connection error).
+        """
+        if not self.circuit_breaker.allow():
+            self.stats.short_circuited += 1
+            raise CircuitOpenError("OpenWeatherMap circuit breaker is open")
+
+        for attempt in range(self.max_attempts):
+            remaining = remaining_time()
+            if remaining is not None and remaining <= 0:
+                self.stats.deadline_exceeded += 1
+                self.circuit_breaker.release_probe()
+                raise DeadlineExceeded("Query deadline expired before the OpenWeatherMap request")
+            if self.rate_limiter is not None:
+                waited = await self.rate_limiter.acquire()
+                if waited:
+                    self.stats.rate_limited_waits += 1
+                    self.stats.rate_limited_seconds += waited
+            self.stats.requests += 1
+            response: httpx.Response | None = None
+            try:
+                response = await send()
+                if response.status_code not in RETRYABLE_STATUS_CODES:
+                    # 4xx other than 429 means the request itself is wrong; retrying will not help
+                    response.raise_for_status()
+                    self.circuit_breaker.record_success()
+                    return response
+                error: Exception = httpx.HTTPStatusError(f"Retryable status {response.status_code}", request=response.request, response=response)
+            except httpx.HTTPStatusError:
+                self.circuit_breaker.record_success()
+                raise
+            except httpx.TransportError as e:
+                error = e
+            except BaseException:
+                self.circuit_breaker.release_probe()
+                raise
+
+            if attempt + 1 == self.max_attempts:
+                self.stats.failures += 1
+                if self.circuit_breaker.record_failure():
+                    self.stats.circuit_opened += 1
+                raise error
+            delay = self._backoff(attempt, response)
+            remaining = remaining_time()
+            if remaining is not None and delay >= remaining:
+                # The retry could not finish in time, fail now instead of after the backoff
+                self.stats.deadline_exceeded += 1
+                self.stats.failures += 1
+                if self.circuit_breaker.record_failure():
+                    self.stats.circuit_opened += 1
+                raise error
+            self.stats.retries += 1
+            logger.debug(f"Retrying OpenWeatherMap request in {delay:.2f}s after: {error}")
+            await asyncio.sleep(delay)
+        raise AssertionError("unreachable")
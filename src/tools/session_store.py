@@ -0,0 +1,101 @@
+"""Per-conversation store of fetched forecast data, used to answer narrower ranges from wider ones."""
+
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator
+from pydantic import BaseModel, Field
+
+from tools.context import bind
+from tools.forecast_snapshot import ForecastSnapshot
+
+class SessionStoreStats(BaseModel):
+    """Counters of forecast data reused within conversations."""
+    lookups: int = Field(default=0, description="Forecast lookups made inside a session")
+    fetches_avoided: int = Field(default=0, description="Lookups answered from data already fetched in the session")
+    reused_by_source: Dict[str, int] = Field(default_factory=dict, description="Avoided fetches per '<requested range> from <fetched range>'")
+
+    @property
+    def reuse_rate(self) -> float:
+        return self.fetches_avoided / self.lookups if self.lookups else 0.0
+
+    def record_reuse(self, requested_range: str, source_range: str) -> None:
+        self.fetches_avoided += 1
+        source = f"{requested_range} from {source_range}"
+        self.reused_by_source[source] = self.reused_by_source.get(source, 0) + 1
+
+class SessionStore:
+    """Forecast snapshots fetched during one conversation.
+
+    Keys are (lat, lon, part) as built by `ForecastCache.key`. The part ("current", "hourly" or
+    "daily") is what was fetched, not the range that was asked for, so a daily forecast fetched
+    for "daily" can later answer "tomorrow".
+    """
+
+    def __init__(self, max_ages: dict[str, float]) -> None:
+        """
+        Args:
+            max_ages (dict[str, float]): Seconds data of each part may be reused within the session.
+        """
+        self.max_ages = max_ages
+        # key -> (snapshot, fetched range, stored_at)
+        self._entries: dict[tuple[float, float, str], tuple[ForecastSnapshot, str, float]] = {}
+        self.last_used = time.monotonic()
+
+    def get(self, key: tuple[float, float, str]) -> tuple[ForecastSnapshot, str] | None:
+        """Returns the snapshot and the range it was fetched for, or None if there is none or it is too old."""
+        self.last_used = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        snapshot, source_range, stored_at = entry
+        if self.last_used - stored_at > self.max_ages.get(key[2], 0.0):
+            del self._entries[key]
+            return None
+        return snapshot, source_range
+
+    def put(self, key: tuple[float, float, str], snapshot: ForecastSnapshot, source_range: str) -> None:
+        self._entries[key] = (snapshot, source_range, time.monotonic())
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+class SessionRegistry:
+    """Bounded LRU of session stores by session id. Idle sessions are dropped after `idle_timeout` seconds."""
+
+    def __init__(self, max_sessions: int, idle_timeout: float, max_ages: dict[str, float]) -> None:
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.max_ages = max_ages
+        self._sessions: OrderedDict[str, SessionStore] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str) -> SessionStore:
+        """Returns the store of a session, creating it if needed."""
+        now = time.monotonic()
+        with self._lock:
+            store = self._sessions.get(session_id)
+            if store is None or now - store.last_used > self.idle_timeout:
+                store = SessionStore(self.max_ages)
+                self._sessions[session_id] = store
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+            return store
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+_current_session: ContextVar[SessionStore | None] = ContextVar("weathercaster_session", default=None)
+
+def current_session() -> SessionStore | None:
+    """The session store of the conversation the current task belongs to, if any."""
+    return _current_session.get()
+
+@contextmanager
+def use_session(store: SessionStore | None) -> Iterator[SessionStore | None]:
+    """Makes `store` the current session for the enclosed code and the tasks it starts."""
+    with bind(_current_session, store):
+        yield store
@@ -0,0 +1,75 @@
+"""Request coalescing: concurrent calls with the same key share one in-flight upstream call."""
+
+import asyncio
+import contextvars
+from typing import Awaitable, Callable, Hashable, TypeVar
+from pydantic import BaseModel, Field
+
+from tools.deadline import DeadlineExceeded, remaining_time
+
+T = TypeVar("T")
+
+class SingleFlightStats(BaseModel):
+    """Counters of a SingleFlight group."""
+    calls: int = Field(default=0, description="Total number of calls")
+    executions: int = Field(default=0, description="Calls that actually ran the upstream function")
+    coalesced: int = Field(default=0, description="Calls that joined an already in-flight execution")
+
+class SingleFlight:
+    """Deduplicates concurrent executions of the same keyed coroutine.
+
+    The first caller for a key starts the coroutine as a task; callers arriving while it is
+    in flight await the same task and receive its result (or exception). The task is shielded,
+    so cancelling one caller does not cancel the shared upstream call for the others.
+
+    The task runs in a fresh context, so it is not bound by the deadline (or session and
+    trace) of the caller that happened to start it. Each caller instead waits for the shared
+    result only as long as its own deadline allows.
+    """
+
+    def __init__(self) -> None:
+        self.stats = SingleFlightStats()
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """Runs `fn()` unless a call with the same key is already in flight, then awaits its result.
+
+        Args:
+            key (Hashable): Identifies identical upstream calls.
+            fn (Callable[[], Awaitable[T]]): Factory for the coroutine to run.
+
+        Returns:
+            T: The result of the (shared) execution.
+
+        Raises:
+            DeadlineExceeded: If the caller's deadline expires before the result is available.
+        """
+        self.stats.calls += 1
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.get_running_loop().create_task(fn(), context=contextvars.Context())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done, key=key: self._forget(key, done))
+            self.stats.executions += 1
+        else:
+            self.stats.coalesced += 1
+        remaining = remaining_time()
+        if remaining is None:
+            return await asyncio.shield(task)
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), remaining)
+        except TimeoutError:
+            if task.done():
+                raise
+            raise DeadlineExceeded(f"Query deadline expired while waiting for {key}") from None
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # Mark the exception as retrieved in case every caller was cancelled
+            task.exception()
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._inflight)
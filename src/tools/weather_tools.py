@@ -1,12 +1,30 @@
+import asyncio
+import contextvars
 import logging
-from datetime import datetime, timezone
-from typing import List
+import sys
+import time
+from typing import Dict, List
+from urllib.parse import urlsplit, urlunsplit
 import httpx
 from enum import Enum
+from pydantic import BaseModel, Field, field_validator
 from configs.config import env
+from tools.deadline import DeadlineExceeded, remaining_time
+from tools.forecast_cache import CacheState, ForecastCache
+from tools.forecast_series import UNKNOWN_WEATHER_EMOJI, WEATHER_ICON_EMOJIS
+from tools.forecast_snapshot import ForecastSnapshot
+from tools.gazetteer import DEFAULT_GAZETTEER_PATH, Gazetteer
+from tools.geocoding_cache import GeocodingCache
+from tools.resilience import CircuitBreaker, CircuitOpenError, ResilientCaller, shared_rate_limiter
+from tools.session_store import SessionRegistry, SessionStore, SessionStoreStats, current_session, use_session
+from tools.single_flight import SingleFlight
+from observability.metrics import stage_span, tag_query
 
-from model_definition.final_response import CurrentWeather, DailyWeather, HourlyWeather, WeatherForecast, WindInfo, DaylightInfo
-from model_definition.response_types import Coordinates, GeocodingResult, WeatherData, HourlyForecastData, DailyForecastData
+from model_definition.final_response import BatchForecastResult, WeatherForecast
+from model_definition.response_types import (
+    Coordinates, GeocodingItem, GeocodingResult, WeatherData, HourlyForecastData, DailyForecastData,
+    SlimWeatherData, SlimHourlyForecastData, SlimDailyForecastData, OneCallData, parse_response
+)
 
 logger = logging.getLogger(__name__)
 
@@ -16,6 +34,7 @@ class ForecastType(str, Enum):
     HOURLY = "https://pro.openweathermap.org/data/2.5/forecast/hourly" # Hourly forecast for 4 days (max. 96 timestamps)
     DAILY = "https://api.openweathermap.org/data/2.5/forecast/daily" # Daily Forecast 16 Days
     TOMORROW = "https://api.openweathermap.org/data/2.5/forecast/daily" # For "tomorrow" queries, data is fetched using the daily forecast
+    ONECALL = "https://api.openweathermap.org/data/3.0/onecall" # Current, hourly (48 hours) and daily (8 days) in one response, FORECAST_BACKEND="onecall"
 
 class ForecastRange(str, Enum):
     """Lists all available forecast types and their corresponding API endpoint URLs."""
@@ -24,6 +43,31 @@ class ForecastRange(str, Enum):
     DAILY = "daily"
     TOMORROW = "tomorrow"
 
+# Part of a ForecastSnapshot each range is answered from
+_SNAPSHOT_PARTS = {
+    ForecastRange.CURRENT: "current",
+    ForecastRange.HOURLY: "hourly",
+    ForecastRange.DAILY: "daily",
+    ForecastRange.TOMORROW: "daily",
+}
+
+class ForecastRequest(BaseModel):
+    """A single location/range pair of a batch forecast request."""
+    location_name: str = Field(..., description="The name of the location (e.g., \"London\", \"Paris, FR\").")
+    forecast_range: ForecastRange = Field(..., description="The timerange selected by the user for this location.")
+    start_offset: int | None = Field(None, description="Optional start of the period: hours from now for \"hourly\", days from today for \"daily\".")
+    span: int | None = Field(None, ge=1, description="Optional length of the period: hours for \"hourly\", days for \"daily\".")
+
+    @field_validator("forecast_range", mode="before")
+    @classmethod
+    def _lowercase_forecast_range(cls, value: object) -> object:
+        """Accepts "CURRENT" as well as "current", as the system prompt uses upper case."""
+        return value.lower() if isinstance(value, str) else value
+
+class ForecastQuery(BaseModel):
+    """Tool arguments extracted from a user query in direct-render mode."""
+    requests: List[ForecastRequest] = Field(..., description="One entry per location named in the query.")
+
 def get_weather_emoji(icon_id: str) -> str:
     """Maps an OpenWeatherMap icon ID to an appropriate emoji.
     
@@ -35,35 +79,150 @@ def get_weather_emoji(icon_id: str) -> str:
         str: The corresponding emoji for the given icon ID.       
     """
     
-    icon_map = {
-        # Day icons
-        "01d": "☀️",  # clear sky
-        "02d": "🌤️",  # few clouds
-        "03d": "☁️",  # scattered clouds
-        "04d": "🌥️",  # broken clouds / overcast clouds
-        "09d": "🌦️",  # shower rain
-        "10d": "🌧️",  # rain
-        "11d": "⛈️",  # thunderstorm
-        "13d": "❄️",  # snow
-        "50d": "🌫️",  # mist
-        # Night icons
-        "01n": "🌙",  # clear sky
-        "02n": "☁️",  # few clouds
-        "03n": "☁️",  # scattered clouds
-        "04n": "🌥️",  # broken clouds / overcast clouds
-        "09n": "🌦️",  # shower rain
-        "10n": "🌧️",  # rain
-        "11n": "⛈️",  # thunderstorm
-        "13n": "❄️",  # snow
-        "50n": "🌫️",  # mist
-    }
-    return icon_map.get(icon_id, "❓") # Default emoji if icon_id is unknown
+    return WEATHER_ICON_EMOJIS.get(icon_id, UNKNOWN_WEATHER_EMOJI) # Default emoji if icon_id is unknown
 
 class WeatherAPIClient:
     def __init__(self) -> None:
         self.api_key = env.WEATHER_API_KEY
         self.geocoding_url = "http://api.openweathermap.org/geo/1.0/direct"
         self.max_hourly_forecast_items = env.MAX_HOURLY_FORECAST_ITEMS
+        self.batch_max_concurrency = env.BATCH_MAX_CONCURRENCY
+        self.base_url_override = env.OWM_BASE_URL
+        self.forecast_backend = env.FORECAST_BACKEND
+        # Response models per range. Trusted parsing validates only the fields used by the transform.
+        if env.OWM_TRUSTED_PARSING:
+            self.payload_models = {ForecastRange.CURRENT: SlimWeatherData, ForecastRange.HOURLY: SlimHourlyForecastData, ForecastRange.DAILY: SlimDailyForecastData}
+        else:
+            self.payload_models = {ForecastRange.CURRENT: WeatherData, ForecastRange.HOURLY: HourlyForecastData, ForecastRange.DAILY: DailyForecastData}
+        self._http_client: httpx.AsyncClient | None = None
+        self.gazetteer = Gazetteer(env.GAZETTEER_PATH or DEFAULT_GAZETTEER_PATH) if env.GAZETTEER_ENABLED else None
+        self.geocoding_cache = GeocodingCache(
+            max_entries=env.GEOCODING_CACHE_SIZE,
+            db_path=env.GEOCODING_CACHE_PATH,
+            negative_ttl=env.GEOCODING_NEGATIVE_TTL
+        )
+        self.forecast_cache = ForecastCache(
+            ttls={
+                ForecastRange.CURRENT.value: env.FORECAST_CACHE_TTL_CURRENT,
+                ForecastRange.HOURLY.value: env.FORECAST_CACHE_TTL_HOURLY,
+                ForecastRange.DAILY.value: env.FORECAST_CACHE_TTL_DAILY,
+                ForecastRange.TOMORROW.value: env.FORECAST_CACHE_TTL_DAILY
+            },
+            max_stale=env.FORECAST_CACHE_MAX_STALE,
+            max_entries=env.FORECAST_CACHE_SIZE,
+            precision=env.FORECAST_CACHE_COORD_PRECISION
+        )
+        self.single_flight = SingleFlight()
+        self._refreshing: set[tuple] = set()
+        self._background_tasks: set[asyncio.Task] = set()
+        self.sessions: SessionRegistry | None = None
+        if env.SESSION_STORE_ENABLED:
+            self.sessions = SessionRegistry(
+                max_sessions=env.SESSION_MAX_SESSIONS,
+                idle_timeout=env.SESSION_IDLE_TIMEOUT,
+                max_ages={"current": env.FORECAST_CACHE_TTL_CURRENT, "hourly": env.SESSION_MAX_AGE, "daily": env.SESSION_MAX_AGE}
+            )
+        self.session_stats = SessionStoreStats()
+        # The rate limiter is shared by all clients of the process, the OWM quota is per API key
+        self.resilience = ResilientCaller(
+            rate_limiter=shared_rate_limiter(env.OWM_RATE_LIMIT_PER_SECOND, env.OWM_RATE_LIMIT_BURST) if env.OWM_RATE_LIMIT_PER_SECOND > 0 else None,
+            circuit_breaker=CircuitBreaker(env.OWM_CIRCUIT_FAILURE_THRESHOLD, env.OWM_CIRCUIT_RESET_TIMEOUT),
+            max_attempts=env.OWM_RETRY_ATTEMPTS,
+            base_delay=env.OWM_RETRY_BASE_DELAY,
+            max_delay=env.OWM_RETRY_MAX_DELAY
+        )
+
+    def _build_http_client(self) -> httpx.AsyncClient:
+        """Creates the pooled HTTP client shared by all OpenWeatherMap requests."""
+        limits = httpx.Limits(
+            max_connections=env.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=env.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=env.HTTP_KEEPALIVE_EXPIRY
+        )
+        timeout = httpx.Timeout(env.HTTP_READ_TIMEOUT, connect=env.HTTP_CONNECT_TIMEOUT)
+        try:
+            return httpx.AsyncClient(limits=limits, timeout=timeout, http2=env.HTTP2_ENABLED)
+        except ImportError:
+            logger.warning("HTTP2_ENABLED is set but the 'h2' package is not installed. Falling back to HTTP/1.1.")
+            return httpx.AsyncClient(limits=limits, timeout=timeout)
+
+    @property
+    def http_client(self) -> httpx.AsyncClient:
+        """The long-lived HTTP client. Created on first use if `start()` was not called."""
+        if self._http_client is None or self._http_client.is_closed:
+            self._http_client = self._build_http_client()
+        return self._http_client
+
+    async def start(self) -> None:
+        """Opens the HTTP connection pool and loads the gazetteer in the background."""
+        _ = self.http_client
+        logger.info("WeatherAPIClient HTTP pool started.")
+        if self.gazetteer is not None:
+            # Indexing a few thousand cities takes a noticeable moment, so it runs off the event loop before the first query
+            task = asyncio.get_running_loop().create_task(asyncio.to_thread(self.gazetteer.load))
+            self._background_tasks.add(task)
+            task.add_done_callback(self._background_tasks.discard)
+
+    async def aclose(self) -> None:
+        """Closes the HTTP connection pool and all keep-alive connections."""
+        for task in list(self._background_tasks):
+            task.cancel()
+        if self._background_tasks:
+            await asyncio.gather(*self._background_tasks, return_exceptions=True)
+        if self._http_client is not None and not self._http_client.is_closed:
+            await self._http_client.aclose()
+            logger.info("WeatherAPIClient HTTP pool closed.")
+        self._http_client = None
+        self.geocoding_cache.close()
+        if self.gazetteer is not None:
+            self.gazetteer.close()
+
+    def get_stats(self) -> dict[str, dict[str, int]]:
+        """Returns the counters of the caches and the request-coalescing layer."""
+        return {
+            "geocoding_cache": self.geocoding_cache.stats.model_dump(),
+            "forecast_cache": self.forecast_cache.stats.model_dump(),
+            "single_flight": self.single_flight.stats.model_dump(),
+            "session_store": self.session_stats.model_dump(),
+            "resilience": self.resilience.stats.model_dump()
+        }
+
+    def session(self, session_id: str | None):
+        """Context manager that scopes the forecast lookups of the enclosed code to a conversation.
+
+        Within a session, data fetched earlier in the same conversation answers narrower
+        ranges ("tomorrow" from "daily", near-term hours from "hourly") without a new fetch.
+
+        Args:
+            session_id (str | None): Identifies the conversation. None disables the reuse.
+        """
+        store = self.sessions.get(session_id) if self.sessions is not None and session_id else None
+        return use_session(store)
+
+    def _url(self, url: str) -> str:
+        """Applies OWM_BASE_URL (if configured) to an OpenWeatherMap URL."""
+        if not self.base_url_override:
+            return url
+        override = urlsplit(self.base_url_override)
+        return urlunsplit(urlsplit(url)._replace(scheme=override.scheme, netloc=override.netloc))
+
+    async def _request(self, url: str, params: dict) -> httpx.Response:
+        """Sends a GET request to OpenWeatherMap through the rate limiter, retries and the circuit breaker.
+
+        Raises:
+            CircuitOpenError: If the upstream is considered down and the request was not sent.
+            httpx.HTTPStatusError: If the response is an error after all retries.
+            httpx.TransportError: If the request failed on the transport level after all retries.
+            DeadlineExceeded: If the query deadline left no time for the request.
+        """
+        return await self.resilience.call(lambda: self.http_client.get(self._url(url), params=params, timeout=self._request_timeout()))
+
+    def _request_timeout(self) -> httpx.Timeout:
+        """Per-request timeout: the pool's timeouts, shortened to the time left before the query deadline."""
+        remaining = remaining_time()
+        if remaining is None:
+            return httpx.Timeout(env.HTTP_READ_TIMEOUT, connect=env.HTTP_CONNECT_TIMEOUT)
+        return httpx.Timeout(min(env.HTTP_READ_TIMEOUT, remaining), connect=min(env.HTTP_CONNECT_TIMEOUT, remaining))
 
     async def _get_coordinates(self, location_name: str) -> GeocodingResult | None:
         """Gets coordinates (latitude and longitude), name, and country for a given location.
@@ -79,26 +238,52 @@ class WeatherAPIClient:
                                     'name', and 'country' if the location is found.
                                     Returns None if the location cannot be found or an error occurs.
         """
+        if self.gazetteer is not None:
+            georesult = self.gazetteer.lookup(location_name)
+            if georesult is not None:
+                logger.debug(f"Gazetteer hit for {location_name}: {georesult}")
+                return georesult
+
+        found, cached_result = self.geocoding_cache.get(location_name)
+        if found:
+            logger.debug(f"Geocoding cache hit for {location_name}: {cached_result}")
+            return cached_result
+
+        try:
+            return await self.single_flight.do(
+                ("geocode", GeocodingCache.normalize(location_name)),
+                lambda: self._fetch_coordinates(location_name)
+            )
+        except DeadlineExceeded as e:
+            logger.warning(f"Geocoding skipped for {location_name}: {e}")
+            return None
+
+    async def _fetch_coordinates(self, location_name: str) -> GeocodingResult | None:
+        """Resolves a location with the OWM geocoding API and stores the result in the geocoding cache."""
         params = {
             'q': location_name,
             'limit': 1, # Get the most relevant location
             'appid': self.api_key
         }
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(self.geocoding_url, params=params)
-                response.raise_for_status()
-                data = response.json()
-
-                if data and isinstance(data, list) and len(data) > 0:
-                    location_data = data[0]
-                    return GeocodingResult(coordinates=Coordinates(lat=location_data.get('lat'), lon=location_data.get('lon')),
-                                           name=location_data.get('name'),
-                                           country=location_data.get('country')
-                    )
-                else:
-                    logger.warning(f"Geocoding: No coordinates found for {location_name}")
-                    return None
+            response = await self._request(self.geocoding_url, params)
+            data = parse_response(List[GeocodingItem], response.content)
+
+            if data:
+                location_data = data[0]
+                georesult = GeocodingResult(coordinates=Coordinates(lat=location_data.lat, lon=location_data.lon),
+                                            name=location_data.name,
+                                            country=location_data.country
+                )
+                self.geocoding_cache.set(location_name, georesult)
+                return georesult
+            else:
+                logger.warning(f"Geocoding: No coordinates found for {location_name}")
+                self.geocoding_cache.set(location_name, None)
+                return None
+        except (CircuitOpenError, DeadlineExceeded) as e:
+            logger.warning(f"Geocoding skipped for {location_name}: {e}")
+            return None
         except httpx.RequestError as e:
             logger.error(f"Geocoding request error for {location_name}: {e}", exc_info=True)
             return None
@@ -108,85 +293,33 @@ class WeatherAPIClient:
 
     def _transform_api_data_to_weather_forecast(self,
                                                 location_name: str,
-                                                current_weather_api_model: WeatherData | None,
-                                                hourly_forecast_api_model: HourlyForecastData | None,
-                                                daily_forecast_api_model: DailyForecastData | None
+                                                snapshot: ForecastSnapshot | None,
+                                                window: tuple[int, int] | None = None
                                                 ) -> WeatherForecast | None:
-        """Transforms raw API data into a WeatherForecast object.
-        
-        Args: 
+        """Transforms cached forecast data into the WeatherForecast object returned by the tool.
+
+        This is where the Pydantic output models are built; the cache only holds the compact snapshot.
+
+        Args:
             location_name (str): The name of the location (e.g., "London", "Paris, FR").
-            currently_weather_api_model (WeatherData): Current weather data from the API.
-            hourly_forecast_api_model (HourlyForecastData): Hourly forecast data from the API.
-            daily_forecast_api_model (DailyForecastData): Daily forecast data from the API.
+            snapshot (ForecastSnapshot | None): Current weather, hourly or daily data of the location.
+            window (tuple[int, int] | None): Only hourly/daily items with start <= dt < end (unix, UTC) are kept.
 
         Returns:
             WeatherForecast | None
         """
-        current_weather: CurrentWeather | None = None
-        hourly_forecast_list: List[HourlyWeather] = []
-        daily_forecast_list: List[DailyWeather] = []
-
-        if current_weather_api_model:
-            weather_item = current_weather_api_model.weather[0]
-            condition_str = weather_item.description.capitalize()
-            current_weather = CurrentWeather(
-                location=current_weather_api_model.name,
-                date_time=datetime.fromtimestamp(current_weather_api_model.dt, tz=timezone.utc),
-                condition=condition_str,
-                emoji=get_weather_emoji(weather_item.icon),
-                temperature=current_weather_api_model.main.temp,
-                feels_like_temperature=current_weather_api_model.main.feels_like,
-                high_temperature=current_weather_api_model.main.temp_max,
-                low_temperature=current_weather_api_model.main.temp_min,
-                wind=WindInfo(
-                    speed=current_weather_api_model.wind.speed,
-                    direction=current_weather_api_model.wind.deg
-                ),
-                humidity=current_weather_api_model.main.humidity,
-                pressure=current_weather_api_model.main.pressure,
-                daylight=DaylightInfo(
-                    sunrise=datetime.fromtimestamp(current_weather_api_model.sys.sunrise, tz=timezone.utc),
-                    sunset=datetime.fromtimestamp(current_weather_api_model.sys.sunset, tz=timezone.utc)
-                )
-            )
-
-        if hourly_forecast_api_model and hourly_forecast_api_model.list:
-            # Limit to the configured max_hourly_forecast_items (e.g., 10 for next 10 hours)
-            for item in hourly_forecast_api_model.list[:self.max_hourly_forecast_items]:
-                weather_item = item.weather[0]
-                condition_str = weather_item.description.capitalize()
-                hourly_forecast_list.append(HourlyWeather(
-                    time=datetime.fromtimestamp(item.dt, tz=timezone.utc),
-                    temperature=item.main.temp,
-                    condition=condition_str,
-                    emoji=get_weather_emoji(weather_item.icon),
-                    wind=WindInfo(speed=item.wind.speed, direction=item.wind.deg),
-                    humidity=item.main.humidity,
-                    pressure=item.main.pressure
-                ))
-
-        if daily_forecast_api_model and daily_forecast_api_model.list:
-            for item in daily_forecast_api_model.list:
-                sunrise_time = datetime.fromtimestamp(item.sunrise, tz=timezone.utc) if item.sunrise else (current_weather.daylight.sunrise if current_weather and current_weather.daylight else None)
-                sunset_time = datetime.fromtimestamp(item.sunset, tz=timezone.utc) if item.sunset else (current_weather.daylight.sunset if current_weather and current_weather.daylight else None)
-                weather_item = item.weather[0]
-                condition_str = weather_item.description.capitalize()
-                daily_forecast_list.append(DailyWeather(
-                    forecast_date=datetime.fromtimestamp(item.dt, tz=timezone.utc).date(),
-                    max_temperature=item.temp.max, min_temperature=item.temp.min,
-                    condition=condition_str, emoji=get_weather_emoji(weather_item.icon),
-                    wind=WindInfo(speed=item.speed if item.speed else 0.0, direction=item.deg if item.deg else 0),
-                    humidity=item.humidity, daylight=DaylightInfo(sunrise=sunrise_time, sunset=sunset_time)
-                ))
-
-        if current_weather or hourly_forecast_list or daily_forecast_list:
-            return WeatherForecast(current=current_weather, hourly=hourly_forecast_list, daily=daily_forecast_list)
-        else:
+        with stage_span("transform"):
+            forecast = snapshot.to_weather_forecast(window, self.max_hourly_forecast_items) if snapshot else None
+        if forecast is None:
             logger.warning(f"Failed to retrieve sufficient weather data for {location_name} to transform.")
-            return None
+        return forecast
 
-    async def get_weather_forecast(self, location_name: str, forecast_range: ForecastRange) -> WeatherForecast | None:
+    async def get_weather_forecast(self,
+                                   location_name: str,
+                                   forecast_range: ForecastRange,
+                                   start_offset: int | None = None,
+                                   span: int | None = None
+                                   ) -> WeatherForecast | None:
         """
         Gets comprehensive weather forecast data (current, hourly, daily) for a given location.
 
@@ -195,81 +328,308 @@ class WeatherAPIClient:
 
         Args:
             location_name (str): The name of the location (e.g., "London", "Paris, FR").
-            forecast_range (str): The timerange selected by the user. Available options are "current", "hourly", and "daily".
+            forecast_range (str): The timerange selected by the user. Available options are "current", "hourly", "daily" and "tomorrow".
+            start_offset (int | None): Optional start of the period asked about, relative to now: hours for "hourly",
+                                       days for "daily" (0 = today, 1 = tomorrow). Ignored for "current" and "tomorrow".
+            span (int | None): Optional length of the period asked about: hours for "hourly", days for "daily"
+                               (e.g. "next 3 days" -> start_offset=0, span=3). Must be at least 1, None means open-ended.
 
         Returns:
             Optional[WeatherForecast]: A simplified Pydantic model containing current,
                                      hourly, and daily weather data. Returns None if
                                      data cannot be retrieved or an error occurs.
         """
-        georesult = await self._get_coordinates(location_name)
+        if span is not None and span < 1:
+            raise ValueError(f"span must be at least 1, got {span}")
+        with stage_span("geocode"):
+            georesult = await self._get_coordinates(location_name)
         if not georesult or not georesult.coordinates:
             logger.warning(f"Could not get valid coordinates for {location_name}. Cannot fetch weather.")
             return None
 
         lat, lon = georesult.coordinates.lat, georesult.coordinates.lon
-
-        current_weather_api_model: WeatherData | None = None
-        hourly_forecast_api_model: HourlyForecastData | None = None
-        daily_forecast_api_model: DailyForecastData | None = None
-
-        async with httpx.AsyncClient() as client:
-            # 1. Fetch Current Weather
-            current_params = {
-                "lat": lat,
-                "lon": lon,
-                "appid": self.api_key,
-                "units": "metric"
-            }
-            if forecast_range.lower() == ForecastRange.CURRENT:
-                try:
-                    current_response = await client.get(ForecastType.CURRENT.value, params=current_params)
-                    current_response.raise_for_status()
-                    current_weather_api_model = WeatherData(**current_response.json())
-                except httpx.RequestError as e:
-                    logger.error(f"Error fetching current weather for {location_name}: {e}", exc_info=True)
-                except Exception as e:
-                    logger.error(f"Error parsing current weather data for {location_name}: {e}", exc_info=True)
-
-            # 2. Fetch Hourly Forecast
-            hourly_params = {
-                "lat": lat,
-                "lon": lon,
-                "appid": self.api_key,
-                "units": "metric"
-            }
-            if forecast_range.lower() == ForecastRange.HOURLY:
-                try:
-                    hourly_response = await client.get(ForecastType.HOURLY.value, params=hourly_params)
-                    hourly_response.raise_for_status()
-                    hourly_forecast_api_model = HourlyForecastData(**hourly_response.json())
-                except httpx.RequestError as e:
-                    logger.error(f"Error fetching hourly forecast for {location_name}: {e}", exc_info=True)
-                except Exception as e:
-                    logger.error(f"Error parsing hourly forecast data for {location_name}: {e}", exc_info=True)
-
-            # 3. Fetch Daily Forecast
-            daily_params = {
-                "lat": lat,
-                "lon": lon,
-                "appid": self.api_key,
-                "units": "metric",
-                "cnt": 16
-            }
-            if forecast_range.lower() == ForecastRange.DAILY or forecast_range == ForecastRange.TOMORROW:
-                try:
-                    daily_response = await client.get(ForecastType.DAILY.value, params=daily_params)
-                    daily_response.raise_for_status()
-                    daily_forecast_api_model = DailyForecastData(**daily_response.json())
-                except httpx.RequestError as e:
-                    logger.error(f"Error fetching daily forecast for {location_name}: {e}", exc_info=True)
-                except Exception as e:
-                    logger.error(f"Error parsing daily forecast data for {location_name}: {e}", exc_info=True)
+        forecast_range = ForecastRange(forecast_range.lower())
+        tag_query("forecast_range", forecast_range.value)
+        session = current_session()
+        snapshot = self._reuse_from_session(session, lat, lon, forecast_range, start_offset, span) if session is not None else None
+        if snapshot is not None:
+            # Rows of an earlier turn may already have passed, so reused data always starts now
+            start_offset = start_offset or 0
+        else:
+            # The cache is keyed by coordinates, so cached data carries the geocoded name, never the user's spelling
+            place_name = georesult.name or f"{lat:.4f}, {lon:.4f}"
+            snapshot = await self._get_forecast_payload(place_name, lat, lon, forecast_range)
+            if session is not None and snapshot is not None:
+                session.put(self.forecast_cache.key(lat, lon, _SNAPSHOT_PARTS[forecast_range]), snapshot, forecast_range.value)
 
         # Transform the API data
         return self._transform_api_data_to_weather_forecast(
             location_name=location_name,
-            current_weather_api_model=current_weather_api_model,
-            hourly_forecast_api_model=hourly_forecast_api_model,
-            daily_forecast_api_model=daily_forecast_api_model
-        )
\ No newline at end of file
+            snapshot=snapshot,
+            window=self._time_window(forecast_range, start_offset, span, snapshot)
+        )
+
+    async def get_utc_offset(self, location_name: str, forecast_range: ForecastRange) -> int | None:
+        """Seconds the local time of a location is ahead of UTC, as reported with its forecast.
+
+        Daily windows are aligned to local midnight with this offset, so periods such as
+        "tonight" or "this weekend" computed from it agree with them. The forecast is taken
+        from the cache, or fetched and cached for the `get_weather_forecast` call that follows.
+
+        Returns:
+            int | None: The offset, or None if the location or its forecast is unavailable.
+        """
+        georesult = await self._get_coordinates(location_name)
+        if not georesult or not georesult.coordinates:
+            return None
+        lat, lon = georesult.coordinates.lat, georesult.coordinates.lon
+        snapshot = await self._get_forecast_payload(georesult.name or f"{lat:.4f}, {lon:.4f}", lat, lon, ForecastRange(forecast_range))
+        return snapshot.utc_offset if snapshot is not None else None
+
+    def _reuse_from_session(self,
+                            session: SessionStore,
+                            lat: float,
+                            lon: float,
+                            forecast_range: ForecastRange,
+                            start_offset: int | None,
+                            span: int | None
+                            ) -> ForecastSnapshot | None:
+        """Answers a range from data fetched earlier in the session.
+
+        "tomorrow" and "daily" are both answered from a daily forecast fetched for either of them.
+        Hourly and daily data is only reused while it still has the hours/days asked for.
+
+        Returns:
+            ForecastSnapshot | None: The reusable snapshot, or None if the data has to be fetched.
+        """
+        self.session_stats.lookups += 1
+        found = session.get(self.forecast_cache.key(lat, lon, _SNAPSHOT_PARTS[forecast_range]))
+        if found is None:
+            return None
+        snapshot, source_range = found
+        window = self._time_window(forecast_range, start_offset or 0, span, snapshot)
+        if forecast_range == ForecastRange.HOURLY:
+            needed = min(span if span is not None else self.max_hourly_forecast_items, self.max_hourly_forecast_items)
+            available = len(snapshot.hourly.window(*window)) if snapshot.hourly else 0
+        elif forecast_range != ForecastRange.CURRENT:
+            needed = 1 if forecast_range == ForecastRange.TOMORROW or span is None else span
+            available = len(snapshot.daily.window(*window)) if snapshot.daily else 0
+        else:
+            needed = available = 1
+        if available < needed:
+            return None
+        self.session_stats.record_reuse(forecast_range.value, source_range)
+        logger.debug(f"Answered {forecast_range.value} from the {source_range} forecast fetched earlier in the session")
+        return snapshot
+
+    @staticmethod
+    def _time_window(forecast_range: ForecastRange,
+                     start_offset: int | None,
+                     span: int | None,
+                     snapshot: ForecastSnapshot | None
+                     ) -> tuple[int, int] | None:
+        """Converts a relative period into a (start, end) unix timestamp window.
+
+        Hourly windows start at the current full hour. Daily windows are aligned to local
+        midnight of the forecast location, so "tomorrow" is tomorrow where the city is.
+
+        Returns:
+            tuple[int, int] | None: The window, or None if all cached rows should be used. A `span` of
+                                    None leaves the window open-ended.
+        """
+        if forecast_range == ForecastRange.TOMORROW:
+            start_offset, span = 1, 1
+        if forecast_range == ForecastRange.CURRENT or (start_offset is None and span is None):
+            return None
+
+        now = int(time.time())
+        start_offset = max(start_offset or 0, 0)
+        if forecast_range == ForecastRange.HOURLY:
+            unit = 3600
+            start = (now // unit + start_offset) * unit
+        else:
+            unit = 86400
+            utc_offset = snapshot.utc_offset if snapshot is not None else 0
+            local_midnight = (now + utc_offset) // unit * unit - utc_offset
+            start = local_midnight + start_offset * unit
+        end = start + span * unit if span is not None else sys.maxsize
+        return start, end
+
+    async def _get_forecast_payload(self, location_name: str, lat: float, lon: float, forecast_range: ForecastRange) -> ForecastSnapshot | None:
+        """Returns the forecast data for a forecast range from the cache, fetching it on a miss.
+
+        Stale entries are served immediately while a background task refreshes them. While
+        the upstream is down (circuit open or the fetch failed), an expired entry is served
+        instead of no answer.
+        """
+        key = self.forecast_cache.key(lat, lon, forecast_range.value)
+        state, snapshot = self.forecast_cache.get(key)
+        if state == CacheState.FRESH:
+            return snapshot
+        if state == CacheState.STALE:
+            self._schedule_refresh(key, location_name, lat, lon, forecast_range)
+            return snapshot
+
+        if not self.resilience.circuit_breaker.is_open:
+            snapshot = await self._fetch_and_cache(key, location_name, lat, lon, forecast_range)
+            if snapshot is not None:
+                return snapshot
+        snapshot = self.forecast_cache.peek(key)
+        if snapshot is not None:
+            logger.warning(f"Serving expired {forecast_range.value} forecast for {location_name}, OpenWeatherMap is unavailable")
+            self.resilience.stats.stale_served += 1
+        return snapshot
+
+    async def _fetch_and_cache(self, key: tuple, location_name: str, lat: float, lon: float, forecast_range: ForecastRange) -> ForecastSnapshot | None:
+        """Fetches a forecast and caches it. Concurrent fetches of the same key share one request."""
+        if self.forecast_backend == "onecall":
+            return await self._fetch_and_cache_onecall(location_name, lat, lon, forecast_range)
+
+        async def fetch() -> ForecastSnapshot | None:
+            snapshot = await self._fetch_forecast_payload(location_name, lat, lon, forecast_range)
+            if snapshot is not None:
+                self.forecast_cache.set(key, snapshot)
+            return snapshot
+
+        try:
+            return await self.single_flight.do(("forecast",) + key, fetch)
+        except DeadlineExceeded as e:
+            logger.warning(f"{forecast_range.value} forecast for {location_name} skipped: {e}")
+            return None
+
+    async def _fetch_and_cache_onecall(self, location_name: str, lat: float, lon: float, forecast_range: ForecastRange) -> ForecastSnapshot | None:
+        """Fetches all ranges of a location with one One Call request and caches each range from it.
+
+        Concurrent fetches of the same location share one request, whatever range they asked for.
+        """
+        async def fetch() -> ForecastSnapshot | None:
+            snapshot = await self._fetch_onecall_payload(location_name, lat, lon)
+            if snapshot is not None:
+                for cached_range, part in _SNAPSHOT_PARTS.items():
+                    self.forecast_cache.set(self.forecast_cache.key(lat, lon, cached_range.value), snapshot.only(part))
+            return snapshot
+
+        try:
+            snapshot = await self.single_flight.do(("forecast",) + self.forecast_cache.key(lat, lon, "onecall"), fetch)
+        except DeadlineExceeded as e:
+            logger.warning(f"One Call forecast for {location_name} skipped: {e}")
+            return None
+        return snapshot.only(_SNAPSHOT_PARTS[forecast_range]) if snapshot is not None else None
+
+    async def _fetch_onecall_payload(self, location_name: str, lat: float, lon: float) -> ForecastSnapshot | None:
+        """Fetches and validates a One Call payload (current, hourly and daily data) and converts it into a snapshot.
+
+        Args:
+            location_name (str): The geocoded name of the coordinates, shown as the location of the current weather.
+
+        Returns:
+            ForecastSnapshot | None: The forecast data of all ranges, or None if the request fails.
+        """
+        params = {
+            "lat": lat,
+            "lon": lon,
+            "appid": self.api_key,
+            "units": "metric",
+            "exclude": "minutely,alerts"
+        }
+        try:
+            with stage_span("forecast_fetch", range="onecall"):
+                response = await self._request(ForecastType.ONECALL.value, params)
+            with stage_span("parse", range="onecall"):
+                return ForecastSnapshot.from_onecall(parse_response(OneCallData, response.content), location=location_name)
+        except (CircuitOpenError, DeadlineExceeded) as e:
+            logger.warning(f"One Call forecast skipped for {location_name}: {e}")
+        except httpx.RequestError as e:
+            logger.error(f"Error fetching One Call forecast for {location_name}: {e}", exc_info=True)
+        except Exception as e:
+            logger.error(f"Error parsing One Call forecast data for {location_name}: {e}", exc_info=True)
+        return None
+
+    def _schedule_refresh(self, key: tuple, location_name: str, lat: float, lon: float, forecast_range: ForecastRange) -> None:
+        """Refreshes a stale cache entry in the background, at most once per key at a time."""
+        if key in self._refreshing:
+            return
+        self._refreshing.add(key)
+
+        async def refresh() -> None:
+            try:
+                await self._fetch_and_cache(key, location_name, lat, lon, forecast_range)
+            finally:
+                self._refreshing.discard(key)
+
+        # A fresh context, so the refresh is not bound by the deadline, session and trace of the query that triggered it
+        task = asyncio.get_running_loop().create_task(refresh(), context=contextvars.Context())
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    async def _fetch_forecast_payload(self, location_name: str, lat: float, lon: float, forecast_range: ForecastRange) -> ForecastSnapshot | None:
+        """Fetches and validates the API payload for a forecast range and converts it into a snapshot.
+
+        The validated payload (WeatherData for CURRENT, HourlyForecastData for HOURLY and
+        DailyForecastData for DAILY/TOMORROW) is dropped after the conversion.
+
+        Returns:
+            ForecastSnapshot | None: The forecast data, or None if the request fails.
+        """
+        params = {
+            "lat": lat,
+            "lon": lon,
+            "appid": self.api_key,
+            "units": "metric"
+        }
+        if forecast_range == ForecastRange.CURRENT:
+            url, model, label = ForecastType.CURRENT.value, self.payload_models[ForecastRange.CURRENT], "current weather"
+            to_snapshot = ForecastSnapshot.from_current
+        elif forecast_range == ForecastRange.HOURLY:
+            url, model, label = ForecastType.HOURLY.value, self.payload_models[ForecastRange.HOURLY], "hourly forecast"
+            to_snapshot = ForecastSnapshot.from_hourly
+        else:
+            # "tomorrow" queries are answered from the daily forecast
+            url, model, label = ForecastType.DAILY.value, self.payload_models[ForecastRange.DAILY], "daily forecast"
+            to_snapshot = ForecastSnapshot.from_daily
+            params["cnt"] = 16
+
+        try:
+            with stage_span("forecast_fetch", range=forecast_range.value):
+                response = await self._request(url, params)
+            # Validated straight from the response bytes, no intermediate dict
+            with stage_span("parse", range=forecast_range.value):
+                return to_snapshot(parse_response(model, response.content))
+        except (CircuitOpenError, DeadlineExceeded) as e:
+            logger.warning(f"{label.capitalize()} skipped for {location_name}: {e}")
+        except httpx.RequestError as e:
+            logger.error(f"Error fetching {label} for {location_name}: {e}", exc_info=True)
+        except Exception as e:
+            logger.error(f"Error parsing {label} data for {location_name}: {e}", exc_info=True)
+        return None
+
+    async def get_weather_forecasts(self, requests: List[ForecastRequest]) -> Dict[str, BatchForecastResult]:
+        """
+        Gets weather forecasts for several locations at once.
+
+        Use this tool instead of calling `get_weather_forecast` repeatedly when the user asks about
+        more than one location. The locations are fetched concurrently.
+
+        Args:
+            requests (List[ForecastRequest]): One entry per location, each with its `location_name` and `forecast_range`.
+
+        Returns:
+            Dict[str, BatchForecastResult]: Maps "<location_name> (<forecast_range>)" to the forecast of that
+                                            location, or to an error message if it could not be retrieved.
+        """
+        semaphore = asyncio.Semaphore(self.batch_max_concurrency)
+
+        async def fetch(request: ForecastRequest) -> BatchForecastResult:
+            result = BatchForecastResult(location_name=request.location_name, forecast_range=request.forecast_range.value)
+            async with semaphore:
+                try:
+                    result.forecast = await self.get_weather_forecast(request.location_name, request.forecast_range,
+                                                                      start_offset=request.start_offset, span=request.span)
+                except Exception as e:
+                    logger.error(f"Error during batch forecast for {request.location_name}: {e}", exc_info=True)
+            if result.forecast is None:
+                result.error = f"Could not retrieve the weather data for {request.location_name}."
+            return result
+
+        results = await asyncio.gather(*(fetch(request) for request in requests))
+        return {f"{result.location_name} ({result.forecast_range})": result for result in results}